@@ -2,17 +2,25 @@
 """离线预计算基线价值缓存。
 
 生成锚点状态网格，对每个状态 × 配置 × paid_draws ∈ [1, N] 计算基线估计。
-结果写入 data/baseline_cache.db，运行时 BaselineEstimator 自动命中。
+结果写入 data/baseline_cache.db，运行时 BaselineEstimator 自动命中；同时为每个配置
+导出网格张量 data/baseline_cache.lattice/*.npy，运行时以内存映射加载并做多线性插值。
+
+重复运行时跳过当前 SCORING_VERSION 下已完整在库的 (配置, 锚点) 任务，每个任务的条目与
+完成标记同一事务写入，中断后重跑即可续算；--shard 把网格按任务哈希分给多台机器，
+各自写入独立数据库后用 --merge 合并。
 
 用法：
     uv run python build/precompute_cache.py
     uv run python build/precompute_cache.py --configs config_3
     uv run python build/precompute_cache.py --configs config_3,config_4 --paid-draws 300 --samples 128
+    uv run python build/precompute_cache.py --shard 0/4 --db-path data/shard0.db
+    uv run python build/precompute_cache.py --merge data/shard0.db,data/shard1.db,data/shard2.db,data/shard3.db
 """
 
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import sys
 import time
@@ -24,29 +32,26 @@ from typing import Any, Dict, List, Optional, Tuple
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from gacha_core import CharGacha, Counters, GlobalConfigLoader  # noqa: E402
+from gacha_core import BatchRandom, CharGacha, Counters, GlobalConfigLoader  # noqa: E402
+from gacha_core.randomizer import STREAM_BASELINE  # noqa: E402
+from scheduler.baseline import BASELINE_RNG_SCHEME, BaselineEstimator  # noqa: E402
 from scheduler.cache_db import BaselineCacheDB, preferences_hash  # noqa: E402
+from scheduler.lattice import (  # noqa: E402
+    GUARANTEE_VALUES,
+    NO_6STAR_VALUES,
+    NO_UP_VALUES,
+    BaselineLattice,
+)
 from scheduler.models import (  # noqa: E402
     SCORING_VERSION,
     ScoringPreferences,
-    calculate_results_value,
+    ValueAccumulator,
 )
 
 # ---------------------------------------------------------------------------
 # 锚点状态网格
 # ---------------------------------------------------------------------------
-# 6 维计数器不可能全遍历，只采样最关键的维度：
-#   - no_6star（保底计数器，scale=15）: 均匀采样
-#   - no_up（UP 保底计数器，scale=30）: 均匀采样
-#   - guarantee_used（硬保底，scale=1）: 开关
-# 以下维度对 baseline 价值估计无影响，固定为 0/False：
-#   - total、no_5star_plus、urgent_used
-
-NO_6STAR_VALUES = [
-    0, 10, 20, 30, 40, 50, 55, 60, 65, 70, 75, 80, 85, 90, 95, 100,
-]
-NO_UP_VALUES = [0, 30, 60, 90, 120]
-GUARANTEE_VALUES = [False, True]
+# 网格定义在 scheduler.lattice 中，运行时的张量插值与此处共用同一份坐标
 
 
 def _build_state_counters(
@@ -63,7 +68,7 @@ def _build_state_counters(
 
 
 # ---------------------------------------------------------------------------
-# 种子与 cache_key 生成（与 BaselineEstimator 保持一致）
+# 样本随机流与 cache_key 生成（与 BaselineEstimator 保持一致）
 # ---------------------------------------------------------------------------
 
 
@@ -71,9 +76,8 @@ def _cache_key(*parts: Any) -> str:
     return md5(repr(parts).encode("utf-8")).hexdigest()
 
 
-def _build_seed(base_seed: int, cache_key: str, index: int) -> int:
-    payload = f"{base_seed}|{cache_key}|{index}".encode("utf-8")
-    return int(md5(payload).hexdigest()[:8], 16)
+def _sample_random(base_seed: int, index: int) -> BatchRandom:
+    return BatchRandom.from_stream(base_seed, index, kind=STREAM_BASELINE)
 
 
 # ---------------------------------------------------------------------------
@@ -110,7 +114,7 @@ def _precompute_task(args: Tuple) -> List[Dict[str, Any]]:
         counters.urgent_used,
     )
 
-    config = GlobalConfigLoader(os.path.join(config_dir, config_name))
+    config = GlobalConfigLoader.shared(os.path.join(config_dir, config_name))
     featured_names = config.get_char_featured_names()
     current_up_names = set(featured_names["current_up"])
     past_up_names = set(featured_names["past_up"])
@@ -127,33 +131,17 @@ def _precompute_task(args: Tuple) -> List[Dict[str, Any]]:
     pd_cumulative: Dict[int, List[float]] = {pd: [] for pd in pd_values}
 
     for sample_idx in range(samples):
-        # 构造 cache_key 与运行时一致（用于 seed 派生）
-        ck = _cache_key(
-            "baseline",
-            config_name,
-            counters,
-            0,  # 临时值，build_seed 只用 cache_key 和 index
-            preferences.theta_signature,
-            samples,
-            base_seed,
-        )
-        seed = _build_seed(base_seed, ck, sample_idx)
-        gacha = CharGacha(config=config, seed=seed)
+        # 样本随机流只由 (base_seed, sample_idx) 定位，与运行时一致
+        gacha = CharGacha(config=config, rand=_sample_random(base_seed, sample_idx))
         gacha.counters = deepcopy(counters)
 
-        results: List[Dict[str, Any]] = []
+        # 增量累加器每抽 O(1) 更新，逐抽读出累计价值
+        accumulator = ValueAccumulator(preferences)
         for pd in pd_values:
             result = gacha.attempt()
-            results.append(
-                {
-                    "name": result.name,
-                    "star": result.star,
-                    "is_current_up": result.name in current_up_names,
-                    "is_past_up": result.name in past_up_names,
-                }
-            )
-            val = calculate_results_value(results, preferences)
-            pd_cumulative[pd].append(val)
+            name = result.name
+            accumulator.add_draw(name, result.star, name in current_up_names, name in past_up_names)
+            pd_cumulative[pd].append(accumulator.value)
 
     # 平均每个 pd
     entries: List[Dict[str, Any]] = []
@@ -169,15 +157,16 @@ def _precompute_task(args: Tuple) -> List[Dict[str, Any]]:
             preferences.theta_signature,
             samples,
             base_seed,
+            BASELINE_RNG_SCHEME,
         )
 
         entries.append(
             {
                 "cache_key": full_ck,
                 "config_name": config_name,
-                "counters_sig": counters_sig,
+                "counters_signature": counters_sig,
                 "paid_draws": pd,
-                "pref_hash": pref_hash,
+                "preferences_sig_hash": pref_hash,
                 "samples": samples,
                 "seed": base_seed,
                 "estimate": estimate,
@@ -189,6 +178,11 @@ def _precompute_task(args: Tuple) -> List[Dict[str, Any]]:
     return entries
 
 
+def _precompute_indexed_task(task: Tuple) -> Tuple[Tuple, List[Dict[str, Any]]]:
+    """``imap_unordered`` 用：结果带回任务本身，便于主进程记录完成标记。"""
+    return task, _precompute_task(task)
+
+
 # ---------------------------------------------------------------------------
 # CLI
 # ---------------------------------------------------------------------------
@@ -232,9 +226,36 @@ def parse_args() -> argparse.Namespace:
         default=0,
         help="并行进程数（默认使用 CPU 核心数）",
     )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=(0, 1),
+        help="只计算第 i 个分片，格式 i/n（i 从 0 开始，默认 0/1 即全部）",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="忽略已完成的任务，全部重新计算",
+    )
+    parser.add_argument(
+        "--merge",
+        default=None,
+        help="逗号分隔的分片数据库路径：合并进 --db-path 并导出张量，不做计算",
+    )
     return parser.parse_args()
 
 
+def parse_shard(value: str) -> Tuple[int, int]:
+    try:
+        index_text, count_text = value.split("/")
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式应为 i/n: {value}") from None
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"分片下标越界: {value}")
+    return index, count
+
+
 def resolve_configs(configs_arg: Optional[str]) -> List[str]:
     if configs_arg:
         return [name.strip() for name in configs_arg.split(",")]
@@ -250,6 +271,78 @@ def resolve_configs(configs_arg: Optional[str]) -> List[str]:
     return configs
 
 
+def export_lattices(
+    db_path: str,
+    configs: List[str],
+    samples: int,
+    base_seed: int,
+    preferences: ScoringPreferences,
+) -> None:
+    """把数据库中的网格锚点导出为可内存映射的张量文件（与数据库同目录）。"""
+    estimator = BaselineEstimator(samples=samples, base_seed=base_seed, cache_path=db_path)
+    pref_hash = preferences_hash(preferences.theta_signature)
+    for config_name in configs:
+        data = estimator._get_config_data(config_name, preferences)
+        lattice = BaselineLattice.from_rows(data) if data is not None else None
+        if lattice is None:
+            print(f"  {config_name}: 没有网格锚点，跳过张量导出")
+            continue
+        path = BaselineLattice.path_for(db_path, config_name, samples, base_seed, pref_hash)
+        lattice.save(path, {"config_name": config_name, "version": SCORING_VERSION})
+        print(f"  {config_name}: 张量 {lattice.values.shape} → {path}")
+    estimator.flush_cache()
+
+
+# ---------------------------------------------------------------------------
+# 断点续算与分片
+# ---------------------------------------------------------------------------
+
+
+def _task_id(task: Tuple) -> str:
+    """任务在网格中的稳定标识：config/no_6star/no_up/guarantee_used。"""
+    return f"{task[1]}/{task[2]}/{task[3]}/{int(task[4])}"
+
+
+def _task_shard(task: Tuple, shard_count: int) -> int:
+    # 按标识哈希分片：新增配置不会改变已有任务所属的分片
+    return int(md5(_task_id(task).encode("utf-8")).hexdigest(), 16) % shard_count
+
+
+def _run_key(paid_draws_max: int, samples: int, base_seed: int, pref_hash: str) -> str:
+    """``cache_meta`` 中一次预计算参数组合的前缀，版本变化后旧记录自然失效。"""
+    return f"{SCORING_VERSION}:{paid_draws_max}:{samples}:{base_seed}:{pref_hash[:16]}"
+
+
+def pending_tasks(db: BaselineCacheDB, tasks: List[Tuple], pref_hash: str) -> List[Tuple]:
+    """过滤掉当前 ``SCORING_VERSION`` 下 ``1..paid_draws_max`` 已全部在库的任务。
+
+    先看 ``cache_meta`` 中的完成标记，再按锚点统计已有条目（兼容没有标记的旧库）。
+    """
+    coverage: Dict[str, Dict[Tuple[int, int, bool], int]] = {}
+    pending: List[Tuple] = []
+    for task in tasks:
+        _, config_name, no_6star, no_up, guarantee_used, paid_draws_max, samples, base_seed, _ = task
+        run_key = _run_key(paid_draws_max, samples, base_seed, pref_hash)
+        if db.get_meta(f"precompute:{run_key}:{_task_id(task)}") is not None:
+            continue
+        if config_name not in coverage:
+            coverage[config_name] = db.anchor_coverage(
+                config_name, samples, base_seed, pref_hash, SCORING_VERSION, paid_draws_max
+            )
+        if coverage[config_name].get((no_6star, no_up, guarantee_used), 0) >= paid_draws_max:
+            continue
+        pending.append(task)
+    return pending
+
+
+def merge_databases(db_path: str, sources: List[str]) -> None:
+    db = BaselineCacheDB(db_path)
+    for source in sources:
+        merged = db.merge_from(source)
+        print(f"  合并 {source}: {merged} 条")
+    db.close()
+
+
 def main() -> None:
     args = parse_args()
     configs = resolve_configs(args.configs)
@@ -259,13 +352,23 @@ def main() -> None:
     workers = args.workers or max(1, cpu_count())
     db_path = args.db_path
 
+    preferences = ScoringPreferences()
+    pref_hash = preferences_hash(preferences.theta_signature)
+
+    if args.merge:
+        sources = [path.strip() for path in args.merge.split(",") if path.strip()]
+        print(f"合并 {len(sources)} 个分片数据库 → {db_path}")
+        merge_databases(db_path, sources)
+        export_lattices(db_path, configs, samples, base_seed, preferences)
+        print(f"缓存总条目: {BaselineCacheDB(db_path).estimate_count}")
+        return
+
+    shard_index, shard_count = args.shard
     print(f"配置: {configs}")
     print(f"最大抽数: {paid_draws_max}, 样本数: {samples}, 种子: {base_seed}")
     print(f"Worker 数: {workers}")
     print()
 
-    preferences = ScoringPreferences()
-
     # 构建任务列表
     tasks: List[Tuple] = []
     for config_name, no_6star, no_up, guarantee_used in product(
@@ -293,49 +396,61 @@ def main() -> None:
             )
         )
 
-    total_tasks = len(tasks)
+    grid_tasks = len(tasks)
     print(f"锚点状态组合: {len(configs)} 配置 × {len(NO_6STAR_VALUES)} no_6star"
           f" × {len(NO_UP_VALUES)} no_up × {len(GUARANTEE_VALUES)} guarantee"
-          f" = {total_tasks} 任务, 预计 {total_tasks * paid_draws_max} 条目")
+          f" = {grid_tasks} 任务")
+
+    tasks = [task for task in tasks if _task_shard(task, shard_count) == shard_index]
+    shard_tasks = len(tasks)
+    db = BaselineCacheDB(db_path)
+    if not args.force:
+        tasks = pending_tasks(db, tasks, pref_hash)
+    total_tasks = len(tasks)
+    print(f"分片 {shard_index}/{shard_count}: {shard_tasks} 任务, 已完成 {shard_tasks - total_tasks},"
+          f" 待计算 {total_tasks}")
     print(f"预计条目数: {total_tasks} × {paid_draws_max} pd = {total_tasks * paid_draws_max}")
     print()
 
     start_time = time.time()
-
-    db = BaselineCacheDB(db_path)
-
-    # 使用多进程 + 逐任务写入 DB（避免单进程内存爆炸）
-    with Pool(processes=min(workers, total_tasks)) as pool:
-        for idx, entries in enumerate(pool.imap_unordered(_precompute_task, tasks), 1):
-            for entry in entries:
-                db.set_baseline(
-                    cache_key=entry["cache_key"],
-                    config_name=entry["config_name"],
-                    counters_signature=entry["counters_sig"],
-                    paid_draws=entry["paid_draws"],
-                    preferences_sig_hash=entry["pref_hash"],
-                    samples=entry["samples"],
-                    seed=entry["seed"],
-                    estimate=entry["estimate"],
-                    source=entry["source"],
-                    version=entry["version"],
-                )
-
+    run_key = _run_key(paid_draws_max, samples, base_seed, pref_hash)
+
+    # 使用多进程 + 逐任务写入 DB（避免单进程内存爆炸）；每个任务一个事务，
+    # 导入期间关闭同步并推迟插值索引，结束后统一重建
+    written = 0
+    write_seconds = 0.0
+    with db.bulk_load(), Pool(processes=max(1, min(workers, total_tasks))) as pool:
+        for idx, (task, entries) in enumerate(pool.imap_unordered(_precompute_indexed_task, tasks), 1):
+            write_started = time.time()
+            # 条目与完成标记同一事务提交：中断后重跑只补算缺失的任务
+            done = {f"precompute:{run_key}:{_task_id(task)}": json.dumps({"rows": len(entries)})}
+            written += db.set_baselines_bulk(entries, meta=done)
+            write_seconds += time.time() - write_started
+
+            entry = entries[-1]
             elapsed = time.time() - start_time
             eta = (elapsed / idx) * (total_tasks - idx) if idx > 0 else 0
             print(
                 f"  [{idx}/{total_tasks}] {entry['config_name']} "
-                f"no6={entry['counters_sig'][1]} "
-                f"noup={entry['counters_sig'][3]} "
-                f"guar={entry['counters_sig'][4]} "
+                f"no6={entry['counters_signature'][1]} "
+                f"noup={entry['counters_signature'][3]} "
+                f"guar={entry['counters_signature'][4]} "
                 f"— {elapsed:.0f}s elapsed, ETA {eta:.0f}s"
             )
 
+    db.set_meta(
+        f"precompute_shard:{run_key}:{shard_index}/{shard_count}",
+        json.dumps({"configs": configs, "tasks": shard_tasks, "computed": total_tasks}, ensure_ascii=False),
+    )
     db.close()
 
+    export_lattices(db_path, configs, samples, base_seed, preferences)
+
     total_time = time.time() - start_time
     print()
     print(f"完成！总耗时: {total_time:.1f}s")
+    print(f"写入: {written} 条, 耗时 {write_seconds:.2f}s"
+          f" ({written / write_seconds if write_seconds > 0 else 0:.0f} 条/秒)")
     print(f"数据库: {db_path}")
     print(f"缓存总条目: {BaselineCacheDB(db_path).estimate_count}")
 
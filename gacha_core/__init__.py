@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 """Endfield gacha core package."""
 
+from .banner import BannerModel
+from .batch import CharGachaBatch, WeaponGachaBatch
 from .char import CharGacha
 from .config import GlobalConfigLoader
+from .exact import CharBannerDistribution, CharBannerSolver, CharBannerValueTable
 from .models import Counters, GachaResult
+from .randomizer import BatchRandom
 from .weapon import WeaponGacha
 
 __version__ = "2.5.0"
@@ -12,7 +16,14 @@ __author__ = "Arsvine"
 __all__ = [
     "GachaResult",
     "Counters",
+    "BatchRandom",
     "GlobalConfigLoader",
+    "BannerModel",
     "WeaponGacha",
     "CharGacha",
+    "CharGachaBatch",
+    "WeaponGachaBatch",
+    "CharBannerSolver",
+    "CharBannerDistribution",
+    "CharBannerValueTable",
 ]
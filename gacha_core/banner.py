@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""编译后的只读卡池模型。"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+STAR_ORDER = (6, 5, 4)
+
+
+@dataclass(frozen=True)
+class StarPool:
+    """单个星级的名称表与 UP 累积概率
+
+    Parameters
+    ----------
+    star : int
+        星级
+    up_names : Tuple[str, ...]
+        UP 名称
+    up_cumulative : Tuple[float, ...]
+        UP 名称的累积概率阈值，与 ``up_names`` 一一对应
+    normal_names : Tuple[str, ...]
+        普通名称
+    offset : int
+        该星级第一个名称在 ``BannerModel.names`` 中的下标
+    """
+
+    star: int
+    up_names: Tuple[str, ...]
+    up_cumulative: Tuple[float, ...]
+    normal_names: Tuple[str, ...]
+    offset: int
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return self.up_names + self.normal_names
+
+
+@dataclass(frozen=True)
+class BannerModel:
+    """由配置编译一次、在所有卡池实例间共享的只读卡池模型
+
+    模型只包含配置推导出的常量（名称索引表、UP 累积概率、星级阈值、保底参数），
+    不含任何抽卡状态。``CharGacha`` / ``WeaponGacha`` 只持有计数器与随机数，
+    并引用同一个模型，因此实例构造不再重复解析配置或重建概率表。
+
+    Parameters
+    ----------
+    pool_type : str
+        卡池类型，``"char"`` 或 ``"weapon"``
+    pools : Tuple[StarPool, ...]
+        按 6/5/4 星排列的星级名称表
+    primary_up_name : str
+        主 UP 名称，无 UP 时为空字符串
+    base_6star_prob, base_5star_prob, base_4star_prob : float
+        基础出率
+    quota_by_star : Tuple[int, ...]
+        以星级为下标的配额表
+    rewards : Tuple[Tuple[str, Any], ...]
+        累计奖励配置
+    guarantee_6star : int
+        6 星保底（角色池为抽数，武器池为申领次数）
+    up_guarantee : int
+        UP 保底（角色池为抽数，武器池为申领次数）
+    guarantee_5star_plus : int
+        角色池 5 星及以上保底抽数
+    six_star_increase_start : int
+        角色池 6 星概率开始递增的抽数
+    prob_increase : float
+        角色池每抽递增的 6 星概率
+    prob_upper : float
+        角色池 6 星概率上限
+    apply_draws : int
+        武器池每次申领的抽数
+    per_apply_must_have : bool
+        武器池每次申领是否至少出一个 5 星
+
+    Notes
+    -----
+    角色池额外预计算以有效水位为下标的概率表：``six_star_thresholds`` 为 6 星判定阈值，
+    ``five_star_probs`` 为调整后的 5 星概率，``five_star_thresholds`` 为 6 星 + 5 星合并阈值。
+    标量抽卡、批量引擎与精确求解器共用这些表，保证概率逐位一致。
+    """
+
+    pool_type: str
+    pools: Tuple[StarPool, ...]
+    primary_up_name: str
+    base_6star_prob: float
+    base_5star_prob: float
+    base_4star_prob: float
+    quota_by_star: Tuple[int, ...]
+    rewards: Tuple[Tuple[str, Any], ...]
+    guarantee_6star: int
+    up_guarantee: int
+    guarantee_5star_plus: int = 0
+    six_star_increase_start: int = 0
+    prob_increase: float = 0.0
+    prob_upper: float = 1.0
+    apply_draws: int = 0
+    per_apply_must_have: bool = False
+    # 以下为派生的阈值与查找结构，不参与比较与哈希
+    base_5star_ratio: float = field(init=False, compare=False, repr=False)
+    base_65star_threshold: float = field(init=False, compare=False, repr=False)
+    six_star_thresholds: Tuple[float, ...] = field(init=False, compare=False, repr=False)
+    five_star_probs: Tuple[float, ...] = field(init=False, compare=False, repr=False)
+    five_star_thresholds: Tuple[float, ...] = field(init=False, compare=False, repr=False)
+    names: Tuple[str, ...] = field(init=False, compare=False, repr=False)
+    name_index: Dict[str, int] = field(init=False, compare=False, repr=False)
+    star_up_prob: Dict[int, Tuple[List[str], List[float]]] = field(init=False, compare=False, repr=False)
+    star_normal: Dict[int, List[str]] = field(init=False, compare=False, repr=False)
+    quota_rule: Dict[int, int] = field(init=False, compare=False, repr=False)
+    reward_config: Dict[str, Any] = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        names = tuple(name for pool in self.pools for name in pool.names)
+        base_5star_ratio = self.base_5star_prob / (self.base_5star_prob + self.base_4star_prob)
+        six_star_probs, five_star_probs = self._pity_probs(base_5star_ratio)
+        derived = {
+            # 非 6 星部分中 5 星所占比例；6 星与 5 星基础出率之和即 5 星判定阈值
+            "base_5star_ratio": base_5star_ratio,
+            "base_65star_threshold": self.base_6star_prob + self.base_5star_prob,
+            "six_star_thresholds": six_star_probs,
+            "five_star_probs": five_star_probs,
+            "five_star_thresholds": tuple(six + five for six, five in zip(six_star_probs, five_star_probs)),
+            "names": names,
+            "name_index": {name: index for index, name in enumerate(names)},
+            "star_up_prob": {
+                pool.star: (list(pool.up_names), list(pool.up_cumulative)) for pool in self.pools
+            },
+            "star_normal": {pool.star: list(pool.normal_names) for pool in self.pools},
+            "quota_rule": {
+                star: quota for star, quota in enumerate(self.quota_by_star) if star in STAR_ORDER
+            },
+            "reward_config": dict(self.rewards),
+        }
+        for key, value in derived.items():
+            object.__setattr__(self, key, value)
+
+    def _pity_probs(self, base_5star_ratio: float) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+        """按有效水位（本抽计入后的未出 6 星抽数）预计算角色池 6 星与 5 星概率。
+
+        下标范围为 ``0..guarantee_6star``；下标 0 对应禁用保底的抽样。武器池没有软保底，返回空表。
+        """
+        if self.pool_type != "char":
+            return (), ()
+        six_star_probs: List[float] = []
+        five_star_probs: List[float] = []
+        for effective_no_6star in range(self.guarantee_6star + 1):
+            six_prob = self.base_6star_prob
+            if effective_no_6star > self.six_star_increase_start:
+                six_prob += (effective_no_6star - self.six_star_increase_start) * self.prob_increase
+                six_prob = min(six_prob, self.prob_upper)
+            remaining_prob = max(0.0, 1.0 - six_prob)
+            six_star_probs.append(six_prob)
+            five_star_probs.append(remaining_prob * base_5star_ratio if remaining_prob > 0 else 0.0)
+        return tuple(six_star_probs), tuple(five_star_probs)
+
+    @property
+    def up_names(self) -> Tuple[str, ...]:
+        """6 星 UP 名称。"""
+        return self.pools[0].up_names
+
+    def pool(self, star: int) -> StarPool:
+        return self.pools[STAR_ORDER.index(star)]
+
+    @classmethod
+    def compile(cls, tables: Dict[str, Any], pool_type: str) -> "BannerModel":
+        """从 ``GlobalConfigLoader.get_banner_tables`` 的结果编译模型
+
+        Parameters
+        ----------
+        tables : Dict[str, Any]
+            预处理后的卡池表
+        pool_type : str
+            卡池类型，``"char"`` 或 ``"weapon"``
+
+        Returns
+        -------
+        BannerModel
+            编译后的只读模型
+
+        Raises
+        ------
+        ValueError
+            主 UP 名称与卡池配置不一致时
+        """
+        rules = tables["rule_config"]
+        pools: List[StarPool] = []
+        offset = 0
+        for star in STAR_ORDER:
+            up_names, up_probs = tables["star_up_prob"][star]
+            normal_names = tables["star_normal"][star]
+            pool = StarPool(star, tuple(up_names), tuple(up_probs), tuple(normal_names), offset)
+            pools.append(pool)
+            offset += len(pool.names)
+
+        quota_by_star = [0] * (max(STAR_ORDER) + 1)
+        for star, quota in rules["quota_rule"].items():
+            quota_by_star[star] = quota
+
+        common = {
+            "pool_type": pool_type,
+            "pools": tuple(pools),
+            "base_6star_prob": float(rules["base_prob"][6]),
+            "base_5star_prob": float(rules["base_prob"][5]),
+            "base_4star_prob": float(rules["base_prob"][4]),
+            "quota_by_star": tuple(quota_by_star),
+            "rewards": tuple(rules["rewards"].items()),
+        }
+        up_names = pools[0].up_names
+        if pool_type == "char":
+            primary_up_name = rules["up_char_name"]
+            label = "角色池"
+            model = cls(
+                primary_up_name=primary_up_name or "",
+                guarantee_6star=rules["guarantee_6star_draw"],
+                up_guarantee=rules["up_guarantee_draw"],
+                guarantee_5star_plus=rules["guarantee_5star_plus_draw"],
+                six_star_increase_start=rules["6star_prob_increase_start"],
+                prob_increase=float(rules["prob_increase"]),
+                prob_upper=float(rules["prob_upper_limit"]),
+                **common,
+            )
+        elif pool_type == "weapon":
+            primary_up_name = rules["up_weapon_name"]
+            label = "武器池"
+            model = cls(
+                primary_up_name=primary_up_name or "",
+                guarantee_6star=rules["guarantee_6star_apply"],
+                up_guarantee=rules["up_guarantee_apply"],
+                apply_draws=rules["apply_draws"],
+                per_apply_must_have=rules["per_apply_must_have"],
+                **common,
+            )
+        else:
+            raise ValueError(f"未知卡池类型: {pool_type}")
+
+        if up_names and primary_up_name not in up_names:
+            raise ValueError(f"{label}6星 UP 目标不存在于卡池配置中")
+        if not up_names and primary_up_name not in ("", None):
+            target = "up_char_name" if pool_type == "char" else "up_weapon_name"
+            raise ValueError(f"{label}没有 6 星 UP 目标时，{target} 必须为空")
+        return model
+
+
+__all__ = ["BannerModel", "StarPool"]
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+"""批量抽卡引擎：以 NumPy 数组同步推进大量独立玩家。"""
+
+from dataclasses import dataclass
+from time import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from numpy import random as np_rand
+
+from .config import GlobalConfigLoader
+from .models import Counters
+
+
+@dataclass
+class CharBatchDraw:
+    """角色池批量单抽结果，所有字段均为长度为 N 的数组
+
+    Parameters
+    ----------
+    star : np.ndarray
+        星级（int8）
+    name_id : np.ndarray
+        名称索引（int16），对应 ``CharGachaBatch.names``
+    is_up : np.ndarray
+        是否为 6 星 UP 干员
+    is_up_g : np.ndarray
+        UP 保底标记
+    is_6_g : np.ndarray
+        6星保底标记
+    is_5_g : np.ndarray
+        5星保底标记
+    """
+
+    star: np.ndarray
+    name_id: np.ndarray
+    is_up: np.ndarray
+    is_up_g: np.ndarray
+    is_6_g: np.ndarray
+    is_5_g: np.ndarray
+
+
+def _resolve_seed(seed: int) -> int:
+    if seed < 0:
+        seed = int(time() * 1_000_000) % (2**32)
+    return seed
+
+
+class _StarTable:
+    """单个星级的名称索引表（UP 累积阈值 + 普通池索引）。"""
+
+    def __init__(
+        self, up_names: Sequence[str], up_probs: Sequence[float], normal_names: Sequence[str], offset: int
+    ):
+        self.up_count = len(up_names)
+        self.normal_count = len(normal_names)
+        self.up_probs = np.asarray(up_probs, dtype=np.float64)
+        self.up_ids = np.arange(offset, offset + self.up_count, dtype=np.int16)
+        self.normal_ids = np.arange(
+            offset + self.up_count, offset + self.up_count + self.normal_count, dtype=np.int16
+        )
+        self.names = list(up_names) + list(normal_names)
+
+    def pick(self, u_up: np.ndarray, u_normal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按 UP 累积阈值选择名称，返回 (name_id, is_up)。"""
+        size = len(u_up)
+        if not self.up_count:
+            return self.normal_ids[self._normal_index(u_normal)], np.zeros(size, dtype=bool)
+        idx = np.minimum(np.searchsorted(self.up_probs, u_up, side="right"), self.up_count)
+        is_up = idx < self.up_count
+        up_ids = self.up_ids[np.minimum(idx, self.up_count - 1)]
+        if not self.normal_count:
+            return up_ids, np.ones(size, dtype=bool)
+        return np.where(is_up, up_ids, self.normal_ids[self._normal_index(u_normal)]), is_up
+
+    def _normal_index(self, u: np.ndarray) -> np.ndarray:
+        return np.minimum((u * self.normal_count).astype(np.intp), self.normal_count - 1)
+
+    def pick_up(self, u: np.ndarray) -> np.ndarray:
+        """等概率选择 UP 名称（对应 UP 保底）。"""
+        idx = np.minimum((u * self.up_count).astype(np.intp), self.up_count - 1)
+        return self.up_ids[idx]
+
+
+class CharGachaBatch:
+    """角色卡池批量引擎，使用掩码数组运算同步推进 N 个独立玩家
+
+    与 ``CharGacha.attempt`` 的单抽语义完全一致（软保底概率爬升、80 抽 6 星保底、
+    10 抽 5 星保底、120 抽 UP 保底），但计数器以 NumPy 数组保存，
+    每次 ``attempt`` 一次性为所有玩家各抽一次。适用于大规模分布统计，
+    不产生 ``GachaResult`` 对象，结果以紧凑的整数数组返回。
+
+    Examples
+    --------
+    >>> from gacha_core import CharGachaBatch
+    >>> batch = CharGachaBatch(players=10000, seed=7)
+    >>> stars, name_ids = batch.run(120)
+    >>> six_star_counts = (stars == 6).sum(axis=0)
+    """
+
+    def __init__(
+        self,
+        config: GlobalConfigLoader | None = None,
+        players: int = 1024,
+        seed: int = -1,
+        counters: Counters | None = None,
+    ):
+        """初始化角色卡池批量引擎
+
+        Parameters
+        ----------
+        config : GlobalConfigLoader, optional
+            配置加载器实例，默认使用 configs/config_1
+        players : int, optional
+            同步模拟的玩家数量，默认1024
+        seed : int, optional
+            随机数种子，默认-1（自动基于时间戳+微秒生成随机种子）
+        counters : Counters, optional
+            所有玩家共享的初始计数器，默认全新卡池
+        """
+        if not isinstance(players, int) or players <= 0:
+            raise ValueError(f"玩家数量必须是正整数，当前传入: {players}")
+        self.config = config if config else GlobalConfigLoader.shared()
+        self.players = players
+        self.seed = _resolve_seed(seed)
+        self.np_rand = np_rand.RandomState(self.seed)
+        self.model = self.config.get_banner_model("char")
+        self._precache_data()
+        self.init_counters(counters)
+
+    def _precache_data(self):
+        """预缓存名称索引表与规则参数。"""
+        model = self.model
+        self.star_tables: Dict[int, _StarTable] = {
+            pool.star: _StarTable(pool.up_names, pool.up_cumulative, pool.normal_names, pool.offset)
+            for pool in model.pools
+        }
+        self.names: List[str] = list(model.names)
+
+        self.base_6star_prob = model.base_6star_prob
+        self.base_5star_ratio = model.base_5star_ratio
+        self.prob_increase = model.prob_increase
+        self.prob_upper = model.prob_upper
+        self.six_star_increase_start = model.six_star_increase_start
+        self.guarantee_5star_plus_draw = model.guarantee_5star_plus
+        self.guarantee_6star_draw = model.guarantee_6star
+        self.up_guarantee_draw = model.up_guarantee
+        # 与标量引擎共用的水位概率表
+        self.six_star_thresholds = np.asarray(model.six_star_thresholds, dtype=np.float64)
+        self.five_star_thresholds = np.asarray(model.five_star_thresholds, dtype=np.float64)
+        self._has_up = self.star_tables[6].up_count > 0
+
+    def init_counters(self, counters: Counters | None = None):
+        """按同一份计数器重置全部玩家的状态。"""
+        counters = counters if counters else Counters()
+        size = self.players
+        self.total = np.full(size, counters.total, dtype=np.int32)
+        self.no_6star = np.full(size, counters.no_6star, dtype=np.int32)
+        self.no_5star_plus = np.full(size, counters.no_5star_plus, dtype=np.int32)
+        self.no_up = np.full(size, counters.no_up, dtype=np.int32)
+        self.guarantee_used = np.full(size, bool(counters.guarantee_used), dtype=bool)
+
+    def get_counters(self, index: int) -> Counters:
+        """导出单个玩家的计数器快照。"""
+        return Counters(
+            total=int(self.total[index]),
+            no_6star=int(self.no_6star[index]),
+            no_5star_plus=int(self.no_5star_plus[index]),
+            no_up=int(self.no_up[index]),
+            guarantee_used=bool(self.guarantee_used[index]),
+        )
+
+    def attempt(self) -> CharBatchDraw:
+        """所有玩家同步单抽一次，返回紧凑的批量结果
+
+        Returns
+        -------
+        CharBatchDraw
+            各字段为长度 N 的数组
+        """
+        size = self.players
+        self.total += 1
+        eff_6 = self.no_6star + 1
+        eff_5 = self.no_5star_plus + 1
+        eff_up = self.no_up + 1
+
+        pity = np.minimum(eff_6, self.guarantee_6star_draw)
+        six_prob = self.six_star_thresholds[pity]
+        five_threshold = self.five_star_thresholds[pity]
+
+        if self._has_up:
+            up_g = ~self.guarantee_used & (eff_up >= self.up_guarantee_draw)
+        else:
+            up_g = np.zeros(size, dtype=bool)
+        hard = ~up_g & (eff_6 >= self.guarantee_6star_draw)
+        five_g = ~up_g & ~hard & (eff_5 >= self.guarantee_5star_plus_draw)
+        normal = ~up_g & ~hard & ~five_g
+
+        rand = self.np_rand.random(size)
+        u_up = self.np_rand.random(size)
+        u_normal = self.np_rand.random(size)
+
+        rolled_6 = rand < six_prob
+        six = hard | (~up_g & rolled_6)
+        five = ~up_g & ~hard & ~rolled_6 & (five_g | (rand < five_threshold))
+        four = ~up_g & ~six & ~five
+
+        star = np.full(size, 4, dtype=np.int8)
+        star[five] = 5
+        star[six | up_g] = 6
+
+        name_id = np.empty(size, dtype=np.int16)
+        is_up = np.zeros(size, dtype=bool)
+        for tier, mask in ((6, six), (5, five), (4, four)):
+            if mask.any():
+                ids, tier_up = self.star_tables[tier].pick(u_up[mask], u_normal[mask])
+                name_id[mask] = ids
+                if tier == 6:
+                    is_up[mask] = tier_up
+        if up_g.any():
+            name_id[up_g] = self.star_tables[6].pick_up(u_up[up_g])
+            is_up[up_g] = True
+
+        got_6 = six | up_g
+        self.no_6star = np.where(got_6, 0, eff_6)
+        self.no_5star_plus = np.where(got_6 | five, 0, eff_5)
+        self.no_up = np.where(is_up, 0, eff_up)
+        self.guarantee_used = self.guarantee_used | up_g | (normal & six & is_up)
+
+        return CharBatchDraw(
+            star=star,
+            name_id=name_id,
+            is_up=is_up,
+            is_up_g=up_g,
+            is_6_g=hard,
+            is_5_g=five_g,
+        )
+
+    def run(self, draws: int) -> Tuple[np.ndarray, np.ndarray]:
+        """连续推进 ``draws`` 次，返回 (draws, N) 的星级矩阵与名称索引矩阵。"""
+        stars = np.empty((draws, self.players), dtype=np.int8)
+        name_ids = np.empty((draws, self.players), dtype=np.int16)
+        for step in range(draws):
+            result = self.attempt()
+            stars[step] = result.star
+            name_ids[step] = result.name_id
+        return stars, name_ids
+
+
+@dataclass
+class WeaponBatchIssue:
+    """武器池批量申领结果
+
+    Parameters
+    ----------
+    star : np.ndarray
+        (N, apply_draws) 的星级矩阵（int8）
+    name_id : np.ndarray
+        (N, apply_draws) 的名称索引矩阵（int16），对应 ``WeaponGachaBatch.names``
+    is_up : np.ndarray
+        (N, apply_draws) 的 UP 武器标记
+    is_up_g : np.ndarray
+        长度 N，最后一抽是否被 UP 保底替换
+    is_6_g : np.ndarray
+        长度 N，最后一抽是否被 6 星保底替换
+    is_5_g : np.ndarray
+        长度 N，最后一抽是否被 5 星保底替换
+    """
+
+    star: np.ndarray
+    name_id: np.ndarray
+    is_up: np.ndarray
+    is_up_g: np.ndarray
+    is_6_g: np.ndarray
+    is_5_g: np.ndarray
+
+
+class WeaponGachaBatch:
+    """武器卡池批量引擎，每次申领为 N 个玩家一次性生成 (N, apply_draws) 的随机矩阵
+
+    星级通过 ``searchsorted`` 对 ``base_6star_prob`` / ``base_65star_threshold``
+    一次性判定，UP 保底、6 星保底与每次申领的 5 星保底都以掩码替换最后一抽，
+    语义与 ``WeaponGacha.attempt`` 保持一致。
+
+    Examples
+    --------
+    >>> from gacha_core import WeaponGachaBatch
+    >>> batch = WeaponGachaBatch(players=10000, seed=7)
+    >>> issue = batch.attempt()
+    >>> six_star_rate = (issue.star == 6).mean()
+    """
+
+    def __init__(
+        self,
+        config: GlobalConfigLoader | None = None,
+        players: int = 1024,
+        seed: int = -1,
+        counters: Counters | None = None,
+    ):
+        """初始化武器卡池批量引擎
+
+        Parameters
+        ----------
+        config : GlobalConfigLoader, optional
+            配置加载器实例，默认使用 configs/config_1
+        players : int, optional
+            同步模拟的玩家数量，默认1024
+        seed : int, optional
+            随机数种子，默认-1（自动基于时间戳+微秒生成随机种子）
+        counters : Counters, optional
+            所有玩家共享的初始计数器，默认全新卡池
+        """
+        if not isinstance(players, int) or players <= 0:
+            raise ValueError(f"玩家数量必须是正整数，当前传入: {players}")
+        self.config = config if config else GlobalConfigLoader.shared()
+        self.players = players
+        self.seed = _resolve_seed(seed)
+        self.np_rand = np_rand.RandomState(self.seed)
+        self.model = self.config.get_banner_model("weapon")
+        self._precache_data()
+        self.init_counters(counters)
+
+    def _precache_data(self):
+        """预缓存名称索引表、星级阈值与保底参数。"""
+        model = self.model
+        self.star_tables: Dict[int, _StarTable] = {
+            pool.star: _StarTable(pool.up_names, pool.up_cumulative, pool.normal_names, pool.offset)
+            for pool in model.pools
+        }
+        self.names: List[str] = list(model.names)
+
+        self.base_6star_prob = model.base_6star_prob
+        self.base_65star_threshold = model.base_65star_threshold
+        self.star_thresholds = np.array([self.base_6star_prob, self.base_65star_threshold])
+        self.apply_draws = model.apply_draws
+        self.guarantee_6star_apply = model.guarantee_6star
+        self.up_guarantee_apply = model.up_guarantee
+        self.per_apply_must_have = model.per_apply_must_have
+        self._has_up = self.star_tables[6].up_count > 0
+
+    def init_counters(self, counters: Counters | None = None):
+        """按同一份计数器重置全部玩家的状态。"""
+        counters = counters if counters else Counters()
+        size = self.players
+        self.total = np.full(size, counters.total, dtype=np.int32)
+        self.no_6star = np.full(size, counters.no_6star, dtype=np.int32)
+        self.no_up = np.full(size, counters.no_up, dtype=np.int32)
+        self.guarantee_used = np.full(size, bool(counters.guarantee_used), dtype=bool)
+
+    def get_counters(self, index: int) -> Counters:
+        """导出单个玩家的计数器快照。"""
+        return Counters(
+            total=int(self.total[index]),
+            no_6star=int(self.no_6star[index]),
+            no_up=int(self.no_up[index]),
+            guarantee_used=bool(self.guarantee_used[index]),
+        )
+
+    def attempt(self) -> WeaponBatchIssue:
+        """所有玩家同步申领一次
+
+        Returns
+        -------
+        WeaponBatchIssue
+            整数矩阵形式的申领结果
+        """
+        size, slots = self.players, self.apply_draws
+        self.total += 1
+        rand = self.np_rand.random((size, slots))
+        u_up = self.np_rand.random((size, slots))
+        u_normal = self.np_rand.random((size, slots))
+
+        # 0 → 6 星，1 → 5 星，2 → 4 星
+        tier = np.searchsorted(self.star_thresholds, rand, side="right")
+        star = (6 - tier).astype(np.int8)
+        name_id = np.empty((size, slots), dtype=np.int16)
+        is_up = np.zeros((size, slots), dtype=bool)
+        for value in (6, 5, 4):
+            mask = star == value
+            if mask.any():
+                ids, tier_up = self.star_tables[value].pick(u_up[mask], u_normal[mask])
+                name_id[mask] = ids
+                if value == 6:
+                    is_up[mask] = tier_up
+
+        natural_6 = (star == 6).any(axis=1)
+        natural_up = is_up.any(axis=1)
+        has_5star_plus = (star >= 5).any(axis=1)
+
+        if self._has_up:
+            up_g = ~self.guarantee_used & ~natural_up & (self.no_up >= self.up_guarantee_apply - 1)
+        else:
+            up_g = np.zeros(size, dtype=bool)
+        six_g = ~up_g & ~natural_6 & (self.no_6star >= self.guarantee_6star_apply - 1)
+        five_g = ~up_g & ~six_g & ~has_5star_plus & bool(self.per_apply_must_have)
+
+        last_u = self.np_rand.random(size)
+        last_normal = self.np_rand.random(size)
+        six_g_up = np.zeros(size, dtype=bool)
+        if up_g.any():
+            name_id[up_g, -1] = self.star_tables[6].pick_up(last_u[up_g])
+            star[up_g, -1] = 6
+            is_up[up_g, -1] = True
+        if six_g.any():
+            ids, tier_up = self.star_tables[6].pick(last_u[six_g], last_normal[six_g])
+            name_id[six_g, -1] = ids
+            star[six_g, -1] = 6
+            is_up[six_g, -1] = tier_up
+            six_g_up[six_g] = tier_up
+        if five_g.any():
+            five_table = self.star_tables[5]
+            name_id[five_g, -1] = five_table.normal_ids[five_table._normal_index(last_normal[five_g])]
+            star[five_g, -1] = 5
+            is_up[five_g, -1] = False
+
+        has_6star = natural_6 | up_g | six_g
+        has_up = natural_up | up_g | six_g_up
+        next_guarantee_used = self.guarantee_used | natural_up | up_g
+        self.no_up = np.where(
+            has_up, 0, np.where(next_guarantee_used, self.no_up, self.no_up + 1)
+        )
+        self.no_6star = np.where(has_6star, 0, self.no_6star + 1)
+        self.guarantee_used = next_guarantee_used
+
+        return WeaponBatchIssue(
+            star=star,
+            name_id=name_id,
+            is_up=is_up,
+            is_up_g=up_g,
+            is_6_g=six_g,
+            is_5_g=five_g,
+        )
@@ -2,12 +2,12 @@
 """角色卡池逻辑。"""
 
 from bisect import bisect_right
+from functools import cached_property
 from random import Random
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from .config import GlobalConfigLoader
 from .models import Counters, GachaResult
-from .pool_utils import _normalize_star_pool
 from .randomizer import BatchRandom
 
 
@@ -31,11 +31,15 @@ class CharGacha:
     """
 
     def __init__(
-        self, config: GlobalConfigLoader | None = None, seed: int = -1, size: int = 1024
+        self,
+        config: GlobalConfigLoader | None = None,
+        seed: int = -1,
+        size: int = 64,
+        rand: BatchRandom | None = None,
     ):
         """初始化角色卡池
 
-        加载配置文件，预缓存数据，并初始化计数器。
+        引用加载器缓存的只读卡池模型，并初始化随机数与计数器。随机状态在首次抽卡时才创建。
 
         Parameters
         ----------
@@ -44,56 +48,56 @@ class CharGacha:
         seed : int, optional
             随机数种子，默认-1（自动基于时间戳+微秒生成随机种子）
         size : int, optional
-            预生成随机数序列的大小，默认1024
+            首次预生成随机数的数量，默认64，之后按消耗自适应增长
+        rand : BatchRandom, optional
+            外部构造的随机生成器（如 ``BatchRandom.from_stream``），给定时忽略 ``seed`` 与 ``size``
         """
-        self.config = config if config else GlobalConfigLoader()
-        self.rand = BatchRandom(seed, size=size)
-        self._picker = Random(self.rand.seed)
-        # 加载配置
-        self.pool_data = self.config.get_pool_data("char")
-        self.rule_config = self.config.get_rule_config("char")
-        # 预缓存数据
-        self._precache_data()
+        self.config = config if config else GlobalConfigLoader.shared()
+        # 只读卡池模型由加载器编译并缓存，同一配置的所有实例共享
+        self.model = self.config.get_banner_model("char")
+        self.rand = rand if rand is not None else BatchRandom(seed, size=size)
+        self._rule_config: Dict[str, Any] | None = None
         # 初始化计数器
         self.counters = Counters()
 
-    def _precache_data(self):
-        """预缓存UP/普通干员数据
-
-        从配置文件中加载并预处理干员数据，包括：
-        - UP / 普通干员池拆分
-        - UP 概率累积阈值
-        - 运行时使用的基础概率与软保底参数
-        """
-        # noinspection DuplicatedCode
-        self.star_up_prob: Dict[int, Tuple[List[str], List[float]]] = {}
-        self.star_normal: Dict[int, List[str]] = {}
-
-        for star in (6, 5, 4):
-            up_names, up_probs, normal_names = _normalize_star_pool(
-                self.pool_data, star, "角色池"
-            )
-            self.star_up_prob[star] = (up_names, up_probs)
-            self.star_normal[star] = normal_names
-
-        self.base_6star_prob = float(self.rule_config["base_prob"][6])
-        self.base_5star_prob = float(self.rule_config["base_prob"][5])
-        self.base_4star_prob = float(self.rule_config["base_prob"][4])
-        total_base_prob = self.base_5star_prob + self.base_4star_prob
-        self.base_5star_ratio = self.base_5star_prob / total_base_prob
-        self.prob_increase = float(self.rule_config["prob_increase"])
-        self.prob_upper = float(self.rule_config["prob_upper_limit"])
-        self.up_char_name = self.rule_config["up_char_name"]
-        self.six_star_increase_start = self.rule_config["6star_prob_increase_start"]
-        self.guarantee_5star_plus_draw = self.rule_config["guarantee_5star_plus_draw"]
-        self.guarantee_6star_draw = self.rule_config["guarantee_6star_draw"]
-        self.up_guarantee_draw = self.rule_config["up_guarantee_draw"]
-        self.quota_rule = self.rule_config["quota_rule"]
-        self._up_char_names = self.star_up_prob[6][0]
-        if self._up_char_names and self.up_char_name not in self._up_char_names:
-            raise ValueError("角色池6星 UP 目标不存在于卡池配置中")
-        if not self._up_char_names and self.up_char_name not in ("", None):
-            raise ValueError("角色池没有 6 星 UP 目标时，up_char_name 必须为空")
+    @cached_property
+    def _picker(self) -> Random:
+        """名称选择器，与随机生成器共享且首次使用时才创建。"""
+        return self.rand.picker
+
+    @property
+    def pool_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        """卡池数据（共享只读）。"""
+        return self.config.get_banner_tables("char")["pool_data"]
+
+    @property
+    def rule_config(self) -> Dict[str, Any]:
+        """抽卡规则的实例级浅拷贝，首次访问时创建。"""
+        if self._rule_config is None:
+            self._rule_config = dict(self.config.get_banner_tables("char")["rule_config"])
+        return self._rule_config
+
+    @property
+    def star_up_prob(self) -> Dict[int, Tuple[List[str], List[float]]]:
+        """各星级 UP 名称与累积概率（共享只读）。"""
+        return self.model.star_up_prob
+
+    @property
+    def star_normal(self) -> Dict[int, List[str]]:
+        """各星级普通名称（共享只读）。"""
+        return self.model.star_normal
+
+    @property
+    def quota_rule(self) -> Dict[int, int]:
+        return self.model.quota_rule
+
+    @property
+    def up_char_name(self) -> str:
+        return self.model.primary_up_name
+
+    @property
+    def _up_char_names(self) -> List[str]:
+        return self.model.star_up_prob[6][0]
 
     def init_counters(self):
         """初始化计数器
@@ -115,11 +119,12 @@ class CharGacha:
         Tuple[str, int, bool]
             返回一个元组，包含干员名称、星级和是否为UP干员的标记
         """
-        up_names, up_probs = self.star_up_prob[star]
-        normal_names = self.star_normal[star]
+        pool = self.model.pools[6 - star]
+        up_names = pool.up_names
+        normal_names = pool.normal_names
 
         if up_names:
-            idx = bisect_right(up_probs, self.rand.pop_float())
+            idx = bisect_right(pool.up_cumulative, self.rand.pop_float())
             if idx < len(up_names):
                 return up_names[idx], star, True
             if not normal_names:
@@ -139,9 +144,10 @@ class CharGacha:
         Tuple[str, int]
             返回一个元组，包含UP干员名称和星级
         """
-        if not self.star_up_prob[star][0]:
+        up_names = self.model.pools[6 - star].up_names
+        if not up_names:
             raise ValueError("当前角色池不存在可用的 UP 目标")
-        return self._picker.choice(self.star_up_prob[star][0]), star
+        return self._picker.choice(up_names), star
 
     def attempt(self, disable_guarantee: bool = False) -> GachaResult:
         """
@@ -169,6 +175,7 @@ class CharGacha:
         >>> # 禁用保底抽卡（用于模拟）
         >>> result2 = char_gacha.attempt(disable_guarantee=True)
         """
+        model = self.model
         self.counters.total += 1
         effective_no_6star = 0 if disable_guarantee else self.counters.no_6star + 1
         effective_no_5star_plus = 0 if disable_guarantee else self.counters.no_5star_plus + 1
@@ -178,50 +185,45 @@ class CharGacha:
         next_no_up = self.counters.no_up
         next_guarantee_used = self.counters.guarantee_used
 
-        current_6star_prob = self.base_6star_prob
-        if effective_no_6star > self.six_star_increase_start:
-            current_6star_prob += (
-                effective_no_6star - self.six_star_increase_start
-            ) * self.prob_increase
-            current_6star_prob = min(current_6star_prob, self.prob_upper)
-
         if (
             not disable_guarantee
-            and self._up_char_names
+            and model.pools[0].up_names
             and not self.counters.guarantee_used
-            and effective_no_up >= self.up_guarantee_draw
+            and effective_no_up >= model.up_guarantee
         ):
             result, star_int = self._get_up_char()
             self.counters.no_up = 0
             self.counters.no_6star = 0
             self.counters.no_5star_plus = 0
             self.counters.guarantee_used = True
-            quota = self.quota_rule[star_int]
+            quota = model.quota_by_star[star_int]
             return GachaResult(
                 name=result, star=star_int, quota=quota, is_up_g=True
             )
 
         if (
             not disable_guarantee
-            and effective_no_6star >= self.guarantee_6star_draw
+            and effective_no_6star >= model.guarantee_6star
         ):
             result, star_int, is_up = self._get_char_by_star(6)
             self.counters.no_6star = 0
             self.counters.no_5star_plus = 0
             self.counters.no_up = 0 if is_up else effective_no_up
-            quota = self.quota_rule[6]
+            quota = model.quota_by_star[6]
             return GachaResult(
                 name=result, star=star_int, quota=quota, is_6_g=True
             )
 
         is_5star_guarantee = (
             not disable_guarantee
-            and effective_no_5star_plus >= self.guarantee_5star_plus_draw
+            and effective_no_5star_plus >= model.guarantee_5star_plus
         )
+        # 保底分支已返回，此处有效水位必然小于硬保底抽数，可直接查表
+        six_threshold = model.six_star_thresholds[effective_no_6star]
         rand = self.rand.pop_float()
 
         if is_5star_guarantee:
-            if rand < current_6star_prob:
+            if rand < six_threshold:
                 result, star_int, is_up = self._get_char_by_star(6)
                 if not disable_guarantee:
                     next_no_6star = 0
@@ -240,15 +242,12 @@ class CharGacha:
                 self.counters.no_5star_plus = next_no_5star_plus
                 self.counters.no_up = next_no_up
                 self.counters.guarantee_used = next_guarantee_used
-            quota = self.quota_rule[star_int]
+            quota = model.quota_by_star[star_int]
             return GachaResult(
                 name=result, star=star_int, quota=quota, is_5_g=True
             )
 
-        remaining_prob = max(0.0, 1.0 - current_6star_prob)
-        adjusted_5star_prob = remaining_prob * self.base_5star_ratio if remaining_prob > 0 else 0.0
-
-        if rand < current_6star_prob:
+        if rand < six_threshold:
             result, star_int, is_up = self._get_char_by_star(6)
             if not disable_guarantee:
                 next_no_6star = 0
@@ -257,7 +256,7 @@ class CharGacha:
                 if is_up:
                     next_no_up = 0
                     next_guarantee_used = True
-        elif rand < current_6star_prob + adjusted_5star_prob:
+        elif rand < model.five_star_thresholds[effective_no_6star]:
             result, star_int, is_up = self._get_char_by_star(5)
             if not disable_guarantee:
                 next_no_6star = effective_no_6star
@@ -275,7 +274,7 @@ class CharGacha:
             self.counters.no_5star_plus = next_no_5star_plus
             self.counters.no_up = next_no_up
             self.counters.guarantee_used = next_guarantee_used
-        quota = self.quota_rule[star_int]
+        quota = model.quota_by_star[star_int]
         return GachaResult(name=result, star=star_int, quota=quota)
 
     def get_accumulated_reward(self) -> List[Tuple[str, int]]:
@@ -301,7 +300,7 @@ class CharGacha:
         """
         # 统计奖励出现次数
         reward_counts = {}
-        reward_config = self.rule_config["rewards"]
+        reward_config = self.model.reward_config
 
         # 30抽奖励（一次性）
         if self.counters.total >= 30:
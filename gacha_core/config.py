@@ -3,9 +3,11 @@
 
 import json
 import os
+import threading
+import time
 from copy import deepcopy
 from decimal import Decimal, getcontext
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from ._schemas import (
     BASE_DIR,
@@ -21,6 +23,44 @@ from ._schemas import (
     _normalize_optional_name_list,
     _normalize_weapon_entries,
 )
+from .banner import BannerModel
+from .pool_utils import _normalize_star_pool
+
+# 进程级 JSON 缓存：绝对路径 -> ((st_mtime_ns, st_size), 解析结果)
+_JSON_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+# 共享加载器：(配置路径, 武器池 id) -> 加载器
+_SHARED_LOADERS: Dict[Tuple[str, str | None], "GlobalConfigLoader"] = {}
+_SHARED_LOCK = threading.Lock()
+# 共享加载器两次 mtime 校验之间的最短间隔（秒），期间复用不触发任何文件 I/O
+_STAT_INTERVAL = 1.0
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_json(path: str, file_name: str) -> Tuple[Any, Tuple[int, int]]:
+    """读取 JSON 文件，文件 mtime 与大小未变化时直接返回进程级缓存。
+
+    返回值在进程内共享，调用方不得原地修改。
+    """
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"配置文件 {path} 不存在")
+    entry = _JSON_CACHE.get(path)
+    if entry is not None and entry[0] == signature:
+        return entry[1], signature
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"配置文件 {path} 不存在")
+    except json.JSONDecodeError:
+        raise ValueError(f"配置文件 {file_name} 格式错误")
+    _JSON_CACHE[path] = (signature, data)
+    return data, signature
 
 
 class GlobalConfigLoader:
@@ -69,9 +109,58 @@ class GlobalConfigLoader:
         self._weapon_banner_id = weapon_banner_id
         self._config_root = os.path.dirname(path) or "configs"
         self._cache: Dict[str, Any] = {}
+        # 已读取文件的签名，用于判断共享加载器是否过期
+        self._sources: Dict[str, Tuple[int, int]] = {}
+        self._validated_at = time.monotonic()
         self.constants = self._load_constants()
         getcontext().prec = self.constants.get("default_precision", 6)
 
+    @classmethod
+    def shared(
+        cls, path: str | None = None, weapon_banner_id: str | None = None
+    ) -> "GlobalConfigLoader":
+        """获取进程级共享的配置加载器
+
+        同一配置路径在进程内只解析一次；已读取文件的 mtime 或大小变化后自动重新加载。
+        校验最多每 ``_STAT_INTERVAL`` 秒执行一次，因此热路径上的重复调用不产生文件 I/O。
+        加载器及其返回的缓存数据在进程内共享，调用方不得原地修改。
+
+        Parameters
+        ----------
+        path : str, optional
+            配置文件路径，默认从 arrangement 文件第一行获取
+        weapon_banner_id : str, optional
+            武器池 id
+
+        Returns
+        -------
+        GlobalConfigLoader
+            共享的加载器实例
+        """
+        if path is None:
+            path = cls._get_default_config_path()
+        key = (os.path.normpath(path), weapon_banner_id)
+        with _SHARED_LOCK:
+            loader = _SHARED_LOADERS.get(key)
+            if loader is None or not loader._is_fresh():
+                loader = cls(path, weapon_banner_id=weapon_banner_id)
+                _SHARED_LOADERS[key] = loader
+        getcontext().prec = loader.constants.get("default_precision", 6)
+        return loader
+
+    def _is_fresh(self) -> bool:
+        now = time.monotonic()
+        if now - self._validated_at < _STAT_INTERVAL:
+            return True
+        for source_path, signature in self._sources.items():
+            try:
+                if _file_signature(source_path) != signature:
+                    return False
+            except FileNotFoundError:
+                return False
+        self._validated_at = now
+        return True
+
     def _load_constants(self) -> Dict[str, Any]:
         """加载全局常量配置（constants.json + 当前目录覆盖）"""
         base_payload = self._load_root_config("constants.json")
@@ -122,30 +211,18 @@ class GlobalConfigLoader:
         if file_name in self._cache:
             return self._cache[file_name]
         config_path = self._get_config_path(file_name)
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self._cache[file_name] = data
-                return data
-        except FileNotFoundError:
-            raise FileNotFoundError(f"配置文件 {config_path} 不存在")
-        except json.JSONDecodeError:
-            raise ValueError(f"配置文件 {file_name} 格式错误")
+        data, self._sources[config_path] = _read_json(config_path, file_name)
+        self._cache[file_name] = data
+        return data
 
     def _load_root_config(self, file_name: str) -> Dict[str, Any]:
         cache_key = f"root::{file_name}"
         if cache_key in self._cache:
             return self._cache[cache_key]
         config_path = self._get_root_config_path(file_name)
-        try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self._cache[cache_key] = data
-                return data
-        except FileNotFoundError:
-            raise FileNotFoundError(f"配置文件 {config_path} 不存在")
-        except json.JSONDecodeError:
-            raise ValueError(f"配置文件 {file_name} 格式错误")
+        data, self._sources[config_path] = _read_json(config_path, file_name)
+        self._cache[cache_key] = data
+        return data
 
     def _load_char_pool_base(self) -> Dict[str, Any]:
         cache_key = "normalized::char_pool_base"
@@ -542,6 +619,60 @@ class GlobalConfigLoader:
             return deepcopy(self._build_weapon_pool_data())
         raise ValueError(f"未知卡池类型: {pool_type}")
 
+    def get_banner_tables(self, pool_type: str) -> Dict[str, Any]:
+        """获取预处理后的卡池表（加载器内缓存，供同一配置的所有卡池实例共享）
+
+        Parameters
+        ----------
+        pool_type : str
+            卡池类型，如 "char"或 "weapon"（武器卡池）
+
+        Returns
+        -------
+        Dict[str, Any]
+            包含 ``pool_data``、``rule_config``、``star_up_prob``（UP 名称与累积概率）
+            和 ``star_normal``（普通名称）。返回值为共享只读数据，调用方不得原地修改。
+        """
+        cache_key = f"tables::{pool_type}"
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        pool_label = {"char": "角色池", "weapon": "武器池"}.get(pool_type, pool_type)
+        pool_data = self.get_pool_data(pool_type)
+        star_up_prob: Dict[int, Tuple[List[str], List[float]]] = {}
+        star_normal: Dict[int, List[str]] = {}
+        for star in (6, 5, 4):
+            up_names, up_probs, normal_names = _normalize_star_pool(pool_data, star, pool_label)
+            star_up_prob[star] = (up_names, up_probs)
+            star_normal[star] = normal_names
+
+        tables = {
+            "pool_data": pool_data,
+            "rule_config": self.get_rule_config(pool_type),
+            "star_up_prob": star_up_prob,
+            "star_normal": star_normal,
+        }
+        self._cache[cache_key] = tables
+        return tables
+
+    def get_banner_model(self, pool_type: str) -> BannerModel:
+        """获取编译后的只读卡池模型（加载器内缓存）
+
+        Parameters
+        ----------
+        pool_type : str
+            卡池类型，如 "char"或 "weapon"（武器卡池）
+
+        Returns
+        -------
+        BannerModel
+            同一加载器的所有卡池实例共享的模型
+        """
+        cache_key = f"model::{pool_type}"
+        if cache_key not in self._cache:
+            self._cache[cache_key] = BannerModel.compile(self.get_banner_tables(pool_type), pool_type)
+        return self._cache[cache_key]
+
     def get_rule_config(self, pool_type: str) -> Dict[str, Any]:
         """获取抽卡规则配置，返回隔离副本并统一类型转换
 
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""角色卡池精确分布求解：以稀疏转移矩阵对保底状态做动态规划。"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .config import GlobalConfigLoader
+from .models import Counters
+
+# 计数列的尾部质量低于该阈值时不再扩展新的列（数值意义上的精确）
+_TAIL_EPS = 1e-12
+
+
+@dataclass
+class CharBannerDistribution:
+    """角色池 k 抽后的精确分布
+
+    Parameters
+    ----------
+    paid_draws : int
+        抽数 k
+    six_star_probabilities : np.ndarray
+        第 c 项为 6 星恰好出现 c 次的概率
+    up_probabilities : np.ndarray
+        第 c 项为当期 UP 恰好出现 c 次的概率
+    first_up_probabilities : np.ndarray
+        长度 k+1，第 t 项为首个 UP 出现在第 t 抽的概率（第 0 项恒为 0）
+    expected_six_star_count : float
+        6 星数量期望
+    expected_up_count : float
+        当期 UP 数量期望
+    expected_five_star_count : float
+        5 星数量期望
+    expected_four_star_count : float
+        4 星数量期望
+    """
+
+    paid_draws: int
+    six_star_probabilities: np.ndarray
+    up_probabilities: np.ndarray
+    first_up_probabilities: np.ndarray
+    expected_six_star_count: float
+    expected_up_count: float
+    expected_five_star_count: float
+    expected_four_star_count: float
+
+    @staticmethod
+    def _tail(probabilities: np.ndarray) -> np.ndarray:
+        return np.cumsum(probabilities[::-1])[::-1]
+
+    @property
+    def six_star_tail_probabilities(self) -> np.ndarray:
+        """第 c 项为 6 星数量 ≥ c 的概率。"""
+        return self._tail(self.six_star_probabilities)
+
+    @property
+    def up_tail_probabilities(self) -> np.ndarray:
+        """第 c 项为 UP 数量 ≥ c 的概率。"""
+        return self._tail(self.up_probabilities)
+
+    @property
+    def first_up_within_probability(self) -> float:
+        """k 抽内至少出现一次 UP 的概率。"""
+        return float(self.first_up_probabilities.sum())
+
+    @property
+    def expected_first_up_index(self) -> float:
+        """在 k 抽内出现 UP 的条件下，首个 UP 所在抽序的期望；从未出现时为 0。"""
+        within = self.first_up_within_probability
+        if within <= 0.0:
+            return 0.0
+        index = np.arange(len(self.first_up_probabilities))
+        return float((index * self.first_up_probabilities).sum() / within)
+
+
+class CharBannerSolver:
+    """角色卡池精确分布求解器
+
+    状态为 (no_6star, no_5star_plus, no_up, guarantee_used)，与 ``CharGacha.attempt``
+    的保底语义逐分支对应。``guarantee_used`` 为真后 ``no_up`` 不再影响任何分支，
+    因此折叠为单个取值。转移矩阵按“是否产出 6 星 / 是否产出 UP”拆分为两组稀疏矩阵，
+    计数分布以 (状态数, 计数) 的稠密矩阵逐抽推进，成本只与抽数和状态数有关。
+
+    Examples
+    --------
+    >>> from gacha_core import CharBannerSolver
+    >>> solver = CharBannerSolver()
+    >>> dist = solver.solve(120)
+    >>> dist.expected_six_star_count
+    """
+
+    def __init__(self, config: GlobalConfigLoader | None = None, counters: Counters | None = None):
+        """初始化求解器并构建稀疏转移矩阵
+
+        Parameters
+        ----------
+        config : GlobalConfigLoader, optional
+            配置加载器实例，默认使用 configs/config_1
+        counters : Counters, optional
+            起始计数器，默认全新卡池
+        """
+        from scipy import sparse
+
+        self._sparse = sparse
+        self.config = config if config else GlobalConfigLoader.shared()
+        self.counters = counters if counters else Counters()
+        self.model = self.config.get_banner_model("char")
+        self._precache_data()
+        self._build_transitions()
+
+    def _precache_data(self):
+        """读取概率与保底参数。"""
+        model = self.model
+        pool = model.pools[0]
+        up_names, up_probs, normal_names = pool.up_names, pool.up_cumulative, pool.normal_names
+        self.up_names = list(up_names)
+        self.normal_names = list(normal_names)
+        self.has_up = bool(up_names)
+        if not up_names:
+            self.up_share = 0.0
+        elif not normal_names:
+            self.up_share = 1.0
+        else:
+            self.up_share = float(min(up_probs[-1], 1.0))
+
+        self.base_6star_prob = model.base_6star_prob
+        self.base_5star_ratio = model.base_5star_ratio
+        self.prob_increase = model.prob_increase
+        self.prob_upper = model.prob_upper
+        self.six_star_increase_start = model.six_star_increase_start
+        self.guarantee_5star_plus_draw = model.guarantee_5star_plus
+        self.guarantee_6star_draw = model.guarantee_6star
+        self.up_guarantee_draw = model.up_guarantee
+        self._six_lut = np.asarray(model.six_star_thresholds, dtype=np.float64)
+        self._five_lut = np.asarray(model.five_star_probs, dtype=np.float64)
+
+        self._n6 = self.guarantee_6star_draw
+        self._n5 = self.guarantee_5star_plus_draw
+        self._nu = self.up_guarantee_draw if self.has_up else 1
+        # 未使用 UP 保底：n6 * n5 * nu 个状态；已使用：n6 * n5 个状态
+        self.state_count = self._n6 * self._n5 * (self._nu + 1)
+
+    def _index(self, s6, s5, su, guar):
+        """状态编码：guarantee_used 为真时 no_up 折叠到最后一层。"""
+        layer = np.where(guar, self._nu, su)
+        return (layer * self._n5 + s5) * self._n6 + s6
+
+    def _start_index(self, counters: Counters) -> int:
+        guar = bool(counters.guarantee_used) or not self.has_up
+        s6 = min(max(counters.no_6star, 0), self._n6 - 1)
+        s5 = min(max(counters.no_5star_plus, 0), self._n5 - 1)
+        su = 0 if guar else min(max(counters.no_up, 0), self._nu - 1)
+        return int(self._index(s6, s5, su, guar))
+
+    def six_star_prob(self, effective_no_6star: np.ndarray) -> np.ndarray:
+        """与 ``CharGacha.attempt`` 一致的软保底 6 星概率（查 ``BannerModel`` 水位表）。"""
+        return self._six_lut[np.minimum(effective_no_6star, self._six_lut.size - 1)]
+
+    def five_star_prob(self, effective_no_6star: np.ndarray) -> np.ndarray:
+        """与 ``CharGacha.attempt`` 一致的非保底 5 星概率。"""
+        return self._five_lut[np.minimum(effective_no_6star, self._five_lut.size - 1)]
+
+    def _build_transitions(self):
+        """按分支向量化生成转移三元组，并拆分为 6 星 / UP 两组稀疏矩阵。"""
+        n6, n5, nu = self._n6, self._n5, self._nu
+        layer, s5, s6 = np.meshgrid(np.arange(nu + 1), np.arange(n5), np.arange(n6), indexing="ij")
+        layer, s5, s6 = layer.ravel(), s5.ravel(), s6.ravel()
+        guar = layer == nu
+        su = np.where(guar, 0, layer)
+        src = self._index(s6, s5, su, guar)
+
+        eff6, eff5 = s6 + 1, s5 + 1
+        eff_up = np.minimum(su + 1, nu - 1)
+        p6 = self.six_star_prob(eff6)
+        p5 = self.five_star_prob(eff6)
+        p_up = self.up_share
+
+        up_g = ~guar & (su + 1 >= self.up_guarantee_draw) if self.has_up else np.zeros_like(guar)
+        hard = ~up_g & (eff6 >= self.guarantee_6star_draw)
+        five_g = ~up_g & ~hard & (eff5 >= self.guarantee_5star_plus_draw)
+        normal = ~up_g & ~hard & ~five_g
+        keep6 = np.minimum(eff6, n6 - 1)
+        keep5 = np.minimum(eff5, n5 - 1)
+        zero = np.zeros_like(s6)
+        true = np.ones_like(guar)
+
+        # (掩码, 概率, 目标状态, 是否 6 星, 是否 UP, 星级)
+        branches = [
+            (up_g, np.ones_like(p6), self._index(zero, zero, zero, true), 6, True),
+            (hard, np.full_like(p6, p_up), self._index(zero, zero, zero, guar), 6, True),
+            (hard, np.full_like(p6, 1.0 - p_up), self._index(zero, zero, eff_up, guar), 6, False),
+            (five_g, p6 * p_up, self._index(zero, zero, zero, guar), 6, True),
+            (five_g, p6 * (1.0 - p_up), self._index(zero, zero, eff_up, guar), 6, False),
+            (five_g, 1.0 - p6, self._index(keep6, zero, eff_up, guar), 5, False),
+            (normal, p6 * p_up, self._index(zero, zero, zero, true), 6, True),
+            (normal, p6 * (1.0 - p_up), self._index(zero, zero, eff_up, guar), 6, False),
+            (
+                normal,
+                p5,
+                self._index(keep6, zero, eff_up, guar),
+                5,
+                False,
+            ),
+            (
+                normal,
+                np.maximum(0.0, 1.0 - p6 - p5),
+                self._index(keep6, keep5, eff_up, guar),
+                4,
+                False,
+            ),
+        ]
+
+        size = self.state_count
+        groups = {key: ([], [], []) for key in ("no6", "six", "noup", "up")}
+        self._emit = {star: np.zeros(size) for star in (6, 5, 4)}
+        self._emit_up = np.zeros(size)
+        for mask, prob, dst, star, is_up in branches:
+            mask = mask & (prob > 0.0)
+            if not mask.any():
+                continue
+            rows, cols, vals = dst[mask], src[mask], prob[mask]
+            six_key = "six" if star == 6 else "no6"
+            up_key = "up" if is_up else "noup"
+            for key in (six_key, up_key):
+                groups[key][0].append(rows)
+                groups[key][1].append(cols)
+                groups[key][2].append(vals)
+            np.add.at(self._emit[star], cols, vals)
+            if is_up:
+                np.add.at(self._emit_up, cols, vals)
+
+        # 矩阵按 dst × src 组织，直接左乘状态-计数矩阵
+        self._trans = {}
+        for key, (rows, cols, vals) in groups.items():
+            if rows:
+                matrix = self._sparse.coo_matrix(
+                    (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                    shape=(size, size),
+                )
+            else:
+                matrix = self._sparse.coo_matrix((size, size))
+            self._trans[key] = matrix.tocsr()
+
+    def _reachable(self, start: int, paid_draws: int) -> np.ndarray:
+        """起始状态在 ``paid_draws`` 抽内可达的状态索引（升序），用于裁剪转移矩阵。"""
+        pattern = self._trans["no6"] + self._trans["six"]
+        seen = np.zeros(self.state_count, dtype=bool)
+        seen[start] = True
+        frontier = seen.copy()
+        for _ in range(paid_draws):
+            frontier = (pattern @ frontier.astype(np.float64) > 0.0) & ~seen
+            if not frontier.any():
+                break
+            seen |= frontier
+        return np.flatnonzero(seen)
+
+    @staticmethod
+    def _advance(stay, move, mass: np.ndarray) -> np.ndarray:
+        """推进一抽：stay 保持计数，move 计数加一；尾部质量可忽略时不扩列。"""
+        moved = move @ mass
+        out = stay @ mass
+        if moved[:, -1].sum() > _TAIL_EPS:
+            out = np.hstack((out, np.zeros((out.shape[0], 1))))
+            out[:, 1:] += moved
+        else:
+            out[:, 1:] += moved[:, :-1]
+        return out
+
+    def solve(self, paid_draws: int, counters: Counters | None = None) -> CharBannerDistribution:
+        """计算从起始计数器出发、再抽 ``paid_draws`` 次后的精确分布
+
+        Parameters
+        ----------
+        paid_draws : int
+            抽数
+        counters : Counters, optional
+            本次求解的起始计数器，默认使用构造时传入的计数器
+
+        Returns
+        -------
+        CharBannerDistribution
+            6 星 / UP 数量分布、首个 UP 抽序分布及各星级期望
+        """
+        if paid_draws < 0:
+            raise ValueError(f"抽数不能为负数，当前传入: {paid_draws}")
+        start = self._start_index(counters if counters else self.counters)
+        states = self._reachable(start, paid_draws)
+        trans = {key: matrix[states][:, states] for key, matrix in self._trans.items()}
+        emit = {star: values[states] for star, values in self._emit.items()}
+        emit_up = self._emit_up[states]
+
+        six_mass = np.zeros((len(states), 1))
+        six_mass[np.searchsorted(states, start), 0] = 1.0
+        up_mass = six_mass.copy()
+        first_up = np.zeros(paid_draws + 1)
+        expected = {6: 0.0, 5: 0.0, 4: 0.0}
+        expected_up = 0.0
+
+        for draw in range(1, paid_draws + 1):
+            state = six_mass @ np.ones(six_mass.shape[1])
+            for star in expected:
+                expected[star] += float(emit[star] @ state)
+            expected_up += float(emit_up @ state)
+            first_up[draw] = float(emit_up @ up_mass[:, 0])
+            six_mass = self._advance(trans["no6"], trans["six"], six_mass)
+            up_mass = self._advance(trans["noup"], trans["up"], up_mass)
+
+        return CharBannerDistribution(
+            paid_draws=paid_draws,
+            six_star_probabilities=six_mass.sum(axis=0),
+            up_probabilities=up_mass.sum(axis=0),
+            first_up_probabilities=first_up,
+            expected_six_star_count=expected[6],
+            expected_up_count=expected_up,
+            expected_five_star_count=expected[5],
+            expected_four_star_count=expected[4],
+        )
+
+    def value_table(
+        self,
+        linear_values: Dict[int, float],
+        up_payoff: Sequence[float],
+        normal_payoff: Sequence[float],
+    ) -> "CharBannerValueTable":
+        """构建期望价值表，见 ``CharBannerValueTable``。"""
+        return CharBannerValueTable(self, linear_values, up_payoff, normal_payoff)
+
+
+class CharBannerValueTable:
+    """任意起始状态、任意抽数下的期望价值表（反向 DP，按需延长抽数）
+
+    价值由三部分组成：按星级线性计价的部分、UP 干员按持有份数计价的部分，
+    以及普通 6 星按份数计价的部分。普通 6 星在各名称间等概率分配，
+    因此每个名称的份数是普通 6 星数量的二项稀疏化，各名称的份数价值
+    可以合并为一条终端收益曲线。反向 DP 的状态为 (保底状态, 已获得份数)，
+    份数超过收益曲线长度后价值不再变化。一次推进即可得到所有起始状态在
+    1..N 抽下的期望。
+
+    Parameters
+    ----------
+    solver : CharBannerSolver
+        提供转移矩阵的求解器（UP 目标至多一个）
+    linear_values : Dict[int, float]
+        星级到单份价值的映射，例如 ``{5: 6.0, 4: 1.0}``
+    up_payoff : Sequence[float]
+        UP 干员获得 c 份时的总价值，第 0 项必须为 0，末项之后视为饱和
+    normal_payoff : Sequence[float]
+        每个普通 6 星名称获得 c 份时的价值之和（按名称逐项相加）
+    """
+
+    def __init__(
+        self,
+        solver: CharBannerSolver,
+        linear_values: Dict[int, float],
+        up_payoff: Sequence[float],
+        normal_payoff: Sequence[float],
+    ):
+        if len(solver.up_names) > 1:
+            raise ValueError("价值表仅支持单个 UP 目标的角色池")
+        self.solver = solver
+        size = solver.state_count
+        # 反向 DP 使用 src × dst 的方向
+        forward = solver._trans
+        self._full = (forward["no6"] + forward["six"]).T.tocsr()
+        self._up = forward["up"].T.tocsr()
+        normal_share = 1.0 / len(solver.normal_names) if solver.normal_names else 0.0
+        self._normal = ((forward["six"] - forward["up"]) * normal_share).T.tocsr()
+        self._linear = np.zeros(size)
+        for star, value in linear_values.items():
+            self._linear += float(value) * solver._emit[star]
+
+        up_payoff = np.asarray(up_payoff, dtype=np.float64)
+        normal_payoff = np.asarray(normal_payoff, dtype=np.float64)
+        self._blocks = []
+        columns = [np.zeros((size, 1))]
+        offset = 1
+        for payoff, move in ((up_payoff, self._up), (normal_payoff, self._normal)):
+            if len(payoff) <= 1 or move.nnz == 0:
+                continue
+            self._blocks.append((offset, len(payoff), move))
+            columns.append(np.tile(payoff, (size, 1)))
+            offset += len(payoff)
+        self._work = np.hstack(columns)
+        self._rows: List[np.ndarray] = [self._current_values()]
+
+    @property
+    def horizon(self) -> int:
+        """当前已计算的最大抽数。"""
+        return len(self._rows) - 1
+
+    def _current_values(self) -> np.ndarray:
+        values = self._work[:, 0].copy()
+        for offset, _, _ in self._blocks:
+            values += self._work[:, offset]
+        return values
+
+    def extend(self, paid_draws: int) -> None:
+        """把价值表推进到至少 ``paid_draws`` 抽。"""
+        while self.horizon < paid_draws:
+            work = self._work
+            nxt = self._full @ work
+            nxt[:, 0] += self._linear
+            for offset, size, move in self._blocks:
+                block = work[:, offset:offset + size]
+                nxt[:, offset:offset + size - 1] += move @ (block[:, 1:] - block[:, :-1])
+            self._work = nxt
+            self._rows.append(self._current_values())
+
+    def value(self, counters: Counters, paid_draws: int) -> float:
+        """查询从 ``counters`` 出发再抽 ``paid_draws`` 次的期望价值。"""
+        if paid_draws <= 0:
+            return 0.0
+        self.extend(paid_draws)
+        return float(self._rows[paid_draws][self.solver._start_index(counters)])
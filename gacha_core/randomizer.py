@@ -2,22 +2,43 @@
 """随机数工具。"""
 
 from decimal import Decimal
+from functools import cached_property
+from random import Random
 from time import time
 from typing import List
 
+import numpy as np
 from numpy import random as np_rand
 
+# Philox 计数器高位字用于区分流：[块计数, 用途, 阶段, 轨迹]。
+# 每条流独占低 64 位计数空间（2^64 个 4×64 位块），不同 (轨迹, 阶段, 用途) 的流互不重叠。
+STREAM_STAGE = 0
+STREAM_URGENT = 1
+STREAM_BASELINE = 2
+_WORD_MASK = (1 << 64) - 1
+_EMPTY = np.empty(0, dtype=np.float64)
+
 
 class BatchRandom:
     """批量随机数生成器
 
     核心能力：
-    1. 预生成浮点随机数序列，按需弹出
+    1. 预生成 float64 随机数缓冲区，按需弹出或按块切片
     2. 提供 Decimal 兼容接口，供旧调用方复用
     3. 统一随机状态，支持种子复现
+    4. 通过 ``from_stream`` 从计数器型 Philox 流直接定位独立子流
+    5. 底层随机状态、缓冲区与名称选择器都在首次使用时才创建
+
+    缓冲区直接持有 NumPy 数组，``pop_float`` 经 ``memoryview`` 读取 Python float，
+    ``take`` 返回零拷贝切片。每次耗尽后补充量按 ``REFILL_GROWTH`` 倍增长（上限
+    ``MAX_REFILL``），一次性抽卡只生成少量随机数，长时间运行很快达到大块补充。
+    补充大小只影响分块，不影响序列本身。
     """
 
-    def __init__(self, seed: int = -1, size: int = 1024):
+    MAX_REFILL = 1 << 16
+    REFILL_GROWTH = 4
+
+    def __init__(self, seed: int = -1, size: int = 64):
         """初始化批量随机生成器
 
         Parameters
@@ -25,23 +46,104 @@ class BatchRandom:
         seed : int, optional
             随机数种子，默认-1（自动基于时间戳+微秒生成）
         size : int, optional
-            预生成序列的大小，默认1024
+            首次预生成的数量，默认64，之后按消耗自适应增长
         """
         # 优化种子生成
         if seed < 0:
             seed = int(time() * 1_000_000) % (2**32)
         self.seed = seed
-        self.np_rand = np_rand.RandomState(seed)  # 独立随机状态
-        self.__sequence: List[float] = []
-        self._index = 0
+        # 独立随机状态，首次补充缓冲区时才按种子创建
+        self._np_rand: np_rand.RandomState | np_rand.Generator | None = None
+        self._init_buffer(size)
+
+    @property
+    def np_rand(self) -> np_rand.RandomState | np_rand.Generator:
+        """底层随机状态，首次访问时创建。"""
+        if self._np_rand is None:
+            self._np_rand = np_rand.RandomState(self.seed)
+        return self._np_rand
+
+    @cached_property
+    def picker(self) -> Random:
+        """按 ``seed`` 构造的名称选择器，首次使用时创建。"""
+        return Random(self.seed)
+
+    def _init_buffer(self, size: int) -> None:
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError(f"随机数数量必须是正整数，当前传入: {size}")
         self.size = size
-        self._randomize()
+        self.refills = 0
+        self._buffer = _EMPTY
+        self._view = memoryview(_EMPTY)
+        self._index = 0
+
+    def _randomize(self, minimum: int = 0) -> np.ndarray:
+        """补充缓冲区：未消费的尾部保留在新缓冲区开头，之后接上新生成的随机数。
 
-    def _randomize(self) -> List[float]:
-        """生成指定数量的浮点随机数，覆盖内部序列。"""
-        self.__sequence = self.np_rand.random(self.size).tolist()
+        Parameters
+        ----------
+        minimum : int, optional
+            补充后缓冲区至少包含的未消费数量，供 ``take`` 使用
+        """
+        remaining = self._buffer[self._index :]
+        if self.refills:
+            # 上一缓冲区已耗尽，说明消耗速度高于当前补充量
+            self.size = min(self.size * self.REFILL_GROWTH, self.MAX_REFILL)
+        fresh = self.np_rand.random(max(self.size, minimum - len(remaining)))
+        buffer = np.concatenate((remaining, fresh)) if len(remaining) else fresh
+        # 切片会交给调用方，禁止写入以免篡改后续序列
+        buffer.flags.writeable = False
+        self._buffer = buffer
+        self._view = memoryview(buffer)
         self._index = 0
-        return self.__sequence.copy()
+        self.refills += 1
+        return buffer
+
+    @classmethod
+    def from_stream(
+        cls,
+        root_seed: int,
+        trace: int,
+        stage: int = 0,
+        kind: int = STREAM_STAGE,
+        size: int = 64,
+    ) -> "BatchRandom":
+        """从 Philox 计数器流构造随机生成器
+
+        流由 ``(root_seed, trace, stage, kind)`` 直接定位：根种子作为 Philox 密钥，
+        其余标识写入计数器高位字，无需哈希或顺序生成，O(1) 即可得到任意子流。
+        同一组标识在任何进程、任何分块方式下都得到逐位相同的序列。
+
+        Parameters
+        ----------
+        root_seed : int
+            根种子（Philox 密钥），需为非负整数
+        trace : int
+            轨迹（样本）编号
+        stage : int, optional
+            阶段编号，默认0
+        kind : int, optional
+            流用途，``STREAM_STAGE`` / ``STREAM_URGENT`` / ``STREAM_BASELINE``
+        size : int, optional
+            首次预生成的数量，默认64，之后按消耗自适应增长
+
+        Returns
+        -------
+        BatchRandom
+            绑定到该子流的随机生成器
+        """
+        if min(root_seed, trace, stage, kind) < 0:
+            raise ValueError("随机流标识必须是非负整数")
+        bit_generator = np_rand.Philox(
+            key=root_seed,
+            counter=[0, kind & _WORD_MASK, stage & _WORD_MASK, trace & _WORD_MASK],
+        )
+        instance = cls.__new__(cls)
+        instance._np_rand = np_rand.Generator(bit_generator)
+        # 名称选择器 (random.Random) 的种子取自流的首个整数，保证同样可复现
+        instance.seed = int(instance._np_rand.integers(0, 2**32))
+        instance._init_buffer(size)
+        return instance
 
     @staticmethod
     def batch(size: int = 1024) -> List[Decimal]:
@@ -53,12 +155,34 @@ class BatchRandom:
 
     def pop_float(self) -> float:
         """从内部随机数序列中弹出一个浮点随机数。"""
-        if self._index >= len(self.__sequence):
+        if self._index >= len(self._view):
             self._randomize()
-        value = self.__sequence[self._index]
+        value = self._view[self._index]
         self._index += 1
         return value
 
+    def take(self, n: int) -> np.ndarray:
+        """按顺序取出接下来的 ``n`` 个随机数
+
+        与连续调用 ``n`` 次 ``pop_float`` 得到相同的值，但返回缓冲区的只读切片，
+        供一次消费整块随机数的调用方（如武器池单次申领）使用。
+
+        Parameters
+        ----------
+        n : int
+            需要的随机数数量
+
+        Returns
+        -------
+        np.ndarray
+            长度为 ``n`` 的只读 float64 数组
+        """
+        if self._index + n > len(self._buffer):
+            self._randomize(n)
+        start = self._index
+        self._index += n
+        return self._buffer[start : self._index]
+
     def pop(self) -> Decimal:
         """从内部随机数序列中弹出一个 Decimal 随机数。"""
         return Decimal(str(self.pop_float()))
@@ -66,4 +190,4 @@ class BatchRandom:
     @property
     def sequence(self) -> List[Decimal]:
         """返回剩余随机数序列的 Decimal 副本。"""
-        return [Decimal(str(num)) for num in self.__sequence[self._index :]]
+        return [Decimal(str(num)) for num in self._buffer[self._index :].tolist()]
@@ -2,12 +2,12 @@
 """武器卡池逻辑。"""
 
 from bisect import bisect_right
+from functools import cached_property
 from random import Random
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from .config import GlobalConfigLoader
 from .models import Counters, GachaResult
-from .pool_utils import _normalize_star_pool
 from .randomizer import BatchRandom
 
 
@@ -32,11 +32,15 @@ class WeaponGacha:
     """
 
     def __init__(
-        self, config: GlobalConfigLoader | None = None, seed: int = -1, size: int = 1024
+        self,
+        config: GlobalConfigLoader | None = None,
+        seed: int = -1,
+        size: int = 64,
+        rand: BatchRandom | None = None,
     ):
         """初始化武器卡池
 
-        加载配置文件，预缓存数据，并初始化计数器。
+        引用加载器缓存的只读卡池模型，并初始化随机数与计数器。随机状态在首次抽卡时才创建。
 
         Parameters
         ----------
@@ -45,48 +49,56 @@ class WeaponGacha:
         seed : int, optional
             随机数种子，默认-1（自动基于时间戳+微秒生成随机种子）
         size : int, optional
-            预生成随机数序列的大小，默认1024
+            首次预生成随机数的数量，默认64，之后按消耗自适应增长
+        rand : BatchRandom, optional
+            外部构造的随机生成器（如 ``BatchRandom.from_stream``），给定时忽略 ``seed`` 与 ``size``
         """
-        self.config = config if config else GlobalConfigLoader()
-        self.rand = BatchRandom(seed, size=size)  # 武器卡池使用独立的随机数生成器实例
-        self._picker = Random(self.rand.seed)
-        self.pool_data = self.config.get_pool_data("weapon")
-        self.rule_config = self.config.get_rule_config("weapon")
-        self._precache_data()
+        self.config = config if config else GlobalConfigLoader.shared()
+        # 只读卡池模型由加载器编译并缓存，同一配置的所有实例共享
+        self.model = self.config.get_banner_model("weapon")
+        # 武器卡池使用独立的随机数生成器实例
+        self.rand = rand if rand is not None else BatchRandom(seed, size=size)
+        self._rule_config: Dict[str, Any] | None = None
         self.counters = Counters()  # 使用Counters数据类管理计数器
 
-    def _precache_data(self):
-        """预缓存UP/普通武器数据
-
-        从配置文件中加载并预处理武器数据，包括：
-        - UP / 普通武器池拆分
-        - UP 概率累积阈值
-        - 运行时使用的基础概率与保底参数
-        """
-        # noinspection DuplicatedCode
-        self.star_up_prob: Dict[int, Tuple[List[str], List[float]]] = {}
-        self.star_normal: Dict[int, List[str]] = {}
-
-        for star in (6, 5, 4):
-            up_names, up_probs, normal_names = _normalize_star_pool(
-                self.pool_data, star, "武器池"
-            )
-            self.star_up_prob[star] = (up_names, up_probs)
-            self.star_normal[star] = normal_names
-
-        self.up_weapon_name = self.rule_config["up_weapon_name"]
-        self._up_weapon_names = self.star_up_prob[6][0]
-        self.base_6star_prob = float(self.rule_config["base_prob"][6])
-        self.base_65star_threshold = self.base_6star_prob + float(self.rule_config["base_prob"][5])
-        self.apply_draws = self.rule_config["apply_draws"]
-        self.quota_rule = self.rule_config["quota_rule"]
-        self.guarantee_6star_apply = self.rule_config["guarantee_6star_apply"]
-        self.up_guarantee_apply = self.rule_config["up_guarantee_apply"]
-        self.per_apply_must_have = self.rule_config["per_apply_must_have"]
-        if self._up_weapon_names and self.up_weapon_name not in self._up_weapon_names:
-            raise ValueError("武器池6星 UP 目标不存在于卡池配置中")
-        if not self._up_weapon_names and self.up_weapon_name not in ("", None):
-            raise ValueError("武器池没有 6 星 UP 目标时，up_weapon_name 必须为空")
+    @cached_property
+    def _picker(self) -> Random:
+        """名称选择器，与随机生成器共享且首次使用时才创建。"""
+        return self.rand.picker
+
+    @property
+    def pool_data(self) -> Dict[str, List[Dict[str, Any]]]:
+        """卡池数据（共享只读）。"""
+        return self.config.get_banner_tables("weapon")["pool_data"]
+
+    @property
+    def rule_config(self) -> Dict[str, Any]:
+        """抽卡规则的实例级浅拷贝，首次访问时创建。"""
+        if self._rule_config is None:
+            self._rule_config = dict(self.config.get_banner_tables("weapon")["rule_config"])
+        return self._rule_config
+
+    @property
+    def star_up_prob(self) -> Dict[int, Tuple[List[str], List[float]]]:
+        """各星级 UP 名称与累积概率（共享只读）。"""
+        return self.model.star_up_prob
+
+    @property
+    def star_normal(self) -> Dict[int, List[str]]:
+        """各星级普通名称（共享只读）。"""
+        return self.model.star_normal
+
+    @property
+    def quota_rule(self) -> Dict[int, int]:
+        return self.model.quota_rule
+
+    @property
+    def up_weapon_name(self) -> str:
+        return self.model.primary_up_name
+
+    @property
+    def _up_weapon_names(self) -> List[str]:
+        return self.model.star_up_prob[6][0]
 
     def init_counters(self):
         """初始化计数器
@@ -108,11 +120,12 @@ class WeaponGacha:
         Tuple[str, int]
             返回一个元组，包含武器名称和星级
         """
-        up_names, up_probs = self.star_up_prob[star]
-        normal_names = self.star_normal[star]
+        pool = self.model.pools[6 - star]
+        up_names = pool.up_names
+        normal_names = pool.normal_names
 
         if up_names:
-            idx = bisect_right(up_probs, self.rand.pop_float())
+            idx = bisect_right(pool.up_cumulative, self.rand.pop_float())
             if idx < len(up_names):
                 return up_names[idx], star
             if not normal_names:
@@ -127,9 +140,10 @@ class WeaponGacha:
         Tuple[str, int]
             返回一个元组，包含UP武器名称和星级（固定为6星）
         """
-        if not self._up_weapon_names:
+        up_names = self.model.pools[0].up_names
+        if not up_names:
             raise ValueError("当前武器池不存在可用的 UP 目标")
-        return self._picker.choice(self._up_weapon_names), 6
+        return self._picker.choice(up_names), 6
 
     def _get_only_6star_weapon(self) -> Tuple[str, int, bool]:
         """6星保底：从所有6星武器（含UP+通用）中随机抽取，UP概率=卡池设定值
@@ -140,12 +154,13 @@ class WeaponGacha:
             返回一个元组，包含武器名称、星级（固定为6星）和是否为UP武器的标记
         """
         # 1. 读取6星UP武器的概率配置（通常UP占25%）
-        up_names, up_probs = self.star_up_prob[6]
-        normal_names = self.star_normal[6]
+        pool = self.model.pools[0]
+        up_names = pool.up_names
+        normal_names = pool.normal_names
 
         # 2. 按概率判定是否出UP
         if up_names:  # 有UP武器时
-            idx = bisect_right(up_probs, self.rand.pop_float())
+            idx = bisect_right(pool.up_cumulative, self.rand.pop_float())
             if idx < len(up_names):
                 return up_names[idx], 6, True  # 出UP武器，标记为True
             if not normal_names:
@@ -162,7 +177,7 @@ class WeaponGacha:
         Tuple[str, int]
             返回一个元组，包含5星通用武器名称和星级（固定为5星）
         """
-        return self._picker.choice(self.star_normal[5]), 5
+        return self._picker.choice(self.model.pools[1].normal_names), 5
 
     def attempt(self, disable_guarantee: bool = False) -> List[GachaResult]:
         """武器卡池单次申领：8次UP保底仅生效一次 + 固定最后1抽替换 + 优先级UP>6星>5星
@@ -188,6 +203,7 @@ class WeaponGacha:
         >>> for i, result in enumerate(results):
         ...     print(f"第{i+1}抽：{result.name}，{result.star}星")
         """
+        model = self.model
         self.counters.total += 1
         results = []
         has_5star_plus = False  # 是否出 5 星及以上
@@ -202,39 +218,39 @@ class WeaponGacha:
         next_no_up = self.counters.no_up
         next_guarantee_used = self.counters.guarantee_used
 
-        for _ in range(self.apply_draws):
-            rand = self.rand.pop_float()
-            if rand < self.base_6star_prob:
+        # 整次申领的星级判定随机数一次取出，UP 与名称判定继续逐个弹出
+        for rand in self.rand.take(model.apply_draws).tolist():
+            if rand < model.base_6star_prob:
                 res, star = self._get_weapon_by_star(6)
                 has_5star_plus = True
                 has_6star = True
                 if not disable_guarantee:
                     next_no_6star = 0
-                if res in self._up_weapon_names:
+                if res in model.pools[0].up_names:
                     has_up = True
                     if not disable_guarantee:
                         next_no_up = 0
                         next_guarantee_used = True
-            elif rand < self.base_65star_threshold:
+            elif rand < model.base_65star_threshold:
                 res, star = self._get_weapon_by_star(5)
                 has_5star_plus = True
             else:
                 res, star = self._get_weapon_by_star(4)
-            quota = self.quota_rule[star]
+            quota = model.quota_by_star[star]
             results.append(GachaResult(name=res, star=star, quota=quota))
 
         replace_weapon = None
         replace_quota = 0
         is_up_guarantee = (
             not disable_guarantee
-            and bool(self._up_weapon_names)
+            and bool(model.pools[0].up_names)
             and not self.counters.guarantee_used
             and not has_up
-            and self.counters.no_up >= self.up_guarantee_apply - 1
+            and self.counters.no_up >= model.up_guarantee - 1
         )
         if is_up_guarantee:
             replace_weapon, star = self._get_only_up_weapon()
-            replace_quota = self.quota_rule[star]
+            replace_quota = model.quota_by_star[star]
             next_guarantee_used = True
             next_no_up = 0
             next_no_6star = 0
@@ -244,10 +260,10 @@ class WeaponGacha:
         elif (
             not disable_guarantee
             and not has_6star
-            and self.counters.no_6star >= self.guarantee_6star_apply - 1
+            and self.counters.no_6star >= model.guarantee_6star - 1
         ):
             replace_weapon, star, is_up = self._get_only_6star_weapon()
-            replace_quota = self.quota_rule[star]
+            replace_quota = model.quota_by_star[star]
             next_no_6star = 0
             has_6star = True
             is_6_guarantee = True
@@ -258,10 +274,10 @@ class WeaponGacha:
         elif (
             not disable_guarantee
             and not has_5star_plus
-            and self.per_apply_must_have
+            and model.per_apply_must_have
         ):
             replace_weapon, star = self._get_only_5star_weapon()
-            replace_quota = self.quota_rule[star]
+            replace_quota = model.quota_by_star[star]
             is_5_guarantee = True
 
         if replace_weapon:
@@ -307,7 +323,7 @@ class WeaponGacha:
         >>> print(f"累计奖励：{rewards}")
         """
         reward_counts = {}  # 统计各奖励的次数
-        reward_config = self.rule_config["rewards"]
+        reward_config = self.model.reward_config
         cycle_step = reward_config.get("cycle", 8)
         start_count = reward_config.get("start", 10)
 
@@ -5,16 +5,20 @@ from gacha_core import Counters
 
 from .baseline import BaselineEstimator
 from .engine import Scheduler
+from .executor import SimulationExecutor, SimulationPlan
 from .models import (
     LogMapConfig,
     Resource,
     ScoringPreferences,
+    StageSummary,
     StageTrace,
     StrategyGoal,
     StrategyScoreReport,
     StrategyTrace,
+    TraceSummary,
 )
 from .scoring import ScoringSystem
+from .stats import ScoreSamples, StreamingStats, TraceStatistics
 from .strategy_protocol import STRATEGY_PROTOCOL_VERSION, StrategyProtocolAdapter
 from .strategy_rules import (
     StrategyCondition,
@@ -31,10 +35,17 @@ __all__ = [
     "ScoringPreferences",
     "ScoringSystem",
     "Scheduler",
+    "SimulationExecutor",
+    "SimulationPlan",
+    "StageSummary",
+    "ScoreSamples",
+    "StreamingStats",
+    "TraceStatistics",
     "StageTrace",
     "StrategyGoal",
     "StrategyScoreReport",
     "StrategyTrace",
+    "TraceSummary",
     "STRATEGY_PROTOCOL_VERSION",
     "StrategyProtocolAdapter",
     "StrategyCondition",
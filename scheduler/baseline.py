@@ -4,21 +4,33 @@
 from __future__ import annotations
 
 import os
+import time
 from copy import deepcopy
 from hashlib import md5
 from math import sqrt
-from typing import Any, Dict, List, Optional, Tuple
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 
-from gacha_core import CharGacha, Counters, GlobalConfigLoader
+from gacha_core import (
+    BatchRandom,
+    CharBannerSolver,
+    CharBannerValueTable,
+    CharGacha,
+    Counters,
+    GlobalConfigLoader,
+)
+from gacha_core.randomizer import STREAM_BASELINE
 
-from .cache_db import BaselineCacheDB, preferences_hash
+from .cache_db import DEFAULT_MEMORY_CACHE_SIZE, BaselineCacheDB, CacheTelemetry, preferences_hash
+from .lattice import BaselineLattice
 from .models import (
     SCORING_VERSION,
     ScoringPreferences,
     SixStarDistributionEstimate,
-    calculate_results_value,
+    ValueAccumulator,
+    _calculate_six_star_incremental_value,
 )
 
 # numpy 数组列索引
@@ -31,10 +43,147 @@ _COL_NOUP = 5
 _COL_GUAR = 6
 _COL_URG = 7
 
+# 基线估计模式：simulation 为固定种子抽样，analytic 为精确期望（不可用时回退抽样）
+BASELINE_MODES = ("simulation", "analytic")
+
+# 份数价值在潜能封顶（满潜 = 6 份）后不再变化
+_MAX_COPIES = 6
+
 # state_distance 各维度的 scale（与 _state_distance 保持一致）
 _SCALES = np.array([30.0, 15.0, 5.0, 30.0, 1.0, 1.0], dtype=np.float64)
 
 
+# 批量估计的单个查询：(config_name, counters, paid_draws)
+BaselineQuery = Tuple[str, Counters, int]
+
+
+# 样本随机流的方案标签，写入基线缓存键；更换随机数方案时修改，旧方案的缓存行不再命中
+BASELINE_RNG_SCHEME = "philox"
+
+
+def _sample_random(base_seed: int, index: int) -> BatchRandom:
+    """第 ``index`` 个样本的随机流。
+
+    流只由 ``(base_seed, index)`` 定位，不同状态共享同一组样本流（公共随机数），
+    插值锚点之间的估计因此更平滑，预计算脚本也能直接复现。
+    """
+    return BatchRandom.from_stream(base_seed, index, kind=STREAM_BASELINE)
+
+
+def _simulate_baseline_value(
+    config_dir: str,
+    config_name: str,
+    counters: Counters,
+    paid_draws: int,
+    preferences: ScoringPreferences,
+    samples: int,
+    base_seed: int,
+) -> float:
+    """固定样本数抽样估计一个状态的基准价值（模块级函数，可在子进程中执行）。"""
+    config = GlobalConfigLoader.shared(f"{config_dir}/{config_name}")
+    featured_names = config.get_char_featured_names()
+    current_up_names = set(featured_names["current_up"])
+    past_up_names = set(featured_names["past_up"])
+    sample_values: List[float] = []
+    for index in range(samples):
+        gacha = CharGacha(config=config, rand=_sample_random(base_seed, index))
+        gacha.counters = deepcopy(counters)
+        accumulator = ValueAccumulator(preferences)
+        for _ in range(paid_draws):
+            result = gacha.attempt()
+            name = result.name
+            accumulator.add_draw(name, result.star, name in current_up_names, name in past_up_names)
+        sample_values.append(accumulator.value)
+    return sum(sample_values) / len(sample_values)
+
+
+class _SplineIndex:
+    """近邻样条插值索引
+
+    缓存行按计数器状态归并为锚点，每个锚点保存按抽数升序的估计曲线；锚点坐标按
+    ``_SCALES`` 归一化后建立 KD 树。查询时取半径 ``max(1.5, 最近距离 + 0.75)`` 内的锚点
+    （不足 3 行时取最近的 8 行所在锚点），按距离由近到远为每个抽数保留最近锚点的估计，
+    再用三次样条在曲线内部插值。同一组近邻锚点的样条只拟合一次，最近锚点独自覆盖
+    全部抽数时（离线预计算的网格即如此）直接复用该锚点的预拟合样条。
+    """
+
+    def __init__(self, points, tree, curves, cubic_spline):
+        self.points = points
+        self.tree = tree
+        self.curves = curves
+        self.sizes = np.array([len(pds) for pds, _ in curves])
+        self._cubic_spline = cubic_spline
+        self._splines: Dict[Tuple[int, ...], Any] = {}
+
+    @classmethod
+    def build(cls, data: np.ndarray) -> Optional["_SplineIndex"]:
+        if len(data) == 0:
+            return None
+        try:
+            from scipy.interpolate import CubicSpline
+            from scipy.spatial import cKDTree
+        except ImportError:
+            return None
+        states, inverse = np.unique(data[:, _COL_TOTAL : _COL_URG + 1], axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.lexsort((data[:, _COL_PD], inverse))
+        bounds = np.flatnonzero(np.diff(inverse[order])) + 1
+        curves = [
+            (data[rows, _COL_PD], data[rows, _COL_EST]) for rows in np.split(order, bounds)
+        ]
+        points = states / _SCALES
+        return cls(points, cKDTree(points), curves, CubicSpline)
+
+    def _neighbors(self, point: np.ndarray) -> Tuple[int, ...]:
+        nearest, _ = self.tree.query(point)
+        candidates = np.asarray(self.tree.query_ball_point(point, max(1.5, float(nearest) + 0.75)), dtype=np.intp)
+        if self.sizes[candidates].sum() < 3:
+            # 候选不足：按距离取最近的 8 行所在的锚点
+            dists, ids = self.tree.query(point, k=min(8, len(self.points)))
+            ids = np.atleast_1d(ids)
+            dists = np.atleast_1d(dists)
+            rows = np.cumsum(self.sizes[ids])
+            keep = int(np.searchsorted(rows, min(8, int(self.sizes.sum())))) + 1
+            return tuple(ids[:keep].tolist())
+        dists = np.sqrt(np.sum((self.points[candidates] - point) ** 2, axis=1))
+        return tuple(candidates[np.lexsort((candidates, dists))].tolist())
+
+    def _spline(self, anchors: Tuple[int, ...]) -> Any:
+        if anchors in self._splines:
+            return self._splines[anchors]
+        first_pds, first_ests = self.curves[anchors[0]]
+        pd_map: Dict[float, float] = dict(zip(first_pds.tolist(), first_ests.tolist()))
+        for anchor in anchors[1:]:
+            pds, ests = self.curves[anchor]
+            for pd_value, estimate in zip(pds.tolist(), ests.tolist()):
+                pd_map.setdefault(pd_value, estimate)
+        spline = None
+        if len(pd_map) >= 3:
+            best_pds = sorted(pd_map)
+            spline = self._cubic_spline(best_pds, [pd_map[pd] for pd in best_pds], extrapolate=False)
+        self._splines[anchors] = spline
+        return spline
+
+    def query(self, targets: np.ndarray, paid_draws: np.ndarray) -> np.ndarray:
+        """对 (M, 6) 的目标状态与 M 个抽数求插值，无法插值处为 NaN。"""
+        results = np.full(len(targets), np.nan)
+        if not len(targets):
+            return results
+        states, inverse = np.unique(targets, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for state_index, state in enumerate(states):
+            spline = self._spline(self._neighbors(state / _SCALES))
+            if spline is None:
+                continue
+            rows = np.flatnonzero(inverse == state_index)
+            x = spline.x
+            draws = paid_draws[rows]
+            inside = (draws > x[0]) & (draws < x[-1])
+            if inside.any():
+                results[rows[inside]] = spline(draws[inside])
+        return results
+
+
 class BaselineEstimator:
     """固定种子、固定样本数的状态基准价值估计器。"""
 
@@ -44,19 +193,46 @@ class BaselineEstimator:
         samples: int = 64,
         base_seed: int = 0,
         cache_path: Optional[str] = None,
+        mode: str = "simulation",
+        memory_cache_size: int = DEFAULT_MEMORY_CACHE_SIZE,
     ):
+        if mode not in BASELINE_MODES:
+            raise ValueError(f"不支持的基线估计模式: {mode}")
         self.config_dir = config_dir
         self.samples = samples
         self.base_seed = base_seed
+        self.mode = mode
         self.cache_path = cache_path or os.path.join("data", "baseline_cache.db")
-        self._db = BaselineCacheDB(self.cache_path)
+        self._db = BaselineCacheDB(self.cache_path, memory_size=memory_cache_size)
         # 内存缓存：每个 (config, pref_hash) 一组预计算数据
         self._config_data_cache: Dict[str, Optional[np.ndarray]] = {}
+        # 近邻样条索引：每个 (config, pref_hash) 一份，锚点曲线预先拟合
+        self._spline_indexes: Dict[str, Optional[_SplineIndex]] = {}
+        # 预计算网格张量：优先内存映射数据库旁的 .npy，缺失时由缓存行组装
+        self._lattices: Dict[str, Optional[BaselineLattice]] = {}
+        # 精确分布求解器（转移矩阵只与卡池配置有关），scipy 不可用时为 None
+        self._solver_cache: Dict[str, Optional[CharBannerSolver]] = {}
+        # analytic 模式的期望价值表：每个 (config, pref_hash) 一张
+        self._value_tables: Dict[str, Optional[CharBannerValueTable]] = {}
 
     @property
     def cache_hits(self) -> int:
         return self._db.cache_hits
 
+    @property
+    def telemetry(self) -> CacheTelemetry:
+        return self._db.telemetry
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """本估计器的缓存统计：命中 / 未命中计数，以及各层级的次数与耗时。"""
+        return {
+            "hits": self._db.cache_hits,
+            "misses": self._db.cache_misses,
+            "memory_cache_size": len(self._db._memory),
+            "memory_cache_capacity": self._db._memory.capacity,
+            "tiers": self.telemetry.snapshot(),
+        }
+
     def flush_cache(self) -> None:
         self._db.flush()
 
@@ -90,9 +266,9 @@ class BaselineEstimator:
                           counters_guarantee_used, counters_urgent_used
                    FROM baseline_estimates
                    WHERE config_name = ? AND samples = ? AND seed = ?
-                     AND preferences_sig_hash = ?
+                     AND preferences_sig_hash = ? AND version = ?
                    ORDER BY paid_draws""",
-                (config_name, self.samples, self.base_seed, pref_hash),
+                (config_name, self.samples, self.base_seed, pref_hash, SCORING_VERSION),
             )],
             dtype=np.float64,
         )
@@ -111,76 +287,226 @@ class BaselineEstimator:
         paid_draws: int,
         preferences: ScoringPreferences,
     ) -> float:
-        if paid_draws <= 0:
-            return 0.0
-
-        cache_key = self._cache_key(
-            "baseline",
-            config_name,
-            counters,
-            paid_draws,
-            preferences.theta_signature,
-            self.samples,
-            self.base_seed,
-        )
-        cached = self._db.get_exact(cache_key)
-        if cached is not None:
-            return cached
+        return self.estimate_many([(config_name, counters, paid_draws)], preferences)[0]
 
-        interpolated = self._interpolate_estimate(
-            config_name, counters, paid_draws, preferences
-        )
-        if interpolated is not None:
-            self._db.set_baseline(
-                cache_key=cache_key,
-                config_name=config_name,
-                counters_signature=self._counters_signature(counters),
-                paid_draws=paid_draws,
-                preferences_sig_hash=preferences_hash(preferences.theta_signature),
-                samples=self.samples,
-                seed=self.base_seed,
-                estimate=interpolated,
-                source="spline",
-                version=SCORING_VERSION,
+    def estimate_many(
+        self,
+        queries: Iterable[BaselineQuery],
+        preferences: ScoringPreferences,
+        workers: int = 1,
+    ) -> List[float]:
+        """批量估计多个 ``(config_name, counters, paid_draws)`` 的基准价值
+
+        相同的 (配置, 计数器签名, 抽数) 只解析一次：analytic 模式先查精确价值表，
+        其余唯一键用一次批量 SQL 查询命中缓存，未命中的再依次尝试插值与抽样，
+        新结果统一写入缓存后一次提交。结果与逐个调用 ``estimate`` 一致。
+
+        Parameters
+        ----------
+        queries : Iterable[BaselineQuery]
+            ``(config_name, counters, paid_draws)`` 查询序列
+        preferences : ScoringPreferences
+            评分偏好
+        workers : int, optional
+            抽样未命中项时使用的进程数，默认1（在当前进程中计算）
+
+        Returns
+        -------
+        List[float]
+            与 ``queries`` 一一对应的估计值
+        """
+        queries = list(queries)
+        estimates = [0.0] * len(queries)
+        positions: Dict[Tuple[str, Tuple[Any, ...], int], List[int]] = {}
+        unique: Dict[Tuple[str, Tuple[Any, ...], int], Counters] = {}
+        for index, (config_name, counters, paid_draws) in enumerate(queries):
+            if paid_draws <= 0:
+                continue
+            key = (config_name, self._counters_signature(counters), paid_draws)
+            slot = positions.get(key)
+            if slot is None:
+                positions[key] = [index]
+                unique[key] = counters
+            else:
+                slot.append(index)
+
+        for key, value in self._resolve_unique(unique, preferences, workers).items():
+            for index in positions[key]:
+                estimates[index] = value
+        return estimates
+
+    def _resolve_unique(
+        self,
+        unique: Dict[Tuple[str, Tuple[Any, ...], int], Counters],
+        preferences: ScoringPreferences,
+        workers: int,
+    ) -> Dict[Tuple[str, Tuple[Any, ...], int], float]:
+        resolved: Dict[Tuple[str, Tuple[Any, ...], int], float] = {}
+        cache_keys: Dict[Tuple[str, Tuple[Any, ...], int], str] = {}
+        for key, counters in unique.items():
+            config_name, _, paid_draws = key
+            if self.mode == "analytic":
+                started = time.perf_counter()
+                analytic = self._analytic_estimate(config_name, counters, paid_draws, preferences)
+                if analytic is not None:
+                    self.telemetry.record("analytic", time.perf_counter() - started)
+                    resolved[key] = analytic
+                    continue
+            cache_keys[key] = self._cache_key(
+                "baseline",
+                config_name,
+                counters,
+                paid_draws,
+                preferences.theta_signature,
+                self.samples,
+                self.base_seed,
+                BASELINE_RNG_SCHEME,
+            )
+        if not cache_keys:
+            return resolved
+
+        cached = self._db.get_exact_many(list(cache_keys.values()))
+        uncached: Dict[str, List[Tuple[str, Tuple[Any, ...], int]]] = {}
+        for key, cache_key in cache_keys.items():
+            if cache_key in cached:
+                resolved[key] = cached[cache_key]
+            else:
+                uncached.setdefault(key[0], []).append(key)
+
+        # 未命中项按配置分组：先查预计算网格张量，再一次查询完成近邻定位与样条求值
+        misses: List[Tuple[str, Tuple[Any, ...], int]] = []
+        # 插值与抽样结果最后在一个事务内批量写回
+        pending: List[Dict[str, Any]] = []
+        for config_name, keys in uncached.items():
+            started = time.perf_counter()
+            on_lattice = self._lattice_many(
+                config_name, [unique[key] for key in keys], [key[2] for key in keys], preferences
+            )
+            hits = 0
+            remaining = []
+            for key, value in zip(keys, on_lattice):
+                if value is None:
+                    remaining.append(key)
+                else:
+                    resolved[key] = value
+                    hits += 1
+            self.telemetry.record("lattice", time.perf_counter() - started, hits)
+            keys = remaining
+            if not keys:
+                continue
+            started = time.perf_counter()
+            interpolated = self._interpolate_many(
+                config_name, [unique[key] for key in keys], [key[2] for key in keys], preferences
             )
-            return interpolated
+            hits = 0
+            for key, value in zip(keys, interpolated):
+                if value is None:
+                    misses.append(key)
+                    continue
+                pending.append(self._estimate_entry(key, cache_keys[key], value, "spline", preferences))
+                resolved[key] = value
+                hits += 1
+            self.telemetry.record("spline", time.perf_counter() - started, hits)
+
+        tasks = [
+            (self.config_dir, key[0], unique[key], key[2], preferences, self.samples, self.base_seed)
+            for key in misses
+        ]
+        started = time.perf_counter()
+        if workers > 1 and len(tasks) > 1:
+            with Pool(min(workers, len(tasks))) as pool:
+                values = pool.starmap(_simulate_baseline_value, tasks)
+        else:
+            values = [_simulate_baseline_value(*task) for task in tasks]
+        if tasks:
+            self.telemetry.record("simulation", time.perf_counter() - started, len(tasks))
+        for key, value in zip(misses, values):
+            pending.append(self._estimate_entry(key, cache_keys[key], value, "simulation", preferences))
+            resolved[key] = value
+
+        self._db.set_baselines_bulk(pending)
+        return resolved
+
+    def _estimate_entry(
+        self,
+        key: Tuple[str, Tuple[Any, ...], int],
+        cache_key: str,
+        estimate: float,
+        source: str,
+        preferences: ScoringPreferences,
+    ) -> Dict[str, Any]:
+        config_name, counters_signature, paid_draws = key
+        return {
+            "cache_key": cache_key,
+            "config_name": config_name,
+            "counters_signature": counters_signature,
+            "paid_draws": paid_draws,
+            "preferences_sig_hash": preferences_hash(preferences.theta_signature),
+            "samples": self.samples,
+            "seed": self.base_seed,
+            "estimate": estimate,
+            "source": source,
+            "version": SCORING_VERSION,
+        }
+
+    def _analytic_estimate(
+        self,
+        config_name: str,
+        counters: Counters,
+        paid_draws: int,
+        preferences: ScoringPreferences,
+    ) -> Optional[float]:
+        """精确期望价值；卡池含多个 UP 或 scipy 不可用时返回 None。"""
+        key = f"{config_name}:{preferences_hash(preferences.theta_signature)}"
+        if key not in self._value_tables:
+            self._value_tables[key] = self._build_value_table(config_name, preferences)
+        table = self._value_tables[key]
+        if table is None:
+            return None
+        return round(table.value(counters, paid_draws), 4)
+
+    def _build_value_table(
+        self, config_name: str, preferences: ScoringPreferences
+    ) -> Optional[CharBannerValueTable]:
+        solver = self._get_solver(config_name)
+        if solver is None or len(solver.up_names) > 1:
+            return None
 
-        config = GlobalConfigLoader(f"{self.config_dir}/{config_name}")
-        sample_values: List[float] = []
-        featured_names = config.get_char_featured_names()
+        featured_names = solver.config.get_char_featured_names()
         current_up_names = set(featured_names["current_up"])
         past_up_names = set(featured_names["past_up"])
-        for index in range(self.samples):
-            seed = self._build_seed(cache_key, index)
-            gacha = CharGacha(config=config, seed=seed)
-            gacha.counters = deepcopy(counters)
-            results: List[Dict[str, Any]] = []
-            for _ in range(paid_draws):
-                result = gacha.attempt()
-                results.append(
-                    {
-                        "name": result.name,
-                        "star": result.star,
-                        "is_current_up": result.name in current_up_names,
-                        "is_past_up": result.name in past_up_names,
-                    }
-                )
-            sample_values.append(calculate_results_value(results, preferences))
 
-        estimate = sum(sample_values) / len(sample_values)
-        self._db.set_baseline(
-            cache_key=cache_key,
-            config_name=config_name,
-            counters_signature=self._counters_signature(counters),
-            paid_draws=paid_draws,
-            preferences_sig_hash=preferences_hash(preferences.theta_signature),
-            samples=self.samples,
-            seed=self.base_seed,
-            estimate=estimate,
-            source="simulation",
-            version=SCORING_VERSION,
+        def payoff(names: List[str]) -> List[float]:
+            totals = [0.0] * (_MAX_COPIES + 1)
+            for name in names:
+                if name in current_up_names:
+                    base_value = preferences.current_up_value
+                elif name in past_up_names:
+                    base_value = preferences.past_up_value
+                else:
+                    base_value = preferences.normal_six_value
+                for count in range(1, _MAX_COPIES + 1):
+                    totals[count] += _calculate_six_star_incremental_value(
+                        name, count, base_value, preferences
+                    )
+            return totals
+
+        return solver.value_table(
+            {5: preferences.five_star_value, 4: preferences.four_star_value},
+            payoff(solver.up_names),
+            payoff(solver.normal_names),
         )
-        return estimate
+
+    def _get_solver(self, config_name: str) -> Optional[CharBannerSolver]:
+        if config_name not in self._solver_cache:
+            try:
+                solver: Optional[CharBannerSolver] = CharBannerSolver(
+                    GlobalConfigLoader.shared(f"{self.config_dir}/{config_name}")
+                )
+            except ImportError:
+                solver = None
+            self._solver_cache[config_name] = solver
+        return self._solver_cache[config_name]
 
     def estimate_six_star_distribution(
         self,
@@ -188,16 +514,21 @@ class BaselineEstimator:
         counters: Counters,
         paid_draws: int,
     ) -> SixStarDistributionEstimate:
+        """6 星数量分布：优先使用精确求解器，scipy 不可用时回退到固定种子抽样。"""
         import json
 
-        cache_key = self._cache_key(
-            "distribution",
-            config_name,
-            counters,
-            paid_draws,
-            self.samples,
-            self.base_seed,
-        )
+        solver = self._get_solver(config_name)
+        if solver is not None:
+            cache_key = self._cache_key("distribution", "exact", config_name, counters, paid_draws)
+        else:
+            cache_key = self._cache_key(
+                "distribution",
+                config_name,
+                counters,
+                paid_draws,
+                self.samples,
+                self.base_seed,
+            )
         cached = self._db.get_distribution_exact(cache_key)
         if cached is not None:
             return SixStarDistributionEstimate(
@@ -208,40 +539,50 @@ class BaselineEstimator:
                 samples=int(cached["samples"]),
                 seed=int(cached["seed"]),
                 cache_hit=True,
+                method="exact" if int(cached["samples"]) == 0 else "simulation",
             )
 
-        config = GlobalConfigLoader(f"{self.config_dir}/{config_name}")
-        counts: List[int] = []
-        for index in range(self.samples):
-            seed = self._build_seed(cache_key, index)
-            gacha = CharGacha(config=config, seed=seed)
-            gacha.counters = deepcopy(counters)
-            six_count = 0
-            for _ in range(paid_draws):
-                if gacha.attempt().star == 6:
-                    six_count += 1
-            counts.append(six_count)
-
-        probabilities: Dict[str, float] = {}
-        tail_probabilities: Dict[str, float] = {}
-        for count in sorted(set(counts)):
-            probabilities[str(count)] = counts.count(count) / len(counts)
-        for count in sorted(set(counts)):
-            tail_probabilities[str(count)] = sum(
-                1 for value in counts if value >= count
-            ) / len(counts)
-
-        expected = sum(counts) / len(counts)
-        variance = sum((value - expected) ** 2 for value in counts) / len(counts)
-        stderr = sqrt(variance / len(counts)) if counts else 0.0
+        started = time.perf_counter()
+        if solver is not None:
+            # 精确解：samples 记为 0，标记该条目不含抽样误差
+            dist = solver.solve(paid_draws, counters)
+            probabilities = {
+                str(count): float(prob)
+                for count, prob in enumerate(dist.six_star_probabilities)
+                if prob > 0.0
+            }
+            tail_probabilities = {
+                str(count): float(prob)
+                for count, prob in enumerate(dist.six_star_tail_probabilities)
+                if str(count) in probabilities
+            }
+            expected = dist.expected_six_star_count
+            stderr = 0.0
+            samples, seed, method = 0, 0, "exact"
+        else:
+            counts = self._simulate_six_star_counts(config_name, counters, paid_draws)
+            probabilities = {}
+            tail_probabilities = {}
+            for count in sorted(set(counts)):
+                probabilities[str(count)] = counts.count(count) / len(counts)
+            for count in sorted(set(counts)):
+                tail_probabilities[str(count)] = sum(
+                    1 for value in counts if value >= count
+                ) / len(counts)
+
+            expected = sum(counts) / len(counts)
+            variance = sum((value - expected) ** 2 for value in counts) / len(counts)
+            stderr = sqrt(variance / len(counts)) if counts else 0.0
+            samples, seed, method = self.samples, self.base_seed, "simulation"
+        self.telemetry.record("analytic" if method == "exact" else "simulation", time.perf_counter() - started)
 
         self._db.set_distribution(
             cache_key=cache_key,
             config_name=config_name,
             counters_signature=self._counters_signature(counters),
             paid_draws=paid_draws,
-            samples=self.samples,
-            seed=self.base_seed,
+            samples=samples,
+            seed=seed,
             expected_six_star_count=expected,
             probabilities=probabilities,
             tail_probabilities=tail_probabilities,
@@ -253,17 +594,72 @@ class BaselineEstimator:
             probabilities={k: float(v) for k, v in probabilities.items()},
             tail_probabilities={k: float(v) for k, v in tail_probabilities.items()},
             stderr=round(stderr, 8),
-            samples=self.samples,
-            seed=self.base_seed,
+            samples=samples,
+            seed=seed,
             cache_hit=False,
+            method=method,
         )
 
+    def _simulate_six_star_counts(
+        self,
+        config_name: str,
+        counters: Counters,
+        paid_draws: int,
+    ) -> List[int]:
+        config = GlobalConfigLoader.shared(f"{self.config_dir}/{config_name}")
+        counts: List[int] = []
+        for index in range(self.samples):
+            gacha = CharGacha(config=config, rand=_sample_random(self.base_seed, index))
+            gacha.counters = deepcopy(counters)
+            six_count = 0
+            for _ in range(paid_draws):
+                if gacha.attempt().star == 6:
+                    six_count += 1
+            counts.append(six_count)
+        return counts
+
     def _cache_key(self, *parts: Any) -> str:
         return md5(repr(parts).encode("utf-8")).hexdigest()
 
-    def _build_seed(self, cache_key: str, index: int) -> int:
-        payload = f"{self.base_seed}|{cache_key}|{index}".encode("utf-8")
-        return int(md5(payload).hexdigest()[:8], 16)
+    def _get_lattice(self, config_name: str, preferences: ScoringPreferences) -> Optional[BaselineLattice]:
+        key = self._config_cache_key(config_name, preferences)
+        if key not in self._lattices:
+            path = BaselineLattice.path_for(
+                self.cache_path, config_name, self.samples, self.base_seed,
+                preferences_hash(preferences.theta_signature),
+            )
+            lattice = BaselineLattice.load(path)
+            if lattice is None:
+                data = self._get_config_data(config_name, preferences)
+                lattice = BaselineLattice.from_rows(data) if data is not None else None
+            self._lattices[key] = lattice
+        return self._lattices[key]
+
+    def _lattice_many(
+        self,
+        config_name: str,
+        counters_list: Sequence[Counters],
+        paid_draws_list: Sequence[int],
+        preferences: ScoringPreferences,
+    ) -> List[Optional[float]]:
+        """在预计算网格上批量多线性插值，网格覆盖不到的位置返回 None。"""
+        lattice = self._get_lattice(config_name, preferences)
+        if lattice is None:
+            return [None] * len(counters_list)
+        values = lattice.query(
+            [counters.no_6star for counters in counters_list],
+            [counters.no_up for counters in counters_list],
+            [float(counters.guarantee_used) for counters in counters_list],
+            paid_draws_list,
+        )
+        return [None if value != value else float(value) for value in values.tolist()]
+
+    def _get_spline_index(self, config_name: str, preferences: ScoringPreferences) -> Optional["_SplineIndex"]:
+        key = self._config_cache_key(config_name, preferences)
+        if key not in self._spline_indexes:
+            data = self._get_config_data(config_name, preferences)
+            self._spline_indexes[key] = _SplineIndex.build(data) if data is not None else None
+        return self._spline_indexes[key]
 
     def _interpolate_estimate(
         self,
@@ -272,78 +668,24 @@ class BaselineEstimator:
         paid_draws: int,
         preferences: ScoringPreferences,
     ) -> Optional[float]:
-        data = self._get_config_data(config_name, preferences)
-        if data is None or len(data) == 0:
-            return None
-
-        # 目标状态向量：[total, no_6star, no_5star_plus, no_up, guarantee_used, urgent_used]
-        target = np.array(
-            [
-                float(counters.total),
-                float(counters.no_6star),
-                float(counters.no_5star_plus),
-                float(counters.no_up),
-                float(counters.guarantee_used),
-                float(counters.urgent_used),
-            ],
-            dtype=np.float64,
-        )
-
-        # 矢量化距离计算：data[:, _COL_TOTAL:_COL_URG+1] 取列 2..7
-        diffs = data[:, _COL_TOTAL : _COL_URG + 1] - target
-        dists = np.sqrt(np.sum((diffs / _SCALES) ** 2, axis=1))
-
-        # 筛选近邻
-        nearest = float(np.min(dists))
-        max_dist = max(1.5, nearest + 0.75)
-        mask = dists <= max_dist
-        if np.sum(mask) < 3:
-            # 候选不足：按距离排序取 top 8
-            top_n = min(8, len(dists))
-            if top_n < 3:
-                return None
-            top_idx = np.argpartition(dists, top_n - 1)[:top_n]
-            filtered = data[top_idx]
-            filtered_dists = dists[top_idx]
-        else:
-            filtered = data[mask]
-            filtered_dists = dists[mask]
-
-        # 按距离升序排序（用于去重：同 pd 保留最近邻）
-        order = np.argsort(filtered_dists)
-        filtered = filtered[order]
-        filtered_dists = filtered_dists[order]
-
-        # 去重：每个 pd 保留距离最小的候选
-        seen_pds: set[int] = set()
-        pd_map: dict[int, float] = {}  # pd -> estimate (best distance)
-        for row in filtered:
-            pd_val = int(row[_COL_PD])
-            if pd_val not in seen_pds:
-                seen_pds.add(pd_val)
-                pd_map[pd_val] = float(row[_COL_EST])
-
-        if len(pd_map) < 3:
-            return None
+        return self._interpolate_many(config_name, [counters], [paid_draws], preferences)[0]
 
-        # 按 pd 升序排列（CubicSpline 要求 x 严格递增）
-        best_pds = sorted(pd_map.keys())
-        best_ests = [pd_map[pd] for pd in best_pds]
-
-        # 检查待插值的 pd 是否在范围内
-        if paid_draws <= min(best_pds) or paid_draws >= max(best_pds):
-            return None
-
-        try:
-            from scipy.interpolate import CubicSpline
-        except ImportError:
-            return None
-
-        spline = CubicSpline(best_pds, best_ests, extrapolate=False)
-        result = float(spline(paid_draws))
-        if result != result:  # NaN
-            return None
-        return result
+    def _interpolate_many(
+        self,
+        config_name: str,
+        counters_list: Sequence[Counters],
+        paid_draws_list: Sequence[int],
+        preferences: ScoringPreferences,
+    ) -> List[Optional[float]]:
+        """批量近邻样条插值，无法插值的位置返回 None。"""
+        index = self._get_spline_index(config_name, preferences)
+        if index is None:
+            return [None] * len(counters_list)
+        targets = np.array(
+            [self._counters_signature(counters) for counters in counters_list], dtype=np.float64
+        ).reshape(len(counters_list), len(_SCALES))
+        values = index.query(targets, np.asarray(paid_draws_list, dtype=np.float64))
+        return [None if value != value else float(value) for value in values.tolist()]
 
     @staticmethod
     def _state_distance(
@@ -382,4 +724,4 @@ class BaselineEstimator:
         )
 
 
-__all__ = ["BaselineEstimator"]
+__all__ = ["BASELINE_MODES", "BaselineEstimator", "BaselineQuery"]
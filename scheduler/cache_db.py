@@ -5,10 +5,15 @@ from __future__ import annotations
 
 import atexit
 import json
+import os
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from hashlib import md5
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 
 def preferences_hash(theta_signature: Tuple[Any, ...]) -> str:
@@ -19,6 +24,114 @@ def preferences_hash(theta_signature: Tuple[Any, ...]) -> str:
 # 插值查询时用于 SQL 过滤的安全范围（对应 state_distance 阈值 max(1.5, nearest+0.75) 约 2.25）
 _NO6_RANGE = 25
 _NOUP_RANGE = 45
+# 批量精确查找时单条 IN 查询的键数（低于 SQLite 默认的 999 个参数上限）
+_IN_QUERY_CHUNK = 500
+
+_BASELINE_INSERT = """INSERT OR REPLACE INTO baseline_estimates
+   (cache_key, config_name,
+    counters_total, counters_no_6star, counters_no_5star_plus,
+    counters_no_up, counters_guarantee_used, counters_urgent_used,
+    paid_draws, preferences_sig_hash, samples, seed,
+    estimate, source, version)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_BASELINE_INDEX = """CREATE INDEX IF NOT EXISTS idx_baseline_interp
+    ON baseline_estimates(config_name, samples, seed, preferences_sig_hash, paid_draws)"""
+# 批量导入会话的页缓存（负数为 KiB，即 256 MiB）
+_BULK_CACHE_SIZE = -262144
+
+
+# 进程内 LRU 前置缓存的默认容量（按条目计），可用环境变量覆盖
+DEFAULT_MEMORY_CACHE_SIZE = int(os.environ.get("ENDFIELD_BASELINE_MEMORY_CACHE", "65536"))
+# 遥测记录的缓存层级
+CACHE_TIERS = ("memory", "database", "analytic", "lattice", "spline", "simulation")
+
+
+class CacheTelemetry:
+    """基线缓存各层级的命中次数与耗时
+
+    ``memory`` / ``database`` 为缓存命中，``analytic`` / ``spline`` / ``simulation``
+    为未命中后的计算来源。每次记录同时累加到 ``parent``（进程级汇总），
+    评估报告取单次评估的实例，API 取进程级汇总。
+    """
+
+    def __init__(self, parent: Optional["CacheTelemetry"] = None):
+        self.parent = parent
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = dict.fromkeys(CACHE_TIERS, 0)
+        self.seconds: Dict[str, float] = dict.fromkeys(CACHE_TIERS, 0.0)
+
+    def record(self, tier: str, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            self.counts[tier] += count
+            self.seconds[tier] += seconds
+        if self.parent is not None:
+            self.parent.record(tier, seconds, count)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                tier: {"count": self.counts[tier], "seconds": round(self.seconds[tier], 6)}
+                for tier in CACHE_TIERS
+            }
+
+
+class _LRUCache:
+    """线程安全的有界 LRU 映射。"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# 进程级共享状态：同一数据库文件的所有 BaselineCacheDB 实例共用前置缓存与遥测汇总，
+# 各实例仍持有独立的 SQLite 连接
+PROCESS_TELEMETRY = CacheTelemetry()
+_FRONT_CACHES: Dict[Tuple[str, str], _LRUCache] = {}
+_FRONT_CACHES_LOCK = threading.Lock()
+
+
+def _front_cache(cache_path: Path, table: str, capacity: int) -> _LRUCache:
+    key = (str(cache_path.resolve()), table)
+    with _FRONT_CACHES_LOCK:
+        cache = _FRONT_CACHES.get(key)
+        if cache is None:
+            cache = _FRONT_CACHES[key] = _LRUCache(capacity)
+        cache.capacity = capacity
+        return cache
+
+
+def front_cache_stats() -> Dict[str, Any]:
+    """进程级缓存统计：各层级计数与耗时，以及每个前置缓存的占用。"""
+    with _FRONT_CACHES_LOCK:
+        caches = [
+            {"path": path, "table": table, "size": len(cache), "capacity": cache.capacity}
+            for (path, table), cache in _FRONT_CACHES.items()
+        ]
+    return {"tiers": PROCESS_TELEMETRY.snapshot(), "front_caches": caches}
 
 
 class BaselineCacheDB:
@@ -27,15 +140,26 @@ class BaselineCacheDB:
     WAL 模式确保并发读写的安全性。
     精确查询通过 MD5 cache_key（PRIMARY KEY, O(log n)）。
     插值查询通过结构化列 + 复合索引 + SQL 级范围过滤。
+    精确查询前置一层进程内 LRU（同一数据库文件的实例共享），写入时同步写穿到 SQLite。
+
+    Parameters
+    ----------
+    cache_path : str, optional
+        SQLite 文件路径
+    memory_size : int, optional
+        每张表前置 LRU 的容量，默认 ``DEFAULT_MEMORY_CACHE_SIZE``；0 表示禁用
     """
 
-    def __init__(self, cache_path: str = "data/baseline_cache.db"):
+    def __init__(self, cache_path: str = "data/baseline_cache.db", memory_size: int = DEFAULT_MEMORY_CACHE_SIZE):
         self.cache_path = Path(cache_path)
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
         self.cache_hits = 0
         self.cache_misses = 0
+        self.telemetry = CacheTelemetry(parent=PROCESS_TELEMETRY)
         self._conn: Optional[sqlite3.Connection] = None
         self._init_db()
+        self._memory = _front_cache(self.cache_path, "baseline_estimates", memory_size)
+        self._distribution_memory = _front_cache(self.cache_path, "distribution_estimates", memory_size)
         atexit.register(self.close)
 
     # ------------------------------------------------------------------
@@ -73,10 +197,7 @@ class BaselineCacheDB:
                 version TEXT NOT NULL
             )
         """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_baseline_interp
-            ON baseline_estimates(config_name, samples, seed, preferences_sig_hash, paid_draws)
-        """)
+        conn.execute(_BASELINE_INDEX)
         conn.execute("""
             CREATE TABLE IF NOT EXISTS distribution_estimates (
                 cache_key TEXT PRIMARY KEY,
@@ -114,18 +235,42 @@ class BaselineCacheDB:
     # ------------------------------------------------------------------
 
     def get_exact(self, cache_key: str) -> Optional[float]:
-        """精确查找：通过 cache_key 直接返回估计值。"""
-        conn = self._get_conn()
-        cursor = conn.execute(
-            "SELECT estimate FROM baseline_estimates WHERE cache_key = ?",
-            (cache_key,),
-        )
-        row = cursor.fetchone()
-        if row is not None:
-            self.cache_hits += 1
-            return float(row["estimate"])
-        self.cache_misses += 1
-        return None
+        """精确查找：先查前置 LRU，再通过 cache_key 查询 SQLite。"""
+        return self.get_exact_many([cache_key]).get(cache_key)
+
+    def get_exact_many(self, cache_keys: List[str]) -> Dict[str, float]:
+        """批量精确查找：前置 LRU 未命中的键按块发出 ``IN`` 查询，只返回命中的条目。"""
+        started = time.perf_counter()
+        found: Dict[str, float] = {}
+        pending: List[str] = []
+        unique_keys = dict.fromkeys(cache_keys)
+        for cache_key in unique_keys:
+            value = self._memory.get(cache_key)
+            if value is None:
+                pending.append(cache_key)
+            else:
+                found[cache_key] = value
+        memory_done = time.perf_counter()
+        if found:
+            self.telemetry.record("memory", memory_done - started, len(found))
+        if pending:
+            conn = self._get_conn()
+            db_found = 0
+            for start in range(0, len(pending), _IN_QUERY_CHUNK):
+                chunk = pending[start : start + _IN_QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(
+                    f"SELECT cache_key, estimate FROM baseline_estimates WHERE cache_key IN ({placeholders})",
+                    chunk,
+                ):
+                    value = float(row["estimate"])
+                    found[row["cache_key"]] = value
+                    self._memory.put(row["cache_key"], value)
+                    db_found += 1
+            self.telemetry.record("database", time.perf_counter() - memory_done, db_found)
+        self.cache_hits += len(found)
+        self.cache_misses += len(unique_keys) - len(found)
+        return found
 
     def get_interp_candidates(
         self,
@@ -195,35 +340,167 @@ class BaselineCacheDB:
             是否立即提交。批量写入时可设为 False 并通过 commit() 统一提交。
         """
         conn = self._get_conn()
-        conn.execute(
-            """INSERT OR REPLACE INTO baseline_estimates
-               (cache_key, config_name,
-                counters_total, counters_no_6star, counters_no_5star_plus,
-                counters_no_up, counters_guarantee_used, counters_urgent_used,
-                paid_draws, preferences_sig_hash, samples, seed,
-                estimate, source, version)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                cache_key,
-                config_name,
-                int(counters_signature[0]),
-                int(counters_signature[1]),
-                int(counters_signature[2]),
-                int(counters_signature[3]),
-                bool(counters_signature[4]),
-                bool(counters_signature[5]),
-                paid_draws,
-                preferences_sig_hash,
-                samples,
-                seed,
-                round(estimate, 6),
-                source,
-                version,
-            ),
+        row = self._baseline_row(
+            cache_key, config_name, counters_signature, paid_draws, preferences_sig_hash,
+            samples, seed, estimate, source, version,
+        )
+        conn.execute(_BASELINE_INSERT, row)
+        # 写穿：与库中保存的舍入值保持一致
+        self._memory.put(cache_key, row[12])
+        if commit:
+            conn.commit()
+
+    @staticmethod
+    def _baseline_row(
+        cache_key: str,
+        config_name: str,
+        counters_signature: Tuple[int, ...],
+        paid_draws: int,
+        preferences_sig_hash: str,
+        samples: int,
+        seed: int,
+        estimate: float,
+        source: str,
+        version: str,
+    ) -> Tuple[Any, ...]:
+        return (
+            cache_key,
+            config_name,
+            int(counters_signature[0]),
+            int(counters_signature[1]),
+            int(counters_signature[2]),
+            int(counters_signature[3]),
+            bool(counters_signature[4]),
+            bool(counters_signature[5]),
+            paid_draws,
+            preferences_sig_hash,
+            samples,
+            seed,
+            round(estimate, 6),
+            source,
+            version,
         )
+
+    def set_baselines_bulk(
+        self, entries: Iterable[Mapping[str, Any]], meta: Optional[Mapping[str, str]] = None
+    ) -> int:
+        """在单个事务内批量写入基线估计缓存。
+
+        Parameters
+        ----------
+        entries : Iterable[Mapping[str, Any]]
+            每项的键与 ``set_baseline`` 的参数同名（不含 ``commit``）
+        meta : Mapping[str, str], optional
+            与条目在同一事务内写入 ``cache_meta`` 的键值（如预计算的完成标记）
+
+        Returns
+        -------
+        int
+            写入的条目数
+        """
+        rows = [self._baseline_row(**entry) for entry in entries]
+        if not rows and not meta:
+            return 0
+        conn = self._get_conn()
+        with conn:
+            conn.executemany(_BASELINE_INSERT, rows)
+            if meta:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache_meta (key, value) VALUES (?, ?)", list(meta.items())
+                )
+        for row in rows:
+            self._memory.put(row[0], row[12])
+        return len(rows)
+
+    def anchor_coverage(
+        self,
+        config_name: str,
+        samples: int,
+        seed: int,
+        preferences_sig_hash: str,
+        version: str,
+        max_paid_draws: int,
+    ) -> Dict[Tuple[int, int, bool], int]:
+        """统计各网格锚点 (no_6star, no_up, guarantee_used) 已有的 ``1..max_paid_draws`` 抽数条目数。
+
+        只统计 total / no_5star_plus / urgent_used 为 0 的锚点行，用于判断预计算任务是否已完成。
+        """
+        cursor = self._get_conn().execute(
+            """SELECT counters_no_6star, counters_no_up, counters_guarantee_used,
+                      COUNT(DISTINCT paid_draws)
+               FROM baseline_estimates
+               WHERE config_name = ? AND samples = ? AND seed = ?
+                 AND preferences_sig_hash = ? AND version = ?
+                 AND counters_total = 0 AND counters_no_5star_plus = 0
+                 AND counters_urgent_used = 0
+                 AND paid_draws BETWEEN 1 AND ?
+               GROUP BY counters_no_6star, counters_no_up, counters_guarantee_used""",
+            (config_name, samples, seed, preferences_sig_hash, version, max_paid_draws),
+        )
+        return {(int(row[0]), int(row[1]), bool(row[2])): int(row[3]) for row in cursor}
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._get_conn().execute("SELECT value FROM cache_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def meta_items(self, prefix: str = "") -> Dict[str, str]:
+        """返回键以 ``prefix`` 开头的全部 ``cache_meta`` 条目。"""
+        cursor = self._get_conn().execute(
+            "SELECT key, value FROM cache_meta WHERE substr(key, 1, ?) = ? ORDER BY key", (len(prefix), prefix)
+        )
+        return {row[0]: row[1] for row in cursor}
+
+    def set_meta(self, key: str, value: str, commit: bool = True) -> None:
+        conn = self._get_conn()
+        conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES (?, ?)", (key, value))
         if commit:
             conn.commit()
 
+    def merge_from(self, other_path: str) -> int:
+        """把另一个缓存库（如分片预计算的产物）的全部条目合并进来，同键以对方为准。
+
+        Returns
+        -------
+        int
+            合并的基线估计条目数
+        """
+        conn = self._get_conn()
+        conn.commit()
+        conn.execute("ATTACH DATABASE ? AS merge_source", (str(other_path),))
+        try:
+            with conn:
+                merged = conn.execute("SELECT COUNT(*) FROM merge_source.baseline_estimates").fetchone()[0]
+                for table in ("baseline_estimates", "distribution_estimates", "cache_meta"):
+                    conn.execute(f"INSERT OR REPLACE INTO main.{table} SELECT * FROM merge_source.{table}")
+        finally:
+            conn.execute("DETACH DATABASE merge_source")
+        # 合并可能覆盖已缓存的键，前置 LRU 整体失效
+        self._memory.clear()
+        self._distribution_memory.clear()
+        return int(merged)
+
+    @contextmanager
+    def bulk_load(self) -> Iterator["BaselineCacheDB"]:
+        """批量导入会话：关闭同步、放大页缓存，并在会话结束后再重建插值索引。
+
+        会话内崩溃可能丢失尚未落盘的写入（库文件本身不会损坏），只适合可重跑的离线预计算。
+        """
+        conn = self._get_conn()
+        conn.commit()
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"PRAGMA cache_size={_BULK_CACHE_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("DROP INDEX IF EXISTS idx_baseline_interp")
+        try:
+            yield self
+        finally:
+            conn.commit()
+            conn.execute(_BASELINE_INDEX)
+            conn.commit()
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-2000")
+            conn.execute("PRAGMA temp_store=DEFAULT")
+
     # ------------------------------------------------------------------
     # 6 星分布（distribution_estimates）
     # ------------------------------------------------------------------
@@ -231,7 +508,13 @@ class BaselineCacheDB:
     def get_distribution_exact(
         self, cache_key: str
     ) -> Optional[Dict[str, Any]]:
-        """精确查找 6 星分布缓存。"""
+        """精确查找 6 星分布缓存（先查前置 LRU）。"""
+        started = time.perf_counter()
+        entry = self._distribution_memory.get(cache_key)
+        if entry is not None:
+            self.cache_hits += 1
+            self.telemetry.record("memory", time.perf_counter() - started)
+            return dict(entry)
         conn = self._get_conn()
         cursor = conn.execute(
             """SELECT expected_six_star_count, probabilities_json,
@@ -241,9 +524,13 @@ class BaselineCacheDB:
         )
         row = cursor.fetchone()
         if row is not None:
+            entry = dict(row)
+            self._distribution_memory.put(cache_key, entry)
             self.cache_hits += 1
-            return dict(row)
+            self.telemetry.record("database", time.perf_counter() - started)
+            return dict(entry)
         self.cache_misses += 1
+        self.telemetry.record("database", time.perf_counter() - started, 0)
         return None
 
     def set_distribution(
@@ -291,6 +578,17 @@ class BaselineCacheDB:
                 version,
             ),
         )
+        self._distribution_memory.put(
+            cache_key,
+            {
+                "expected_six_star_count": round(expected_six_star_count, 6),
+                "probabilities_json": json.dumps(probabilities, ensure_ascii=False),
+                "tail_probabilities_json": json.dumps(tail_probabilities, ensure_ascii=False),
+                "stderr": round(stderr, 8),
+                "samples": samples,
+                "seed": seed,
+            },
+        )
         if commit:
             conn.commit()
 
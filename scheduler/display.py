@@ -3,11 +3,10 @@
 
 from __future__ import annotations
 
-import statistics
 import time
 from hashlib import md5
 from pprint import pformat
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
 
 from rich import box
 from rich.columns import Columns
@@ -25,7 +24,8 @@ from rich.progress import (
 from rich.table import Table
 from rich.text import Text
 
-from scheduler.models import StrategyScoreReport, StrategyTrace
+from scheduler.models import StrategyScoreReport, StrategyTrace, TraceSummary
+from scheduler.stats import StreamingStats, TraceStatistics
 from scheduler.strategy_rules import StrategyRuleEngine, is_structured_strategy
 
 console = Console()
@@ -75,36 +75,19 @@ class SchedulerDisplay:
 
     @staticmethod
     def print_statistics(
-        traces: List[StrategyTrace],
+        traces: Sequence[StrategyTrace | TraceSummary] | TraceStatistics,
         elapsed_time: float,
         workers: int,
         report: StrategyScoreReport,
         schedule_count: int,
     ) -> None:
+        """打印单策略报告；``traces`` 可直接传入评分时已汇总好的 ``TraceStatistics``。"""
         del schedule_count
-        total = len(traces)
+        stats = traces if isinstance(traces, TraceStatistics) else TraceStatistics.collect(traces)
+        total = stats.count
         if total == 0:
             return
-
-        paid_draws = [trace.total_paid_draws for trace in traces]
-        bonus_draws = [trace.total_bonus_draws for trace in traces]
-        total_draws = [trace.total_draws for trace in traces]
-        resource_left = [trace.final_resource_left for trace in traces]
-        complete_count = sum(1 for trace in traces if trace.completed)
-        six_stars = [
-            sum(1 for stage in trace.stages for result in stage.results if result["star"] == 6)
-            for trace in traces
-        ]
-        current_ups = [
-            sum(
-                1
-                for stage in trace.stages
-                for result in stage.results
-                if result.get("is_current_up")
-            )
-            for trace in traces
-        ]
-        complete_rate = complete_count / total * 100.0
+        complete_rate = stats.complete_rate * 100.0
 
         console.print()
         summary_panel = Panel(
@@ -155,12 +138,12 @@ class SchedulerDisplay:
         stats_table.add_column("最大值", justify="right", ratio=2)
         stats_table.add_column("标准差", justify="right", ratio=2)
 
-        SchedulerDisplay._add_stat_row(stats_table, "总抽数", total_draws)
-        SchedulerDisplay._add_stat_row(stats_table, "付费抽数", paid_draws)
-        SchedulerDisplay._add_stat_row(stats_table, "赠送抽数", bonus_draws)
-        SchedulerDisplay._add_stat_row(stats_table, "6星数量", six_stars)
-        SchedulerDisplay._add_stat_row(stats_table, "当期UP数量", current_ups)
-        SchedulerDisplay._add_stat_row(stats_table, "剩余资源", resource_left)
+        SchedulerDisplay._add_stat_row(stats_table, "总抽数", stats.total_draws)
+        SchedulerDisplay._add_stat_row(stats_table, "付费抽数", stats.paid_draws)
+        SchedulerDisplay._add_stat_row(stats_table, "赠送抽数", stats.bonus_draws)
+        SchedulerDisplay._add_stat_row(stats_table, "6星数量", stats.six_stars)
+        SchedulerDisplay._add_stat_row(stats_table, "当期UP数量", stats.current_ups)
+        SchedulerDisplay._add_stat_row(stats_table, "剩余资源", stats.resource_left)
         console.print(stats_table)
         console.print()
 
@@ -230,19 +213,22 @@ class SchedulerDisplay:
 
         combined: List[Dict[str, Any]] = []
         for idx, strategy_data in enumerate(all_strategy_results):
-            traces = strategy_data["traces"]
             report = reports[idx]
-            avg_paid = sum(trace.total_paid_draws for trace in traces) / len(traces)
-            avg_bonus = sum(trace.total_bonus_draws for trace in traces) / len(traces)
-            avg_resource_left = sum(trace.final_resource_left for trace in traces) / len(traces)
+            paid = StreamingStats()
+            bonus = StreamingStats()
+            resource_left = StreamingStats()
+            for trace in strategy_data["traces"]:
+                paid.add(trace.total_paid_draws)
+                bonus.add(trace.total_bonus_draws)
+                resource_left.add(trace.final_resource_left)
 
             combined.append(
                 {
                     "strategy_id": strategy_data["strategy_id"],
                     "strategy_rules": strategy_data["strategy_rules"],
-                    "avg_paid": avg_paid,
-                    "avg_bonus": avg_bonus,
-                    "avg_resource_left": avg_resource_left,
+                    "avg_paid": paid.mean,
+                    "avg_bonus": bonus.mean,
+                    "avg_resource_left": resource_left.mean,
                     "elapsed_time": strategy_data["elapsed_time"],
                     "report": report,
                 }
@@ -358,13 +344,13 @@ class SchedulerDisplay:
         console.print(message, **kwargs)
 
     @staticmethod
-    def _add_stat_row(table: Table, name: str, values: List[int]) -> None:
+    def _add_stat_row(table: Table, name: str, values: StreamingStats) -> None:
         table.add_row(
             name,
-            f"{sum(values) / len(values):.2f}",
-            f"{min(values)}",
-            f"{max(values)}",
-            f"{statistics.stdev(values):.2f}" if len(values) > 1 else "N/A",
+            f"{values.mean:.2f}",
+            f"{values.minimum}",
+            f"{values.maximum}",
+            f"{values.stdev:.2f}" if values.count > 1 else "N/A",
         )
 
     @staticmethod
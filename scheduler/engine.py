@@ -7,23 +7,26 @@ import os
 import time
 from copy import deepcopy
 from dataclasses import dataclass
-from multiprocessing import Pool, cpu_count
-from typing import Any, Dict, List, Optional, Tuple
+from multiprocessing import cpu_count
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from gacha_core import Counters
 from scheduler.baseline import BaselineEstimator
 from scheduler.display import SchedulerDisplay
+from scheduler.executor import SimulationExecutor, SimulationPlan
 from scheduler.models import (
     Resource,
     ScoringPreferences,
     StrategyGoal,
     StrategyScoreReport,
     StrategyTrace,
+    TraceSummary,
     resource_to_standard_draws,
 )
 from scheduler.scoring import ScoringSystem
+from scheduler.stats import ScoreSamples, TraceStatistics
 from scheduler.strategy_protocol import StrategyProtocolAdapter
-from scheduler.workers import _worker_wrapper
+from scheduler.strategy_rules import StrategyRuleEngine
 
 
 @dataclass
@@ -71,6 +74,7 @@ class Scheduler:
         self.resource = Resource() if not resource else resource
         self.__schedules: Dict[str, BannerPlan] = {}
         self.__schedule_order: List[str] = []
+        self._executor: Optional[SimulationExecutor] = None
 
     @property
     def schedules(self) -> List[BannerPlan]:
@@ -207,27 +211,39 @@ class Scheduler:
                 f"[yellow]警告: 安排文件中有 {len(unplanned_pools)} 个卡池未被规划: {unplanned_pools}[/yellow]"
             )
 
-    def _build_tasks(
-        self, schedules_data: List[Dict[str, Any]], change: bool, scale: int
-    ) -> List[Tuple[Any, ...]]:
+    def _build_simulation_plan(self, change: bool) -> SimulationPlan:
+        self._validate_schedules()
         resource_data = {
             "chartered_permits": self.resource.chartered_permits,
             "oroberyl": self.resource.oroberyl,
             "arsenal_tickets": self.resource.arsenal_tickets,
             "origeometry": self.resource.origeometry,
         }
+        return SimulationPlan(
+            config_dir=self.config_dir,
+            arrangement=self.arrangement,
+            schedules=self._build_schedules_data(),
+            change=change,
+            init_resource=resource_data,
+        )
 
-        return [
-            (
-                self.config_dir,
-                self.arrangement,
-                schedules_data,
-                change,
-                index,
-                resource_data,
-            )
-            for index in range(scale)
-        ]
+    def _get_executor(self, workers: int) -> SimulationExecutor:
+        if self._executor is None or self._executor.workers != workers:
+            self.close()
+            self._executor = SimulationExecutor(workers)
+        return self._executor
+
+    def close(self) -> None:
+        """终止常驻模拟进程池。"""
+        if self._executor is not None:
+            self._executor.close()
+            self._executor = None
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def _simulate(
         self,
@@ -235,7 +251,10 @@ class Scheduler:
         change: bool,
         workers: Optional[int],
         show_progress: bool,
-    ) -> Tuple[List[StrategyTrace], float, int]:
+        summarize: bool = False,
+        plans: Optional[Sequence[SimulationPlan]] = None,
+        plan_index: int = 0,
+    ) -> Tuple[Sequence[StrategyTrace | TraceSummary], float, int]:
         if scale <= 0:
             raise ValueError("scale must be greater than 0")
         if workers is not None and workers < 0:
@@ -246,33 +265,27 @@ class Scheduler:
         if workers > cpu_count():
             workers = cpu_count()
 
-        self._validate_schedules()
-        schedules_data = self._build_schedules_data()
-        tasks = self._build_tasks(schedules_data, change, scale)
-        if not tasks:
-            return [], 0.0, workers
+        if plans is None:
+            plans = [self._build_simulation_plan(change)]
 
-        results: List[StrategyTrace] = []
+        # 计划只随进程池 initializer 下发一次；计划集合不变时进程池跨评估复用
+        executor = self._get_executor(workers)
+        executor.prepare(plans)
         start_time = time.time()
 
-        with Pool(processes=workers) as pool:
-            if show_progress:
-                with SchedulerDisplay.create_progress() as progress:
-                    task = progress.add_task("模拟进度", total=scale)
-                    batch_size = max(1, scale // 100)
-                    batch_results: List[StrategyTrace] = []
-                    for result in pool.imap(_worker_wrapper, tasks):
-                        batch_results.append(result)
-                        if len(batch_results) >= batch_size:
-                            results.extend(batch_results)
-                            progress.update(task, advance=len(batch_results))
-                            batch_results = []
-                    if batch_results:
-                        results.extend(batch_results)
-                        progress.update(task, advance=len(batch_results))
-            else:
-                SchedulerDisplay.print("[bold green]模拟已启动...[/bold green]")
-                results = pool.map(_worker_wrapper, tasks)
+        # summarize=True 时 worker 只回传 TraceSummary，不再跨进程传输逐抽记录
+        if show_progress:
+            with SchedulerDisplay.create_progress() as progress:
+                task = progress.add_task("模拟进度", total=scale)
+                results = executor.run(
+                    plan_index,
+                    scale,
+                    summarize=summarize,
+                    on_progress=lambda count: progress.update(task, advance=count),
+                )
+        else:
+            SchedulerDisplay.print("[bold green]模拟已启动...[/bold green]")
+            results = executor.run(plan_index, scale, summarize=summarize)
 
         return results, time.time() - start_time, workers
 
@@ -283,6 +296,7 @@ class Scheduler:
             config_dir=self.config_dir,
             samples=preferences.baseline_samples,
             base_seed=preferences.baseline_seed,
+            mode=preferences.baseline_mode,
         )
 
     def evaluate(
@@ -296,7 +310,16 @@ class Scheduler:
         preferences: Optional[ScoringPreferences | Dict[str, Any] | str] = None,
         goals: Optional[List[StrategyGoal] | List[Dict[str, Any]] | str] = None,
         return_traces: bool = False,
+        score_samples: Optional[ScoreSamples] = None,
+        plans: Optional[Sequence[SimulationPlan]] = None,
+        plan_index: int = 0,
     ) -> StrategyScoreReport:
+        """模拟并评分
+
+        传入 ``score_samples`` 时按种子顺序保存逐轨迹评分样本，供多策略配对比较。
+        依次评估多组计划时可传入完整的 ``plans`` 集合与本次的 ``plan_index``，
+        各次评估共用同一个进程池，计划只下发一次；此时 ``schedules`` 应与 ``plans[plan_index]`` 对应。
+        """
         del scoring_mode
         del weights
 
@@ -308,23 +331,31 @@ class Scheduler:
             change=change,
             workers=workers,
             show_progress=show_progress,
+            summarize=not return_traces,
+            plans=plans,
+            plan_index=plan_index,
         )
         if not traces:
             raise ValueError("无可用模拟结果")
 
         baseline_estimator = self._build_baseline_estimator(preferences)
+        # 评分与展示共用同一遍汇总
+        trace_statistics = TraceStatistics()
         report = ScoringSystem.score_traces(
             traces=traces,
             preferences=preferences,
             goals=goals,
             baseline_estimator=baseline_estimator,
             include_traces=return_traces,
+            trace_statistics=trace_statistics,
+            score_samples=score_samples,
         )
         baseline_estimator.flush_cache()
+        report.strategy_analysis = self.strategy_analysis()
 
         SchedulerDisplay.print_header(scale, workers, change, self.schedules)
         SchedulerDisplay.print_statistics(
-            traces,
+            trace_statistics,
             elapsed_time,
             workers,
             report,
@@ -342,7 +373,13 @@ class Scheduler:
         preferences: Optional[ScoringPreferences | Dict[str, Any] | str] = None,
         goals: Optional[List[StrategyGoal] | List[Dict[str, Any]] | str] = None,
         return_traces: bool = False,
+        paired: bool = True,
     ) -> List[StrategyScoreReport]:
+        """以相同种子区间模拟并评分多个策略，按 ``raw_score`` 排名
+
+        各策略的第 i 条轨迹使用同一组随机流（公共随机数）。``paired`` 为 True 时保留逐轨迹评分样本，
+        用配对 bootstrap 给出 ``score_delta_from_best_ci``。
+        """
         if not strategies:
             raise ValueError("strategies不能为空")
 
@@ -351,28 +388,46 @@ class Scheduler:
 
         payloads: List[Dict[str, Any]] = []
         reports: List[StrategyScoreReport] = []
+        samples: List[ScoreSamples] = []
 
-        for index, strategy_rules in enumerate(strategies, start=1):
-            strategy_scheduler = self._clone_for_strategy(
-                StrategyProtocolAdapter.from_payload(strategy_rules)
-            )
-            traces, elapsed_time, resolved_workers = strategy_scheduler._simulate(
+        strategy_schedulers = [
+            self._clone_for_strategy(StrategyProtocolAdapter.from_payload(strategy_rules))
+            for strategy_rules in strategies
+        ]
+        # 所有策略的计划一次性载入同一个进程池，避免每个策略重建进程池
+        plans = [
+            strategy_scheduler._build_simulation_plan(change)
+            for strategy_scheduler in strategy_schedulers
+        ]
+
+        for index, (strategy_rules, strategy_scheduler) in enumerate(
+            zip(strategies, strategy_schedulers), start=1
+        ):
+            traces, elapsed_time, resolved_workers = self._simulate(
                 scale=scale,
                 change=change,
                 workers=workers,
                 show_progress=show_progress,
+                summarize=not return_traces,
+                plans=plans,
+                plan_index=index - 1,
             )
             baseline_estimator = strategy_scheduler._build_baseline_estimator(
                 preferences
             )
+            score_samples = ScoreSamples() if paired else None
             report = ScoringSystem.score_traces(
                 traces=traces,
                 preferences=preferences,
                 goals=goals,
                 baseline_estimator=baseline_estimator,
                 include_traces=return_traces,
+                score_samples=score_samples,
             )
             baseline_estimator.flush_cache()
+            if score_samples is not None:
+                samples.append(score_samples)
+            report.strategy_analysis = strategy_scheduler.strategy_analysis()
             reports.append(report)
             payloads.append(
                 {
@@ -385,6 +440,8 @@ class Scheduler:
             )
 
         ScoringSystem.rank_reports(reports)
+        if paired:
+            ScoringSystem.attach_paired_intervals(reports, samples, preferences)
         SchedulerDisplay.print_multi_strategy_report(payloads, reports, "raw")
         return reports
 
@@ -416,6 +473,17 @@ class Scheduler:
         clone.schedules = cloned_schedules
         return clone
 
+    def strategy_analysis(self) -> List[Dict[str, Any]]:
+        """各阶段规则的静态分类（见 ``StrategyRuleEngine.classify``），静态规则的阶段模拟时不逐抽判断。"""
+        return [
+            {
+                "stage": idx,
+                "config_name": plan.name,
+                "classification": StrategyRuleEngine.classify(plan.rules),
+            }
+            for idx, plan in enumerate(self.schedules)
+        ]
+
     def initial_standard_draws(self) -> float:
         total = resource_to_standard_draws(self.resource)
         for plan in self.schedules:
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""模拟任务执行器：常驻进程池 + 按种子区间分块派发。"""
+
+from __future__ import annotations
+
+import pickle
+import weakref
+from math import ceil
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from scheduler.workers import _init_simulation_worker, _simulation_chunk_worker
+
+# 单个分块的种子数上限，保证进度条刷新粒度
+_MAX_CHUNK_SIZE = 256
+# 每个 worker 期望分到的分块数，用于负载均衡
+_CHUNKS_PER_WORKER = 8
+
+
+class SimulationPlan(NamedTuple):
+    """一组共享的模拟参数，只在 worker 初始化时传输一次。"""
+
+    config_dir: str
+    arrangement: List[str]
+    schedules: List[Dict[str, Any]]
+    change: bool
+    init_resource: Dict[str, int]
+
+
+class SimulationExecutor:
+    """持有常驻进程池的模拟执行器。
+
+    计划集合通过进程池 initializer 在每个 worker 中只反序列化一次，
+    任务只携带 ``(plan_index, seed_start, seed_stop, summarize)``。
+    计划集合不变时进程池跨多次评估复用；计划变化时重建进程池。
+    进程池在 :meth:`close`、执行器被回收或解释器退出时终止。
+
+    Parameters
+    ----------
+    workers : int
+        进程池大小。
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Any = None
+        self._plan_keys: Tuple[bytes, ...] = ()
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def prepare(self, plans: Sequence[SimulationPlan]) -> None:
+        """确保进程池已载入给定的计划集合。"""
+        plan_keys = tuple(pickle.dumps(plan) for plan in plans)
+        if self._pool is not None and plan_keys == self._plan_keys:
+            return
+        self.close()
+        self._pool = Pool(
+            processes=self.workers,
+            initializer=_init_simulation_worker,
+            initargs=(tuple(plans),),
+        )
+        self._plan_keys = plan_keys
+        # finalize 默认在解释器退出时执行，等价于注册 atexit
+        self._finalizer = weakref.finalize(self, self._pool.terminate)
+
+    def chunk_size(self, scale: int) -> int:
+        return max(1, min(_MAX_CHUNK_SIZE, ceil(scale / (self.workers * _CHUNKS_PER_WORKER))))
+
+    def run(
+        self,
+        plan_index: int,
+        scale: int,
+        summarize: bool = False,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> List[Any]:
+        """以种子 ``0..scale-1`` 运行第 ``plan_index`` 个计划，按种子顺序返回结果。
+
+        Parameters
+        ----------
+        plan_index : int
+            :meth:`prepare` 传入的计划下标。
+        scale : int
+            模拟次数。
+        summarize : bool
+            为 True 时 worker 只回传 ``TraceSummary``。
+        on_progress : callable, optional
+            每完成一个分块时以该分块的模拟次数调用。
+        """
+        if self._pool is None or not 0 <= plan_index < len(self._plan_keys):
+            raise ValueError(f"计划下标 {plan_index} 未载入进程池，请先调用 prepare")
+
+        chunk = self.chunk_size(scale)
+        tasks = [
+            (plan_index, start, min(start + chunk, scale), summarize)
+            for start in range(0, scale, chunk)
+        ]
+        results: List[Any] = []
+        for chunk_results in self._pool.imap(_simulation_chunk_worker, tasks):
+            results.extend(chunk_results)
+            if on_progress is not None:
+                on_progress(len(chunk_results))
+        return results
+
+    def close(self) -> None:
+        """终止进程池；之后再次 :meth:`prepare` 会重建。"""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._pool = None
+        self._plan_keys = ()
+        self._finalizer = None
+
+    def __enter__(self) -> "SimulationExecutor":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+__all__ = ["SimulationExecutor", "SimulationPlan"]
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""离线预计算网格上的基线价值张量：多线性插值与内存映射持久化。"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from .models import SCORING_VERSION
+
+# ---------------------------------------------------------------------------
+# 锚点状态网格（build/precompute_cache.py 按此网格生成缓存）
+# ---------------------------------------------------------------------------
+# 6 维计数器不可能全遍历，只采样最关键的维度：
+#   - no_6star（保底计数器，scale=15）: 均匀采样，软保底区间加密
+#   - no_up（UP 保底计数器，scale=30）: 均匀采样
+#   - guarantee_used（硬保底，scale=1）: 开关
+# 以下维度对 baseline 价值估计无影响，固定为 0/False：
+#   - total、no_5star_plus、urgent_used
+NO_6STAR_VALUES = (0, 10, 20, 30, 40, 50, 55, 60, 65, 70, 75, 80, 85, 90, 95, 100)
+NO_UP_VALUES = (0, 30, 60, 90, 120)
+GUARANTEE_VALUES = (False, True)
+
+# 张量文件格式版本，布局变化时递增
+LATTICE_FORMAT = 1
+
+
+class BaselineLattice:
+    """网格锚点上的基线价值张量
+
+    张量形状为 ``(no_6star, no_up, guarantee_used, paid_draws)``，缺失的格点为 NaN。
+    查询时在 no_6star 与 no_up 两个轴上做双线性插值、guarantee_used 精确匹配，
+    沿 paid_draws 轴线性插值；每个查询只读取 8 个格点，与缓存条目数无关。
+    total、no_5star_plus、urgent_used 与预计算网格一样视为无关维度。
+
+    Parameters
+    ----------
+    no_6star, no_up, paid_draws : np.ndarray
+        各轴升序的坐标
+    guarantee_used : np.ndarray
+        guarantee_used 轴的取值（0/1）
+    values : np.ndarray
+        对应形状的 float64 张量，可以是只读的内存映射
+    """
+
+    __slots__ = ("no_6star", "no_up", "guarantee_used", "paid_draws", "values")
+
+    def __init__(
+        self,
+        no_6star: np.ndarray,
+        no_up: np.ndarray,
+        guarantee_used: np.ndarray,
+        paid_draws: np.ndarray,
+        values: np.ndarray,
+    ):
+        expected = (len(no_6star), len(no_up), len(guarantee_used), len(paid_draws))
+        if values.shape != expected:
+            raise ValueError(f"张量形状 {values.shape} 与坐标轴 {expected} 不一致")
+        self.no_6star = np.asarray(no_6star, dtype=np.float64)
+        self.no_up = np.asarray(no_up, dtype=np.float64)
+        self.guarantee_used = np.asarray(guarantee_used, dtype=np.float64)
+        self.paid_draws = np.asarray(paid_draws, dtype=np.float64)
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, data: np.ndarray) -> Optional["BaselineLattice"]:
+        """从 ``BaselineEstimator`` 的 (N, 8) 缓存数组中挑出网格锚点行组装张量。
+
+        只采用 total / no_5star_plus / urgent_used 为 0 且 no_6star / no_up 落在网格上的行；
+        没有这样的行时返回 None。
+        """
+        # 列顺序：paid_draws, estimate, total, no_6star, no_5star_plus, no_up, guarantee_used, urgent_used
+        on_grid = (
+            (data[:, 2] == 0)
+            & (data[:, 4] == 0)
+            & (data[:, 7] == 0)
+            & np.isin(data[:, 3], NO_6STAR_VALUES)
+            & np.isin(data[:, 5], NO_UP_VALUES)
+        )
+        rows = data[on_grid]
+        if not len(rows):
+            return None
+        no_6star, i = np.unique(rows[:, 3], return_inverse=True)
+        no_up, j = np.unique(rows[:, 5], return_inverse=True)
+        guarantee_used, k = np.unique(rows[:, 6], return_inverse=True)
+        paid_draws, p = np.unique(rows[:, 0], return_inverse=True)
+        values = np.full((len(no_6star), len(no_up), len(guarantee_used), len(paid_draws)), np.nan)
+        values[i.ravel(), j.ravel(), k.ravel(), p.ravel()] = rows[:, 1]
+        return cls(no_6star, no_up, guarantee_used, paid_draws, values)
+
+    @staticmethod
+    def _axis_weights(axis: np.ndarray, x: np.ndarray):
+        """返回下格点下标、上格点权重与是否落在轴范围内。单点轴只接受恰好相等的坐标。"""
+        if len(axis) == 1:
+            return np.zeros(len(x), dtype=np.intp), np.zeros(len(x)), x == axis[0]
+        lower = np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2)
+        weight = (x - axis[lower]) / (axis[lower + 1] - axis[lower])
+        return lower, weight, (x >= axis[0]) & (x <= axis[-1])
+
+    def query(
+        self,
+        no_6star: Sequence[float],
+        no_up: Sequence[float],
+        guarantee_used: Sequence[float],
+        paid_draws: Sequence[float],
+    ) -> np.ndarray:
+        """批量插值，超出网格范围或用到缺失格点的位置为 NaN。"""
+        x6 = np.asarray(no_6star, dtype=np.float64)
+        xu = np.asarray(no_up, dtype=np.float64)
+        xg = np.asarray(guarantee_used, dtype=np.float64)
+        xp = np.asarray(paid_draws, dtype=np.float64)
+        i, wi, in_i = self._axis_weights(self.no_6star, x6)
+        j, wj, in_j = self._axis_weights(self.no_up, xu)
+        p, wp, in_p = self._axis_weights(self.paid_draws, xp)
+        k = np.searchsorted(self.guarantee_used, xg).clip(0, len(self.guarantee_used) - 1)
+        valid = in_i & in_j & in_p & (self.guarantee_used[k] == xg)
+
+        result = np.zeros(len(x6))
+        for di, fi in ((0, 1.0 - wi), (1, wi)):
+            for dj, fj in ((0, 1.0 - wj), (1, wj)):
+                for dp, fp in ((0, 1.0 - wp), (1, wp)):
+                    weight = fi * fj * fp
+                    # 单点轴或恰好落在格点上时上格点权重为 0，不读取（可能越界或缺失的）上格点
+                    used = weight > 0
+                    ii = np.minimum(i + di, len(self.no_6star) - 1)
+                    jj = np.minimum(j + dj, len(self.no_up) - 1)
+                    pp = np.minimum(p + dp, len(self.paid_draws) - 1)
+                    corner = self.values[ii, jj, k, pp]
+                    result += np.where(used, weight * corner, 0.0)
+                    valid &= ~(used & np.isnan(corner))
+        result[~valid] = np.nan
+        return result
+
+    # ------------------------------------------------------------------
+    # 持久化：张量存为 .npy（可内存映射），坐标轴存在同名 .json 中
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def path_for(cache_path: str, config_name: str, samples: int, seed: int, pref_hash: str) -> str:
+        """张量文件路径：与 SQLite 数据库同目录的 ``<库名>.lattice/`` 下，每组参数一个文件。"""
+        root = os.path.splitext(cache_path)[0] + ".lattice"
+        return os.path.join(root, f"{config_name}-{samples}-{seed}-{pref_hash[:16]}.npy")
+
+    def save(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """写出张量与坐标轴；``metadata`` 未给出 ``version`` 时记为当前 ``SCORING_VERSION``。"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = dict(metadata or {})
+        meta.setdefault("version", SCORING_VERSION)
+        meta.update(
+            {
+                "format": LATTICE_FORMAT,
+                "no_6star": self.no_6star.tolist(),
+                "no_up": self.no_up.tolist(),
+                "guarantee_used": self.guarantee_used.tolist(),
+                "paid_draws": self.paid_draws.tolist(),
+            }
+        )
+        # 先写临时文件再替换，避免读取方映射到写了一半的张量
+        np.save(path + ".tmp.npy", np.ascontiguousarray(self.values, dtype=np.float64))
+        os.replace(path + ".tmp.npy", path)
+        with open(os.path.splitext(path)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BaselineLattice"]:
+        """以只读内存映射加载张量
+
+        文件不存在、格式不符、评分版本不是当前 ``SCORING_VERSION``（旧预计算的张量）
+        或与坐标轴不一致时返回 None，由调用方回退到缓存行。
+        """
+        meta_path = os.path.splitext(path)[0] + ".json"
+        if not (os.path.exists(path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != LATTICE_FORMAT or meta.get("version") != SCORING_VERSION:
+                return None
+            values = np.load(path, mmap_mode="r")
+            return cls(meta["no_6star"], meta["no_up"], meta["guarantee_used"], meta["paid_draws"], values)
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+__all__ = ["BaselineLattice", "GUARANTEE_VALUES", "NO_6STAR_VALUES", "NO_UP_VALUES"]
@@ -3,13 +3,16 @@
 
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass, field, fields
 from math import log
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from gacha_core import Counters
 
-SCORING_VERSION = "2.4.0"
+SCORING_VERSION = "2.5.0"
 SCORING_CACHE_VERSION = "score-cache-v1"
 
 
@@ -59,6 +62,168 @@ class StrategyGoal:
         )
 
 
+# ResultColumns 标志位
+FLAG_UP_G = 1
+FLAG_6_G = 2
+FLAG_5_G = 4
+FLAG_CURRENT_UP = 8
+FLAG_PAST_UP = 16
+_FLAG_KEYS: Tuple[Tuple[str, int], ...] = (
+    ("is_up_g", FLAG_UP_G),
+    ("is_6_g", FLAG_6_G),
+    ("is_5_g", FLAG_5_G),
+    ("is_current_up", FLAG_CURRENT_UP),
+    ("is_past_up", FLAG_PAST_UP),
+)
+
+
+class ResultColumns:
+    """列式存储的阶段抽卡记录。
+
+    星级、名称索引、标志位与配额分别保存在紧凑的 ``array`` 中，名称以
+    按配置驻留的名称表存储一次。按下标访问或迭代时返回字典视图，兼容原有的
+    ``List[Dict]`` 用法；统计类查询直接在数组上归约。
+
+    每条记录的键：
+
+    - ``name`` / ``star`` / ``quota``：名称、星级与配额
+    - ``is_up_g`` / ``is_6_g`` / ``is_5_g``：是否由 UP / 6 星 / 5 星保底触发
+    - ``is_current_up`` / ``is_past_up``：名称是否在当期 / 历史 UP 名单中
+    - ``config_name``：所属卡池配置
+    """
+
+    def __init__(
+        self,
+        config_name: str,
+        names: Sequence[str] = (),
+        current_up_names: Collection[str] = (),
+        past_up_names: Collection[str] = (),
+    ):
+        self.config_name = config_name
+        self.names: List[str] = list(names)
+        self.star = array("b")
+        self.name_id = array("H")
+        self.flags = array("B")
+        self.quota = array("H")
+        self._current_up_names = frozenset(current_up_names)
+        self._past_up_names = frozenset(past_up_names)
+        self._name_ids = {name: index for index, name in enumerate(self.names)}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        # 名称索引可由名称表重建；UP 名单只用于写入标志位，均不随 pickle 传输
+        for key in ("_name_ids", "_current_up_names", "_past_up_names"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._current_up_names = frozenset()
+        self._past_up_names = frozenset()
+        self._name_ids = {name: index for index, name in enumerate(self.names)}
+
+    def _intern(self, name: str) -> int:
+        index = self._name_ids.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self._name_ids[name] = index
+        return index
+
+    def append_result(self, result: Any) -> None:
+        """追加一条 ``GachaResult``。"""
+        flags = (
+            FLAG_UP_G * bool(result.is_up_g)
+            | FLAG_6_G * bool(result.is_6_g)
+            | FLAG_5_G * bool(result.is_5_g)
+            | FLAG_CURRENT_UP * (result.name in self._current_up_names)
+            | FLAG_PAST_UP * (result.name in self._past_up_names)
+        )
+        self.star.append(result.star)
+        self.name_id.append(self._intern(result.name))
+        self.flags.append(flags)
+        self.quota.append(result.quota)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """追加一条字典记录（兼容 ``List[Dict]`` 接口）。"""
+        flags = 0
+        for key, bit in _FLAG_KEYS:
+            if record.get(key):
+                flags |= bit
+        self.star.append(int(record.get("star", 0)))
+        self.name_id.append(self._intern(record.get("name", "")))
+        self.flags.append(flags)
+        self.quota.append(int(record.get("quota", 0)))
+
+    def _record(self, index: int) -> Dict[str, Any]:
+        flags = self.flags[index]
+        record: Dict[str, Any] = {
+            "name": self.names[self.name_id[index]],
+            "star": self.star[index],
+            "quota": self.quota[index],
+        }
+        for key, bit in _FLAG_KEYS:
+            record[key] = bool(flags & bit)
+        record["config_name"] = self.config_name
+        return record
+
+    def __len__(self) -> int:
+        return len(self.star)
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return [self._record(item) for item in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ResultColumns index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self._record(index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ResultColumns, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def stars(self) -> np.ndarray:
+        return np.frombuffer(self.star, dtype=np.int8) if len(self) else np.zeros(0, dtype=np.int8)
+
+    def flag_mask(self, bit: int) -> np.ndarray:
+        if not len(self):
+            return np.zeros(0, dtype=bool)
+        return (np.frombuffer(self.flags, dtype=np.uint8) & bit) != 0
+
+    def count_star(self, star: int) -> int:
+        return int(np.count_nonzero(self.stars() == star))
+
+    def count_flag(self, bit: int) -> int:
+        return int(np.count_nonzero(self.flag_mask(bit)))
+
+    def name_counts(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """按名称计数（可选掩码），只返回出现过的名称。"""
+        if not len(self):
+            return {}
+        ids = np.frombuffer(self.name_id, dtype=np.uint16)
+        if mask is not None:
+            ids = ids[mask]
+        counts = np.bincount(ids, minlength=len(self.names))
+        return {self.names[index]: int(counts[index]) for index in np.flatnonzero(counts)}
+
+    def mark_past_up(self, past_up_names: Collection[str]) -> None:
+        """按名称集合重写 is_past_up 标志（仅非当期 UP 的 6 星）。"""
+        if not len(self):
+            return
+        name_mask = np.array([name in past_up_names for name in self.names], dtype=bool)
+        ids = np.frombuffer(self.name_id, dtype=np.uint16)
+        flags = np.frombuffer(self.flags, dtype=np.uint8)
+        past = name_mask[ids] & (self.stars() == 6) & ((flags & FLAG_CURRENT_UP) == 0)
+        updated = np.where(past, flags | FLAG_PAST_UP, flags & ~np.uint8(FLAG_PAST_UP))
+        self.flags = array("B", updated.astype(np.uint8).tobytes())
+
+
 @dataclass
 class StageTrace:
     """单阶段模拟轨迹。"""
@@ -69,12 +234,24 @@ class StageTrace:
     paid_draws: int
     bonus_draws: int
     resource_left: int
-    results: List[Dict[str, Any]] = field(default_factory=list)
+    results: List[Dict[str, Any]] | ResultColumns = field(default_factory=list)
 
     @property
     def total_draws(self) -> int:
         return self.paid_draws + self.bonus_draws
 
+    @property
+    def six_star_count(self) -> int:
+        if isinstance(self.results, ResultColumns):
+            return self.results.count_star(6)
+        return sum(1 for result in self.results if int(result.get("star", 0)) == 6)
+
+    @property
+    def current_up_count(self) -> int:
+        if isinstance(self.results, ResultColumns):
+            return self.results.count_flag(FLAG_CURRENT_UP)
+        return sum(1 for result in self.results if result.get("is_current_up"))
+
 
 @dataclass
 class StrategyTrace:
@@ -91,6 +268,123 @@ class StrategyTrace:
     def total_draws(self) -> int:
         return self.total_paid_draws + self.total_bonus_draws
 
+    @property
+    def six_star_count(self) -> int:
+        return sum(stage.six_star_count for stage in self.stages)
+
+    @property
+    def current_up_count(self) -> int:
+        return sum(stage.current_up_count for stage in self.stages)
+
+
+@dataclass
+class StageSummary:
+    """单阶段紧凑摘要：只保留计数，不保留逐抽记录。"""
+
+    config_name: str
+    start_counters: Counters
+    end_counters: Counters
+    paid_draws: int
+    bonus_draws: int
+    resource_left: int
+    five_star_count: int = 0
+    four_star_count: int = 0
+    # 6 星按是否当期 UP 分开计数，历史 UP 标记在评分时按偏好解析
+    current_up_names: Dict[str, int] = field(default_factory=dict)
+    six_star_names: Dict[str, int] = field(default_factory=dict)
+    other_names: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_stage(cls, stage: StageTrace) -> "StageSummary":
+        summary = cls(
+            config_name=stage.config_name,
+            start_counters=stage.start_counters,
+            end_counters=stage.end_counters,
+            paid_draws=stage.paid_draws,
+            bonus_draws=stage.bonus_draws,
+            resource_left=stage.resource_left,
+        )
+        results = stage.results
+        if isinstance(results, ResultColumns):
+            stars = results.stars()
+            current_up = results.flag_mask(FLAG_CURRENT_UP)
+            summary.five_star_count = int(np.count_nonzero(stars == 5))
+            summary.four_star_count = int(np.count_nonzero(stars == 4))
+            summary.current_up_names = results.name_counts((stars == 6) & current_up)
+            summary.six_star_names = results.name_counts((stars == 6) & ~current_up)
+            summary.other_names = results.name_counts(stars != 6)
+            return summary
+        for result in results:
+            summary.add_result(result)
+        return summary
+
+    def add_result(self, result: Dict[str, Any]) -> None:
+        star = int(result.get("star", 0))
+        name = result.get("name", "")
+        if star == 6:
+            names = self.current_up_names if result.get("is_current_up") else self.six_star_names
+        else:
+            if star == 5:
+                self.five_star_count += 1
+            elif star == 4:
+                self.four_star_count += 1
+            names = self.other_names
+        names[name] = names.get(name, 0) + 1
+
+    def name_count(self, name: str) -> int:
+        return (
+            self.current_up_names.get(name, 0)
+            + self.six_star_names.get(name, 0)
+            + self.other_names.get(name, 0)
+        )
+
+    @property
+    def total_draws(self) -> int:
+        return self.paid_draws + self.bonus_draws
+
+    @property
+    def six_star_count(self) -> int:
+        return sum(self.current_up_names.values()) + sum(self.six_star_names.values())
+
+    @property
+    def current_up_count(self) -> int:
+        return sum(self.current_up_names.values())
+
+
+@dataclass
+class TraceSummary:
+    """单次策略轨迹的紧凑摘要，字段与 ``StrategyTrace`` 对齐。"""
+
+    completed: bool
+    total_paid_draws: int
+    total_bonus_draws: int
+    final_resource_left: int
+    stages: List[StageSummary] = field(default_factory=list)
+    failure_reason: Optional[str] = None
+
+    @classmethod
+    def from_trace(cls, trace: StrategyTrace) -> "TraceSummary":
+        return cls(
+            completed=trace.completed,
+            total_paid_draws=trace.total_paid_draws,
+            total_bonus_draws=trace.total_bonus_draws,
+            final_resource_left=trace.final_resource_left,
+            stages=[StageSummary.from_stage(stage) for stage in trace.stages],
+            failure_reason=trace.failure_reason,
+        )
+
+    @property
+    def total_draws(self) -> int:
+        return self.total_paid_draws + self.total_bonus_draws
+
+    @property
+    def six_star_count(self) -> int:
+        return sum(stage.six_star_count for stage in self.stages)
+
+    @property
+    def current_up_count(self) -> int:
+        return sum(stage.current_up_count for stage in self.stages)
+
 
 @dataclass(frozen=True)
 class ScoringPreferences:
@@ -119,6 +413,7 @@ class ScoringPreferences:
     future_resource_income: int = 0
     baseline_samples: int = 64
     baseline_seed: int = 20260525
+    baseline_mode: str = "simulation"
     preset_name: str = "balanced"
     past_up_character_names: Tuple[str, ...] = ()
     owned_character_potentials: Dict[str, int] = field(default_factory=dict)
@@ -213,6 +508,7 @@ class ScoringPreferences:
             f"questionnaire_cr:{self.questionnaire_consistency_ratio}",
             f"baseline_samples:{self.baseline_samples}",
             f"baseline_seed:{self.baseline_seed}",
+            f"baseline_mode:{self.baseline_mode}",
             f"questionnaire:{self.questionnaire_status}",
             f"future_value:{self.future_value_policy}",
             f"future_value_discount:{self.future_value_discount}",
@@ -253,6 +549,7 @@ class SixStarDistributionEstimate:
     samples: int
     seed: int
     cache_hit: bool
+    method: str = "simulation"
 
 
 @dataclass
@@ -289,6 +586,13 @@ class StrategyScoreReport:
     score_delta_from_baseline: Optional[float] = None
     goal_delta_from_baseline: Optional[float] = None
     opportunity_delta_from_baseline: Optional[float] = None
+    # 配对 bootstrap 给出的分数差置信区间 [下界, 上界]（见 ScoringSystem.attach_paired_intervals）
+    score_delta_from_best_ci: Optional[List[float]] = None
+    score_delta_from_baseline_ci: Optional[List[float]] = None
+    # 各阶段规则的静态分类（见 Scheduler.strategy_analysis）
+    strategy_analysis: Optional[List[Dict[str, Any]]] = None
+    # 基线缓存各层级的命中次数与耗时（见 BaselineEstimator.cache_stats）
+    cache_stats: Optional[Dict[str, Any]] = None
     traces: Optional[List[StrategyTrace]] = None
 
 
@@ -359,39 +663,107 @@ def _calculate_six_star_incremental_value(
     return base_value * max(after - before, 0.0)
 
 
+class ValueAccumulator:
+    """抽卡结果价值的增量累加器
+
+    逐抽折叠结果，维护 4/5 星的累计价值与每个 6 星名称的份数、基础价值及其潜能增量价值。
+    每抽只重算该名称的一项潜能增量（O(1)），``value`` 随时给出截至当前的总价值，
+    与对同一结果序列调用 ``calculate_results_value`` 逐位一致，因此可以在抽卡过程中
+    直接读出逐抽价值曲线。
+
+    Parameters
+    ----------
+    preferences : ScoringPreferences
+        价值偏好（份数价值、潜能倍率、已有潜能）
+
+    Examples
+    --------
+    >>> accumulator = ValueAccumulator(ScoringPreferences())
+    >>> accumulator.add_draw("A", 6, is_current_up=True)
+    >>> accumulator.add_draw("B", 4)
+    >>> accumulator.value == calculate_results_value(
+    ...     [{"name": "A", "star": 6, "is_current_up": True}, {"name": "B", "star": 4}], ScoringPreferences()
+    ... )
+    True
+    """
+
+    __slots__ = ("preferences", "_flat_value", "_copies", "_base_values", "_six_values")
+
+    def __init__(self, preferences: ScoringPreferences):
+        self.preferences = preferences
+        self._flat_value = 0.0
+        self._copies: Dict[str, int] = {}
+        self._base_values: Dict[str, float] = {}
+        # 各 6 星名称当前的潜能增量价值，按首次出现顺序排列
+        self._six_values: Dict[str, float] = {}
+
+    def add_copies(self, name: str, count: int, base_value: float) -> None:
+        """折叠同一 6 星名称的 ``count`` 份，基础价值取已见过的最大值。"""
+        copies = self._copies.get(name, 0) + count
+        base_value = max(self._base_values.get(name, base_value), base_value)
+        self._copies[name] = copies
+        self._base_values[name] = base_value
+        self._six_values[name] = _calculate_six_star_incremental_value(
+            name=name, count=copies, base_value=base_value, preferences=self.preferences
+        )
+
+    def add_draw(self, name: str, star: int, is_current_up: bool = False, is_past_up: bool = False) -> None:
+        preferences = self.preferences
+        if star == 6:
+            if is_current_up:
+                base_value = preferences.current_up_value
+            elif is_past_up:
+                base_value = preferences.past_up_value
+            else:
+                base_value = preferences.normal_six_value
+            self.add_copies(name, 1, base_value)
+        elif star == 5:
+            self._flat_value += preferences.five_star_value
+        elif star == 4:
+            self._flat_value += preferences.four_star_value
+
+    def add_star_counts(self, five_star_count: int, four_star_count: int) -> None:
+        """一次折叠若干 5 星与 4 星（摘要只记录各星级数量时使用）。"""
+        self._flat_value += five_star_count * self.preferences.five_star_value
+        self._flat_value += four_star_count * self.preferences.four_star_value
+
+    def add_result(self, result: Dict[str, Any]) -> None:
+        """折叠一条结果字典（``name`` / ``star`` / ``is_current_up`` / ``is_past_up``）。"""
+        star = int(result.get("star", 0))
+        if star == 6:
+            self.add_copies(result.get("name", ""), 1, _resolve_six_star_value(result, self.preferences))
+        else:
+            self.add_draw("", star)
+
+    @property
+    def value(self) -> float:
+        total_value = self._flat_value
+        # 6 星名称通常只有个位数，逐项相加保持与一次性计算相同的求和顺序
+        for six_value in self._six_values.values():
+            total_value += six_value
+        return round(total_value, 4)
+
+
 def calculate_results_value(
     results: Iterable[Dict[str, Any]], preferences: ScoringPreferences
 ) -> float:
     """Calculate total value of gacha results given preferences (potentials, valuation)."""
-    six_star_copies: Dict[str, Dict[str, float]] = {}
-    total_value = 0.0
-
+    accumulator = ValueAccumulator(preferences)
     for result in results:
-        star = int(result.get("star", 0))
-        if star == 6:
-            name = result.get("name", "")
-            base_value = _resolve_six_star_value(result, preferences)
-            six_star_entry = six_star_copies.setdefault(
-                name, {"count": 0, "base_value": base_value}
-            )
-            six_star_entry["count"] += 1
-            six_star_entry["base_value"] = max(
-                six_star_entry["base_value"], base_value
-            )
-        elif star == 5:
-            total_value += preferences.five_star_value
-        elif star == 4:
-            total_value += preferences.four_star_value
-
-    for name, entry in six_star_copies.items():
-        total_value += _calculate_six_star_incremental_value(
-            name=name,
-            count=int(entry["count"]),
-            base_value=float(entry["base_value"]),
-            preferences=preferences,
-        )
+        accumulator.add_result(result)
+    return accumulator.value
 
-    return round(total_value, 4)
+
+def calculate_results_value_curve(
+    results: Iterable[Dict[str, Any]], preferences: ScoringPreferences
+) -> List[float]:
+    """逐抽累计价值曲线：第 i 项等于前 i + 1 条结果的 ``calculate_results_value``。"""
+    accumulator = ValueAccumulator(preferences)
+    curve: List[float] = []
+    for result in results:
+        accumulator.add_result(result)
+        curve.append(accumulator.value)
+    return curve
 
 
 def _flatten_results(trace: StrategyTrace) -> List[Dict[str, Any]]:
@@ -408,6 +780,30 @@ def calculate_trace_utility(
     return calculate_results_value(_flatten_results(trace), preferences)
 
 
+def calculate_summary_utility(
+    summary: TraceSummary,
+    preferences: ScoringPreferences,
+    past_up_names: Sequence[Collection[str]],
+) -> float:
+    """与 ``calculate_trace_utility`` 等价的摘要版本。
+
+    ``past_up_names[i]`` 为第 i 阶段视为历史 UP 的名称集合。
+    """
+    accumulator = ValueAccumulator(preferences)
+    for stage, stage_past_up_names in zip(summary.stages, past_up_names):
+        accumulator.add_star_counts(stage.five_star_count, stage.four_star_count)
+        for name, count in stage.current_up_names.items():
+            accumulator.add_copies(name, count, preferences.current_up_value)
+        for name, count in stage.six_star_names.items():
+            base_value = (
+                preferences.past_up_value
+                if name in stage_past_up_names
+                else preferences.normal_six_value
+            )
+            accumulator.add_copies(name, count, base_value)
+    return accumulator.value
+
+
 def resource_to_standard_draws(resource: Resource | Dict[str, int]) -> int:
     """把资源折算为标准角色池抽数。"""
 
@@ -421,17 +817,28 @@ def resource_to_standard_draws(resource: Resource | Dict[str, int]) -> int:
 
 
 __all__ = [
+    "FLAG_5_G",
+    "FLAG_6_G",
+    "FLAG_CURRENT_UP",
+    "FLAG_PAST_UP",
+    "FLAG_UP_G",
     "LogMapConfig",
     "Resource",
+    "ResultColumns",
     "SCORING_CACHE_VERSION",
     "SCORING_VERSION",
     "ScoringPreferences",
     "SixStarDistributionEstimate",
+    "StageSummary",
     "StageTrace",
     "StrategyGoal",
     "StrategyScoreReport",
     "StrategyTrace",
+    "TraceSummary",
+    "ValueAccumulator",
     "calculate_results_value",
+    "calculate_results_value_curve",
+    "calculate_summary_utility",
     "calculate_trace_utility",
     "log_map",
     "mixed_utility_score",
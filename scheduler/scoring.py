@@ -6,22 +6,33 @@ from __future__ import annotations
 import json
 import os
 from math import ceil
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from gacha_core import GlobalConfigLoader
 
-from .baseline import BaselineEstimator
+from .baseline import BaselineEstimator, BaselineQuery
 from .models import (
     SCORING_CACHE_VERSION,
     SCORING_VERSION,
+    ResultColumns,
     ScoringPreferences,
     StrategyGoal,
     StrategyScoreReport,
     StrategyTrace,
-    _flatten_results,
-    calculate_trace_utility,
+    TraceSummary,
+    calculate_summary_utility,
     log_map,
 )
+from .stats import ScoreSamples, StreamingStats, TraceStatistics
+
+# 每次批量基准查询覆盖的轨迹数，限制同时驻留的摘要数量
+_SCORING_BLOCK = 4096
+# 配对 bootstrap 的默认重抽样次数与置信水平；每块重抽样的计数矩阵为 (块大小, 轨迹数)
+PAIRED_RESAMPLES = 1000
+PAIRED_CONFIDENCE = 0.95
+_BOOTSTRAP_BLOCK = 64
 
 
 class ScoringSystem:
@@ -82,12 +93,21 @@ class ScoringSystem:
 
     @staticmethod
     def score_traces(
-        traces: List[StrategyTrace],
+        traces: Sequence[StrategyTrace | TraceSummary],
         preferences: Optional[ScoringPreferences] = None,
         goals: Optional[List[StrategyGoal]] = None,
         baseline_estimator: Optional[BaselineEstimator] = None,
         include_traces: bool = False,
+        trace_statistics: Optional[TraceStatistics] = None,
+        score_samples: Optional[ScoreSamples] = None,
     ) -> StrategyScoreReport:
+        """评分入口，完整轨迹与紧凑摘要可混合传入，逐条折叠进累加量。
+
+        所有指标在一遍中折叠进 ``StreamingStats``，低尾风险由大小为
+        ``ceil(N * tail_ratio)`` 的有界堆精确给出，无需保留并排序全部质量分。
+        传入 ``trace_statistics`` 时在同一遍中顺带填充展示用的轨迹统计，
+        传入 ``score_samples`` 时按轨迹顺序保存逐条评分样本（供配对 bootstrap 使用）。
+        """
         if not traces:
             raise ValueError("traces不能为空")
 
@@ -99,30 +119,108 @@ class ScoringSystem:
         baseline_estimator = baseline_estimator or BaselineEstimator(
             samples=preferences.baseline_samples,
             base_seed=preferences.baseline_seed,
+            mode=preferences.baseline_mode,
         )
-        ScoringSystem._annotate_past_up_flags(traces, preferences, baseline_estimator.config_dir)
-
-        scored_samples = [
-            ScoringSystem._score_single_trace(
-                trace=trace,
-                preferences=preferences,
-                goals=goals,
-                baseline_estimator=baseline_estimator,
+        full_traces = [trace for trace in traces if isinstance(trace, StrategyTrace)]
+        ScoringSystem._annotate_past_up_flags(full_traces, preferences, baseline_estimator.config_dir)
+        past_up_resolver = ScoringSystem._past_up_resolver(preferences, baseline_estimator.config_dir)
+
+        total = len(traces)
+        goal_met_count = 0
+        utility = StreamingStats()
+        baseline = StreamingStats()
+        opportunity = StreamingStats()
+        quality = StreamingStats(tail_size=max(1, ceil(total * preferences.tail_ratio)))
+        for block_start in range(0, total, _SCORING_BLOCK):
+            block = traces[block_start : block_start + _SCORING_BLOCK]
+            summaries = [
+                trace if isinstance(trace, TraceSummary) else TraceSummary.from_trace(trace) for trace in block
+            ]
+            # 整块轨迹的基准查询一次提交，重复的 (配置, 计数器, 抽数) 只解析一次
+            estimates = iter(
+                baseline_estimator.estimate_many(
+                    ScoringSystem._baseline_queries(summaries, preferences), preferences
+                )
             )
-            for trace in traces
+            for trace, summary in zip(block, summaries):
+                stage_baseline = sum(next(estimates) for _ in summary.stages)
+                future_value = next(estimates) if summary.stages else 0.0
+                sample = ScoringSystem._score_single_trace(
+                    trace=summary,
+                    preferences=preferences,
+                    goals=goals,
+                    baseline=stage_baseline,
+                    future_value=future_value,
+                    past_up_resolver=past_up_resolver,
+                )
+                goal_met_count += sample["goal_met"]
+                utility.add(sample["utility"])
+                baseline.add(sample["baseline"])
+                opportunity.add(sample["opportunity"])
+                quality.add(sample["quality"])
+                if score_samples is not None:
+                    score_samples.add(sample)
+                if trace_statistics is not None:
+                    trace_statistics.add_counts(trace, summary.six_star_count, summary.current_up_count)
+
+        goal_completion_rate = goal_met_count / total
+        mean_utility = utility.mean
+        mean_baseline = baseline.mean
+        mean_opportunity = opportunity.mean
+        tail_risk_mean = quality.tail_mean()
+        scores = ScoringSystem._compose_scores(
+            goal_completion_rate, mean_utility, mean_baseline, mean_opportunity, tail_risk_mean, preferences
+        )
+        raw_score = scores["raw_score"]
+        grade, grade_name = ScoringSystem.get_grade(raw_score)
+
+        cache_tags = [
+            f"cache:{SCORING_CACHE_VERSION}",
+            f"baseline_cache:{baseline_estimator.cache_path}",
+            f"distribution_cache:{baseline_estimator.cache_path}",
+            f"cache_hits:{baseline_estimator.cache_hits}",
+            "baseline_interp:near-state-cubic-spline",
         ]
 
-        goal_completion_rate = sum(sample["goal_met"] for sample in scored_samples) / len(
-            scored_samples
+        return StrategyScoreReport(
+            raw_score=raw_score,
+            goal_score=scores["goal_score"],
+            utility_score=round(scores["utility_score"], 4),
+            resource_score=round(scores["resource_score"], 4),
+            risk_score=round(scores["risk_score"], 4),
+            goal_completion_rate=round(goal_completion_rate, 4),
+            mean_utility=round(mean_utility, 4),
+            mean_baseline=round(mean_baseline, 4),
+            utility_ratio=round(scores["utility_ratio"], 4),
+            mean_opportunity=round(mean_opportunity, 4),
+            opportunity_ratio=round(scores["opportunity_ratio"], 4),
+            tail_risk_mean=round(tail_risk_mean, 4),
+            simulations=total,
+            grade=grade,
+            grade_name=grade_name,
+            baseline_samples=baseline_estimator.samples,
+            baseline_seed=baseline_estimator.base_seed,
+            scoring_version=SCORING_VERSION,
+            parameter_tags=preferences.parameter_tags,
+            formula_tags=preferences.formula_tags,
+            deprecation_tags=preferences.deprecation_tags,
+            cache_tags=cache_tags,
+            cache_stats=baseline_estimator.cache_stats(),
+            traces=full_traces if include_traces and full_traces else None,
         )
+
+    @staticmethod
+    def _compose_scores(
+        goal_completion_rate: float,
+        mean_utility: float,
+        mean_baseline: float,
+        mean_opportunity: float,
+        tail_risk_mean: float,
+        preferences: ScoringPreferences,
+    ) -> Dict[str, float]:
+        """由各项汇总量合成分项分与 ``raw_score``；评分与配对 bootstrap 共用。"""
         goal_score = round(100.0 * (goal_completion_rate ** preferences.alpha), 4)
 
-        mean_utility = sum(sample["utility"] for sample in scored_samples) / len(
-            scored_samples
-        )
-        mean_baseline = sum(sample["baseline"] for sample in scored_samples) / len(
-            scored_samples
-        )
         utility_ratio = mean_utility / mean_baseline if mean_baseline > 0 else 0.0
         utility_score = (
             log_map(utility_ratio, preferences.utility_log_map)
@@ -130,9 +228,6 @@ class ScoringSystem:
             else 0.0
         )
 
-        mean_opportunity = sum(sample["opportunity"] for sample in scored_samples) / len(
-            scored_samples
-        )
         opportunity_ratio = (
             mean_opportunity / preferences.opportunity_reference
             if preferences.opportunity_reference > 0
@@ -144,9 +239,6 @@ class ScoringSystem:
             else 0.0
         )
 
-        tail_count = max(1, ceil(len(scored_samples) * preferences.tail_ratio))
-        tail_quality = sorted(sample["quality"] for sample in scored_samples)[:tail_count]
-        tail_risk_mean = sum(tail_quality) / len(tail_quality)
         risk_score = round(tail_risk_mean, 4)
 
         raw_score = round(
@@ -156,41 +248,15 @@ class ScoringSystem:
             + preferences.risk_weight * risk_score,
             4,
         )
-        grade, grade_name = ScoringSystem.get_grade(raw_score)
-
-        cache_tags = [
-            f"cache:{SCORING_CACHE_VERSION}",
-            f"baseline_cache:{baseline_estimator.cache_path}",
-            f"distribution_cache:{baseline_estimator.cache_path}",
-            f"cache_hits:{baseline_estimator.cache_hits}",
-            "baseline_interp:near-state-cubic-spline",
-        ]
-
-        return StrategyScoreReport(
-            raw_score=raw_score,
-            goal_score=goal_score,
-            utility_score=round(utility_score, 4),
-            resource_score=round(resource_score, 4),
-            risk_score=round(risk_score, 4),
-            goal_completion_rate=round(goal_completion_rate, 4),
-            mean_utility=round(mean_utility, 4),
-            mean_baseline=round(mean_baseline, 4),
-            utility_ratio=round(utility_ratio, 4),
-            mean_opportunity=round(mean_opportunity, 4),
-            opportunity_ratio=round(opportunity_ratio, 4),
-            tail_risk_mean=round(tail_risk_mean, 4),
-            simulations=len(traces),
-            grade=grade,
-            grade_name=grade_name,
-            baseline_samples=baseline_estimator.samples,
-            baseline_seed=baseline_estimator.base_seed,
-            scoring_version=SCORING_VERSION,
-            parameter_tags=preferences.parameter_tags,
-            formula_tags=preferences.formula_tags,
-            deprecation_tags=preferences.deprecation_tags,
-            cache_tags=cache_tags,
-            traces=traces if include_traces else None,
-        )
+        return {
+            "goal_score": goal_score,
+            "utility_ratio": utility_ratio,
+            "utility_score": utility_score,
+            "opportunity_ratio": opportunity_ratio,
+            "resource_score": resource_score,
+            "risk_score": risk_score,
+            "raw_score": raw_score,
+        }
 
     @staticmethod
     def rank_reports(reports: List[StrategyScoreReport]) -> List[StrategyScoreReport]:
@@ -241,6 +307,107 @@ class ScoringSystem:
             )
         return reports
 
+    @staticmethod
+    def paired_bootstrap_scores(
+        samples: Sequence[ScoreSamples],
+        preferences: ScoringPreferences,
+        resamples: int = PAIRED_RESAMPLES,
+        seed: int = 0,
+    ) -> np.ndarray:
+        """配对 bootstrap：返回形状为 ``(resamples, 策略数)`` 的 ``raw_score`` 重抽样矩阵
+
+        每次重抽样对轨迹下标做一次有放回抽样，所有策略共用同一组下标。各策略以相同种子模拟时，
+        同一下标的轨迹共享随机流，分数差的重抽样分布即配对差的分布，方差远小于独立模拟。
+        重抽样以计数权重表示，均值为加权均值，低尾为按质量分升序累计的前
+        ``ceil(N * tail_ratio)`` 份样本。
+        """
+        if not samples:
+            raise ValueError("samples不能为空")
+        total = len(samples[0])
+        if total == 0 or any(len(sample) != total for sample in samples):
+            raise ValueError("配对评分要求各策略的模拟次数相同且不为零")
+        tail_size = max(1, ceil(total * preferences.tail_ratio))
+        columns = []
+        for sample in samples:
+            means = np.stack(
+                [np.frombuffer(getattr(sample, name), dtype=np.float64) for name in ScoreSamples.FIELDS[:4]],
+                axis=1,
+            )
+            quality = np.frombuffer(sample.quality, dtype=np.float64)
+            order = np.argsort(quality, kind="stable")
+            columns.append((means, order, quality[order]))
+
+        rng = np.random.default_rng(seed)
+        scores = np.empty((resamples, len(samples)))
+        for start in range(0, resamples, _BOOTSTRAP_BLOCK):
+            block = min(_BOOTSTRAP_BLOCK, resamples - start)
+            # 计数矩阵形状为 (轨迹数, 块大小)：第 j 列为第 j 次重抽样中各轨迹被抽中的次数
+            drawn = rng.integers(0, total, size=(total, block)) * block + np.arange(block)
+            counts = np.bincount(drawn.ravel(), minlength=total * block).reshape(total, block).astype(np.float64)
+            for index, (means, order, quality) in enumerate(columns):
+                goal_rate, mean_utility, mean_baseline, mean_opportunity = (counts.T @ means / total).T
+                tails = ScoringSystem._weighted_tail_mean(counts, order, quality, tail_size)
+                for row in range(block):
+                    scores[start + row, index] = ScoringSystem._compose_scores(
+                        goal_rate[row],
+                        mean_utility[row],
+                        mean_baseline[row],
+                        mean_opportunity[row],
+                        tails[row],
+                        preferences,
+                    )["raw_score"]
+        return scores
+
+    @staticmethod
+    def _weighted_tail_mean(
+        counts: np.ndarray, order: np.ndarray, sorted_values: np.ndarray, tail_size: int
+    ) -> np.ndarray:
+        """按计数权重求每列最低 ``tail_size`` 份样本的均值；``order`` 为升序下标，``sorted_values`` 为对应的值。"""
+        # 低尾只落在升序样本的前缀里：前缀长度先取 tail_size 加 4 倍泊松标准差，不足时再放大
+        width = min(len(order), tail_size + 4 * ceil(tail_size ** 0.5) + 16)
+        while True:
+            prefix = counts[order[:width]]
+            cumulative = np.cumsum(prefix, axis=0)
+            if width == len(order) or cumulative[-1].min() >= tail_size:
+                break
+            width = min(len(order), 2 * width)
+        taken = np.clip(tail_size - (cumulative - prefix), 0.0, prefix)
+        return sorted_values[:width] @ taken / tail_size
+
+    @staticmethod
+    def attach_paired_intervals(
+        reports: List[StrategyScoreReport],
+        samples: Sequence[ScoreSamples],
+        preferences: ScoringPreferences,
+        baseline_index: Optional[int] = None,
+        resamples: int = PAIRED_RESAMPLES,
+        confidence: float = PAIRED_CONFIDENCE,
+        seed: int = 0,
+    ) -> List[StrategyScoreReport]:
+        """为已排名的报告附上 ``score_delta_from_best`` / ``score_delta_from_baseline`` 的配对置信区间
+
+        ``samples`` 与 ``reports`` 一一对应，须来自相同种子区间的模拟（见 ``paired_bootstrap_scores``）；
+        区间为配对差重抽样分布的百分位区间。
+        """
+        if not reports:
+            return reports
+        if len(samples) != len(reports):
+            raise ValueError("samples 与 reports 数量不一致")
+        if not 0.0 < confidence < 1.0:
+            raise ValueError(f"confidence 必须位于 (0, 1): {confidence}")
+        scores = ScoringSystem.paired_bootstrap_scores(samples, preferences, resamples, seed)
+        quantiles = [(1.0 - confidence) / 2.0, (1.0 + confidence) / 2.0]
+
+        def interval(index: int, reference: int) -> List[float]:
+            return [round(float(bound), 4) for bound in np.quantile(scores[:, index] - scores[:, reference], quantiles)]
+
+        best_index = min(range(len(reports)), key=lambda index: reports[index].rank or 0)
+        for index, report in enumerate(reports):
+            report.score_delta_from_best_ci = interval(index, best_index)
+            if baseline_index is not None:
+                report.score_delta_from_baseline_ci = interval(index, baseline_index)
+        return reports
+
     @staticmethod
     def get_grade(score: float) -> Tuple[str, str]:
         for threshold, grade, grade_name in ScoringSystem.GRADE_THRESHOLDS:
@@ -248,39 +415,42 @@ class ScoringSystem:
                 return grade, grade_name
         return "E", "失败"
 
+    @staticmethod
+    def _baseline_queries(
+        summaries: Sequence[TraceSummary], preferences: ScoringPreferences
+    ) -> List[BaselineQuery]:
+        """按轨迹顺序展开基准查询：每个阶段一条，末阶段之后再加一条未来机会价值。"""
+        queries: List[BaselineQuery] = []
+        for summary in summaries:
+            queries.extend(
+                (stage.config_name, stage.start_counters, stage.paid_draws) for stage in summary.stages
+            )
+            if summary.stages:
+                final_stage = summary.stages[-1]
+                future_draws = summary.final_resource_left + preferences.future_resource_income
+                queries.append((final_stage.config_name, final_stage.end_counters, future_draws))
+        return queries
+
     @staticmethod
     def _score_single_trace(
-        trace: StrategyTrace,
+        trace: TraceSummary,
         preferences: ScoringPreferences,
         goals: List[StrategyGoal],
-        baseline_estimator: BaselineEstimator,
+        baseline: float,
+        future_value: float,
+        past_up_resolver: Callable[[str], set[str]],
     ) -> Dict[str, Any]:
-        utility = calculate_trace_utility(trace, preferences)
-        baseline = sum(
-            baseline_estimator.estimate(
-                stage.config_name,
-                stage.start_counters,
-                stage.paid_draws,
-                preferences,
-            )
-            for stage in trace.stages
+        """对单条轨迹评分；``baseline`` 与 ``future_value`` 由批量基准查询预先给出。"""
+        past_up_names = [past_up_resolver(stage.config_name) for stage in trace.stages]
+        utility = calculate_summary_utility(trace, preferences, past_up_names)
+        goal_met = all(
+            ScoringSystem._evaluate_goal(trace, goal, past_up_names) for goal in goals
         )
-        goal_met = all(ScoringSystem._evaluate_goal(trace, goal) for goal in goals)
-
-        if trace.stages:
-            final_stage = trace.stages[-1]
-            future_draws = trace.final_resource_left + preferences.future_resource_income
-            opportunity = baseline_estimator.estimate(
-                final_stage.config_name,
-                final_stage.end_counters,
-                future_draws,
-                preferences,
-            )
-            if preferences.future_value_policy == "discounted":
-                discount = max(0.0, min(1.0, preferences.future_value_discount))
-                opportunity *= discount
-        else:
-            opportunity = 0.0
+
+        opportunity = future_value
+        if trace.stages and preferences.future_value_policy == "discounted":
+            discount = max(0.0, min(1.0, preferences.future_value_discount))
+            opportunity *= discount
 
         utility_ratio = utility / baseline if baseline > 0 else 0.0
         opportunity_ratio = (
@@ -313,28 +483,27 @@ class ScoringSystem:
         }
 
     @staticmethod
-    def _evaluate_goal(trace: StrategyTrace, goal: StrategyGoal) -> bool:
-        results = _flatten_results(trace)
-
+    def _evaluate_goal(
+        trace: TraceSummary, goal: StrategyGoal, past_up_names: Sequence[set[str]]
+    ) -> bool:
         if goal.kind == "current_up":
             if goal.character_name:
                 count = sum(
-                    1
-                    for result in results
-                    if result.get("is_current_up") and result.get("name") == goal.character_name
+                    stage.current_up_names.get(goal.character_name, 0) for stage in trace.stages
                 )
             elif goal.stage_index is not None and 0 <= goal.stage_index < len(trace.stages):
-                count = sum(
-                    1
-                    for result in trace.stages[goal.stage_index].results
-                    if result.get("is_current_up")
-                )
+                count = trace.stages[goal.stage_index].current_up_count
             else:
-                count = sum(1 for result in results if result.get("is_current_up"))
+                count = trace.current_up_count
             return count >= goal.target
 
         if goal.kind == "past_up":
-            count = sum(1 for result in results if result.get("is_past_up"))
+            count = sum(
+                value
+                for stage, stage_past_up_names in zip(trace.stages, past_up_names)
+                for name, value in stage.six_star_names.items()
+                if name in stage_past_up_names
+            )
             return count >= goal.target
 
         if goal.kind == "resource_at_least":
@@ -346,42 +515,57 @@ class ScoringSystem:
             return trace.stages[goal.stage_index].paid_draws <= goal.target
 
         if goal.kind == "six_star_count":
-            count = sum(1 for result in results if int(result.get("star", 0)) == 6)
-            return count >= goal.target
+            return trace.six_star_count >= goal.target
 
         if goal.kind == "character_count":
             if not goal.character_name:
                 raise ValueError("character_count 目标必须提供 character_name")
-            count = sum(1 for result in results if result.get("name") == goal.character_name)
+            count = sum(stage.name_count(goal.character_name) for stage in trace.stages)
             return count >= goal.target
 
         raise ValueError(f"不支持的目标类型: {goal.kind}")
 
+    @staticmethod
+    def _past_up_resolver(
+        preferences: ScoringPreferences, config_dir: str = "configs"
+    ) -> Callable[[str], set[str]]:
+        """返回 config_name → 该阶段视为历史 UP 的名称集合（含偏好中的历史 UP 名单）。"""
+        known_past_up_names = set(preferences.past_up_character_names)
+        featured_cache: Dict[str, set[str]] = {}
+
+        def resolve(config_name: str) -> set[str]:
+            stage_past_up_names = featured_cache.get(config_name)
+            if stage_past_up_names is None:
+                try:
+                    config = GlobalConfigLoader.shared(os.path.join(config_dir, config_name))
+                    stage_past_up_names = set(config.get_char_featured_names()["past_up"])
+                except (FileNotFoundError, ValueError):
+                    stage_past_up_names = set()
+                stage_past_up_names |= known_past_up_names
+                featured_cache[config_name] = stage_past_up_names
+            return stage_past_up_names
+
+        return resolve
+
     @staticmethod
     def _annotate_past_up_flags(
         traces: List[StrategyTrace], preferences: ScoringPreferences, config_dir: str = "configs"
     ) -> None:
-        known_past_up_names = set(preferences.past_up_character_names)
-        featured_cache: Dict[str, set[str]] = {}
+        resolve = ScoringSystem._past_up_resolver(preferences, config_dir)
         for trace in traces:
             for stage in trace.stages:
-                stage_past_up_names = featured_cache.get(stage.config_name)
-                if stage_past_up_names is None:
-                    try:
-                        config = GlobalConfigLoader(os.path.join(config_dir, stage.config_name))
-                        stage_past_up_names = set(config.get_char_featured_names()["past_up"])
-                    except (FileNotFoundError, ValueError):
-                        stage_past_up_names = set()
-                    featured_cache[stage.config_name] = stage_past_up_names
+                stage_past_up_names = resolve(stage.config_name)
+                if isinstance(stage.results, ResultColumns):
+                    stage.results.mark_past_up(stage_past_up_names)
+                    continue
                 for result in stage.results:
                     if result.get("star") != 6:
                         result["is_past_up"] = False
                         continue
                     result["is_past_up"] = (
                         not result.get("is_current_up", False)
-                        and result.get("name")
-                        in (stage_past_up_names | known_past_up_names)
+                        and result.get("name") in stage_past_up_names
                     )
 
 
-__all__ = ["ScoringSystem"]
+__all__ = ["PAIRED_CONFIDENCE", "PAIRED_RESAMPLES", "ScoringSystem"]
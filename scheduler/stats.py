@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""单遍流式统计：评分与展示共用的累加器。"""
+
+from __future__ import annotations
+
+import heapq
+from array import array
+from math import floor, sqrt
+from typing import Dict, Iterable, List, Optional
+
+from .models import StrategyTrace, TraceSummary
+
+
+class StreamingStats:
+    """单遍流式统计累加器
+
+    逐个折叠样本，维护计数、总和、均值与方差（Welford 算法）、最小值与最大值，
+    可选维护定宽直方图和最低 ``tail_size`` 个样本的有界堆。除直方图与尾部堆外，
+    内存占用与样本数无关；尾部堆的大小固定为 ``tail_size``，给出精确的低尾均值。
+
+    Parameters
+    ----------
+    tail_size : int, optional
+        保留的最低样本数，默认0（不维护尾部）
+    bin_width : float, optional
+        直方图的桶宽，默认不维护直方图
+
+    Examples
+    --------
+    >>> stats = StreamingStats(tail_size=2, bin_width=10.0)
+    >>> stats.extend([3, 15, 7, 21])
+    >>> stats.mean, stats.minimum, stats.maximum
+    (11.5, 3, 21)
+    >>> stats.tail_mean()
+    5.0
+    >>> stats.histogram()
+    {0.0: 2, 10.0: 1, 20.0: 1}
+    """
+
+    __slots__ = ("count", "total", "minimum", "maximum", "tail_size", "bin_width", "_mean", "_m2", "_bins", "_tail")
+
+    def __init__(self, tail_size: int = 0, bin_width: Optional[float] = None):
+        if tail_size < 0:
+            raise ValueError(f"tail_size 不能为负数: {tail_size}")
+        if bin_width is not None and bin_width <= 0:
+            raise ValueError(f"bin_width 必须为正数: {bin_width}")
+        self.count = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.tail_size = tail_size
+        self.bin_width = bin_width
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._bins: Dict[int, int] = {}
+        # 以相反数存放的大顶堆，堆顶为当前尾部中的最大值
+        self._tail: List[float] = []
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        if self.bin_width is not None:
+            key = floor(value / self.bin_width)
+            self._bins[key] = self._bins.get(key, 0) + 1
+        if self.tail_size:
+            if len(self._tail) < self.tail_size:
+                heapq.heappush(self._tail, -value)
+            elif value < -self._tail[0]:
+                heapq.heapreplace(self._tail, -value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "StreamingStats") -> None:
+        """合并另一个累加器（如分块或多进程各自的结果），方差按 Chan 公式合并。"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self._mean, self._m2 = other._mean, other._m2
+        else:
+            count = self.count + other.count
+            delta = other._mean - self._mean
+            self._m2 += other._m2 + delta * delta * self.count * other.count / count
+            self._mean += delta * other.count / count
+        self.count += other.count
+        self.total += other.total
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        for key, hits in other._bins.items():
+            self._bins[key] = self._bins.get(key, 0) + hits
+        for negated in other._tail:
+            value = -negated
+            if len(self._tail) < self.tail_size:
+                heapq.heappush(self._tail, negated)
+            elif self.tail_size and value < -self._tail[0]:
+                heapq.heapreplace(self._tail, negated)
+
+    @property
+    def mean(self) -> float:
+        # 均值取 总和 / 计数，与评分逐项累加总和的旧实现逐位一致
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self) -> float:
+        """样本方差（n - 1 自由度），与 ``statistics.variance`` 一致。"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return sqrt(self.variance)
+
+    def tail(self) -> List[float]:
+        """按升序返回尾部堆中的样本。"""
+        return sorted(-value for value in self._tail)
+
+    def tail_mean(self) -> float:
+        tail = self.tail()
+        return sum(tail) / len(tail) if tail else 0.0
+
+    def histogram(self) -> Dict[float, int]:
+        """按桶下界升序返回直方图。"""
+        if self.bin_width is None:
+            return {}
+        return {key * self.bin_width: self._bins[key] for key in sorted(self._bins)}
+
+
+class TraceStatistics:
+    """策略轨迹的单遍汇总，供 ``SchedulerDisplay`` 的基础统计表使用
+
+    每条轨迹只读取一次各项计数，完整轨迹与紧凑摘要可混合传入。
+    ``ScoringSystem.score_traces`` 可在评分的同一遍中顺带填充它。
+    """
+
+    __slots__ = ("paid_draws", "bonus_draws", "total_draws", "six_stars", "current_ups", "resource_left", "completed")
+
+    def __init__(self):
+        self.paid_draws = StreamingStats()
+        self.bonus_draws = StreamingStats()
+        self.total_draws = StreamingStats()
+        self.six_stars = StreamingStats(bin_width=1)
+        self.current_ups = StreamingStats(bin_width=1)
+        self.resource_left = StreamingStats()
+        self.completed = 0
+
+    @classmethod
+    def collect(cls, traces: Iterable[StrategyTrace | TraceSummary]) -> "TraceStatistics":
+        statistics = cls()
+        for trace in traces:
+            statistics.add(trace)
+        return statistics
+
+    @property
+    def count(self) -> int:
+        return self.paid_draws.count
+
+    @property
+    def complete_rate(self) -> float:
+        return self.completed / self.count if self.count else 0.0
+
+    def add(self, trace: StrategyTrace | TraceSummary) -> None:
+        self.add_counts(trace, trace.six_star_count, trace.current_up_count)
+
+    def add_counts(self, trace: StrategyTrace | TraceSummary, six_stars: int, current_ups: int) -> None:
+        """折叠一条轨迹；6 星与当期 UP 数由调用方给出，避免重复扫描逐抽结果。"""
+        self.paid_draws.add(trace.total_paid_draws)
+        self.bonus_draws.add(trace.total_bonus_draws)
+        self.total_draws.add(trace.total_paid_draws + trace.total_bonus_draws)
+        self.six_stars.add(six_stars)
+        self.current_ups.add(current_ups)
+        self.resource_left.add(trace.final_resource_left)
+        self.completed += int(trace.completed)
+
+
+class ScoreSamples:
+    """逐轨迹评分样本，按轨迹（种子）顺序保存
+
+    ``ScoringSystem.score_traces`` 在评分的同一遍中顺带填充。各策略以相同种子模拟时，
+    第 i 个样本来自同一条随机流，可据此做配对 bootstrap（见 ``ScoringSystem.attach_paired_intervals``）。
+    每条轨迹占 5 个双精度数。
+    """
+
+    FIELDS = ("goal_met", "utility", "baseline", "opportunity", "quality")
+
+    __slots__ = FIELDS
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, array("d"))
+
+    def __len__(self) -> int:
+        return len(self.goal_met)
+
+    def add(self, sample: Dict[str, float]) -> None:
+        for name in self.FIELDS:
+            getattr(self, name).append(sample[name])
+
+
+__all__ = ["ScoreSamples", "StreamingStats", "TraceStatistics"]
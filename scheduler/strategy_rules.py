@@ -3,8 +3,11 @@
 
 from __future__ import annotations
 
+import operator
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Literal, TypeAlias
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Mapping, Tuple, TypeAlias
+
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -28,6 +31,195 @@ class StrategyRuleSet:
 
 StrategyNode: TypeAlias = StrategyCondition | StrategyRuleSet
 
+# 规则读取的状态槽位：规范化 kind → (状态键, 缺省值, 是否转为布尔)；状态键为 None 时读取抽数
+_DRAW_SLOT: Tuple[None, None, bool] = (None, None, False)
+_SLOTS: Dict[str, Tuple[str | None, Any, bool]] = {
+    "draws": _DRAW_SLOT,
+    "hard_pity": _DRAW_SLOT,
+    "current_up": ("current_up", 0, False),
+    "six_star_count": ("six_star_count", 0, False),
+    "resource_left": ("resource_left", 0, False),
+    "potential": ("potential", 0, False),
+    "urgent": ("urgent", False, True),
+    "dossier": ("dossier", False, True),
+    "soft_pity": ("soft_pity", False, True),
+    "up_oprt": ("up_oprt", False, True),
+    "oprt": ("oprt", False, True),
+    "flag": ("flag", False, True),
+}
+
+# 规则的静态分类：只读抽数 / 只读抽数与剩余资源 / 依赖抽卡结果
+RULE_DRAW_COUNT = "draw_count"
+RULE_RESOURCE = "resource"
+RULE_OUTCOME = "outcome"
+RULE_CLASSES = (RULE_DRAW_COUNT, RULE_RESOURCE, RULE_OUTCOME)
+
+# 编译后的规则树节点：("const", bool) | ("cmp", 槽位, 运算符, 常量) | ("all" / "any", 子节点元组)
+_CompiledNode: TypeAlias = Tuple[Any, ...]
+# 编译后的单次判定：(抽数, 状态) -> 是否停止
+_Predicate: TypeAlias = Callable[[int, Mapping[str, Any]], bool]
+
+
+class CompiledRuleSet:
+    """编译后的结构化规则
+
+    由 ``StrategyRuleEngine.compile`` 生成：别名与状态槽位在编译期解析，空分组与常量分支被折叠，
+    同类嵌套分组被展平，``in`` 的列表常量转为集合。规则树随后组合为预绑定比较函数与常量的闭包，
+    每抽判断只做几次比较；同一棵规范化的规则树也可以对整批玩家求停止掩码。
+
+    Examples
+    --------
+    >>> compiled = StrategyRuleEngine.compile(
+    ...     {"match": "any", "conditions": [{"kind": "draw_count", "operator": ">=", "value": 80}]}
+    ... )
+    >>> compiled(80, {}), compiled(79, {})
+    (True, False)
+    >>> compiled.mask(np.array([79, 80]), {}).tolist()
+    [False, True]
+    """
+
+    __slots__ = ("rule_set", "tree", "reads", "classification", "_evaluate")
+
+    def __init__(self, rule_set: StrategyRuleSet, tree: _CompiledNode):
+        self.rule_set = rule_set
+        self.tree = tree
+        # 规则读取的状态键（None 表示抽数）；抽卡结果之外的读数在给定资源时可逐抽推算
+        self.reads = frozenset(self._reads(tree))
+        if self.reads - {None, "resource_left"}:
+            self.classification = RULE_OUTCOME
+        elif "resource_left" in self.reads:
+            self.classification = RULE_RESOURCE
+        else:
+            self.classification = RULE_DRAW_COUNT
+        self._evaluate: _Predicate = self._build(tree)
+
+    def __call__(self, draw_count: int, state: Mapping[str, Any]) -> bool:
+        return self._evaluate(draw_count, state)
+
+    @property
+    def is_static(self) -> bool:
+        """停止点是否与抽卡结果无关（只读抽数与剩余资源）。"""
+        return self.classification != RULE_OUTCOME
+
+    def stop_draw(self, start_draws: int, resource_left: Iterable[float] | None = None, limit: int = 100000) -> int:
+        """静态规则的停止点：从 ``start_draws`` 起还要抽几次才满足规则
+
+        Parameters
+        ----------
+        start_draws : int
+            开始判断时的抽数
+        resource_left : Iterable[float], optional
+            第 i 项为再抽 i 次后的剩余资源（折算抽数），可以是惰性生成器；
+            资源类规则必须给出。序列耗尽仍未停止时返回序列长度
+        limit : int, optional
+            未给出 ``resource_left`` 时最多向后搜索的抽数，搜不到时返回 ``limit``
+
+        Raises
+        ------
+        ValueError
+            规则依赖抽卡结果，或资源类规则未给出 ``resource_left`` 时
+        """
+        if not self.is_static:
+            raise ValueError("规则依赖抽卡结果，无法静态求停止点")
+        if resource_left is None:
+            if self.classification == RULE_RESOURCE:
+                raise ValueError("资源类规则需要给出 resource_left 序列")
+            for draws in range(limit):
+                if self._evaluate(start_draws + draws, {}):
+                    return draws
+            return limit
+        draws = 0
+        for left in resource_left:
+            if self._evaluate(start_draws + draws, {"resource_left": left}):
+                return draws
+            draws += 1
+        return draws
+
+    @classmethod
+    def _reads(cls, node: _CompiledNode) -> Iterator[str | None]:
+        if node[0] == "cmp":
+            yield node[1][0]
+        elif node[0] in ("all", "any"):
+            for child in node[1]:
+                yield from cls._reads(child)
+
+    @classmethod
+    def _build(cls, node: _CompiledNode) -> _Predicate:
+        """把规范化的规则树组合为闭包：比较函数与常量在构建时绑定，分组按子节点数展开为短路判断。"""
+        kind = node[0]
+        if kind == "const":
+            constant = node[1]
+            return lambda draw_count, state: constant
+        if kind == "cmp":
+            (key, default, as_bool), op, value = node[1], node[2], node[3]
+            compare = _SCALAR_OPERATORS[op]
+            if key is None:
+                return lambda draw_count, state: compare(draw_count, value)
+            if as_bool:
+                return lambda draw_count, state: compare(bool(state.get(key, default)), value)
+            return lambda draw_count, state: compare(state.get(key, default), value)
+        children = tuple(cls._build(child) for child in node[1])
+        if len(children) == 1:
+            return children[0]
+        if kind == "all":
+            if len(children) == 2:
+                first, second = children
+                return lambda draw_count, state: first(draw_count, state) and second(draw_count, state)
+            return lambda draw_count, state: all(child(draw_count, state) for child in children)
+        if len(children) == 2:
+            first, second = children
+            return lambda draw_count, state: first(draw_count, state) or second(draw_count, state)
+        return lambda draw_count, state: any(child(draw_count, state) for child in children)
+
+    def mask(self, draw_count: np.ndarray, state: Mapping[str, Any]) -> np.ndarray:
+        """批量求停止掩码
+
+        Parameters
+        ----------
+        draw_count : np.ndarray
+            长度为 N 的抽数数组
+        state : Mapping[str, Any]
+            各状态键对应长度为 N 的数组（或对所有玩家相同的标量）；缺失的键取槽位缺省值
+
+        Returns
+        -------
+        np.ndarray
+            长度为 N 的布尔数组，与对每个玩家逐个调用本对象的结果一致
+        """
+        draw_count = np.asarray(draw_count)
+        return np.broadcast_to(self._mask_node(self.tree, draw_count, state), draw_count.shape).copy()
+
+    @classmethod
+    def _mask_node(cls, node: _CompiledNode, draw_count: np.ndarray, state: Mapping[str, Any]) -> np.ndarray:
+        kind = node[0]
+        if kind == "const":
+            return np.full(draw_count.shape, node[1])
+        if kind == "cmp":
+            (key, default, as_bool), op, value = node[1], node[2], node[3]
+            left = draw_count if key is None else np.asarray(state.get(key, default))
+            if as_bool:
+                left = left.astype(bool)
+            if op == "in":
+                return np.isin(left, list(value))
+            return np.asarray(_VECTOR_OPERATORS[op](left, value), dtype=bool)
+        masks = [cls._mask_node(child, draw_count, state) for child in node[1]]
+        reduce = np.logical_and if kind == "all" else np.logical_or
+        return reduce.reduce(np.broadcast_arrays(*masks, draw_count)[:-1])
+
+
+_VECTOR_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+_SCALAR_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    **_VECTOR_OPERATORS,
+    "in": lambda left, right: left in right,
+}
+
 
 class StrategyRuleEngine:
     """结构化规则判断器。"""
@@ -89,32 +281,68 @@ class StrategyRuleEngine:
 
     @staticmethod
     def _resolve_value(kind: str, draw_count: int, state: Dict[str, Any]) -> Any:
-        kind = StrategyRuleEngine._KIND_ALIASES.get(kind, kind)
-        if kind == "draws":
-            return draw_count
-        if kind == "current_up":
-            return state.get("current_up", 0)
-        if kind == "six_star_count":
-            return state.get("six_star_count", 0)
-        if kind == "urgent":
-            return bool(state.get("urgent", False))
-        if kind == "dossier":
-            return bool(state.get("dossier", False))
-        if kind == "soft_pity":
-            return bool(state.get("soft_pity", False))
-        if kind == "up_oprt":
-            return bool(state.get("up_oprt", False))
-        if kind == "oprt":
-            return bool(state.get("oprt", False))
-        if kind == "resource_left":
-            return state.get("resource_left", 0)
-        if kind == "potential":
-            return state.get("potential", 0)
-        if kind == "hard_pity":
+        key, default, as_bool = StrategyRuleEngine._slot(kind)
+        if key is None:
             return draw_count
-        if kind == "flag":
-            return bool(state.get("flag", False))
-        return state.get(kind)
+        value = state.get(key, default)
+        return bool(value) if as_bool else value
+
+    @staticmethod
+    def _slot(kind: str) -> Tuple[str | None, Any, bool]:
+        kind = StrategyRuleEngine._KIND_ALIASES.get(kind, kind)
+        return _SLOTS.get(kind, (kind, None, False))
+
+    @classmethod
+    def compile(cls, rule_set: StrategyRuleSet | Dict[str, Any]) -> CompiledRuleSet:
+        """把规则集编译为 ``CompiledRuleSet``，判定结果与 ``should_stop`` 一致。
+
+        Raises
+        ------
+        ValueError
+            规则中含不支持的比较运算符时（编译期即报错）
+        """
+        rule_set = cls._coerce(rule_set)
+        return CompiledRuleSet(rule_set, cls._compile_node(rule_set))
+
+    @classmethod
+    def classify(cls, rule_set: StrategyRuleSet | Dict[str, Any]) -> str:
+        """静态分类：``draw_count``（只读抽数）、``resource``（读剩余资源）或 ``outcome``（依赖抽卡结果）。"""
+        return cls.compile(rule_set).classification
+
+    @classmethod
+    def _compile_node(cls, node: StrategyNode) -> _CompiledNode:
+        if isinstance(node, StrategyCondition):
+            if node.operator not in cls._OPERATORS:
+                raise ValueError(f"不支持的比较运算符: {node.operator}")
+            value = node.value
+            if node.operator == "in" and isinstance(value, (list, tuple, set, frozenset)):
+                try:
+                    value = frozenset(value)
+                except TypeError:
+                    value = tuple(value)
+            return ("cmp", cls._slot(node.kind), node.operator, value)
+
+        # 与 should_stop 一致：空分组恒为真
+        if not node.conditions:
+            return ("const", True)
+        match = "any" if node.match == "any" else "all"
+        # 对 all 而言 True 是单位元、False 是吸收元，any 相反
+        identity = match == "all"
+        children: List[_CompiledNode] = []
+        for child in (cls._compile_node(condition) for condition in node.conditions):
+            if child[0] == "const":
+                if child[1] == identity:
+                    continue
+                return ("const", not identity)
+            if child[0] == match:
+                children.extend(child[1])
+            else:
+                children.append(child)
+        if not children:
+            return ("const", identity)
+        if len(children) == 1:
+            return children[0]
+        return (match, tuple(children))
 
     @staticmethod
     def _coerce(rule_set: StrategyRuleSet | Dict[str, Any]) -> StrategyRuleSet:
@@ -167,6 +395,11 @@ def is_structured_strategy(rule_definition: Any) -> bool:
 
 
 __all__ = [
+    "RULE_CLASSES",
+    "RULE_DRAW_COUNT",
+    "RULE_OUTCOME",
+    "RULE_RESOURCE",
+    "CompiledRuleSet",
     "StrategyCondition",
     "StrategyRuleEngine",
     "StrategyRuleSet",
@@ -5,40 +5,90 @@ from __future__ import annotations
 
 import os
 import random
-from copy import deepcopy
+from copy import copy, deepcopy
 from math import ceil
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
 
-from gacha_core import CharGacha, Counters, GlobalConfigLoader
+from gacha_core import BatchRandom, CharGacha, Counters, GlobalConfigLoader
+from gacha_core.randomizer import STREAM_URGENT
 from scheduler.models import (
     Resource,
+    ResultColumns,
     StageTrace,
     StrategyTrace,
+    TraceSummary,
     resource_to_standard_draws,
 )
 from scheduler.strategy_rules import (
+    RULE_DRAW_COUNT,
+    CompiledRuleSet,
     StrategyRuleEngine,
     StrategyRuleSet,
 )
 
+# 模拟轨迹随机流的根种子（Philox 密钥）；轨迹编号即调度传入的种子
+SIMULATION_ROOT_SEED = 0
+
+
+# 按计划中规则对象的身份缓存编译结果：同一进程内每个计划只编译一次
+_COMPILED_RULES: Dict[int, Tuple[Any, CompiledRuleSet]] = {}
+_COMPILED_RULES_LIMIT = 256
+
+
+def _compiled_rules(rules: StrategyRuleSet | Dict[str, Any]) -> CompiledRuleSet:
+    entry = _COMPILED_RULES.get(id(rules))
+    if entry is not None and entry[0] is rules:
+        return entry[1]
+    if len(_COMPILED_RULES) >= _COMPILED_RULES_LIMIT:
+        _COMPILED_RULES.clear()
+    compiled = StrategyRuleEngine.compile(rules)
+    # 同时持有规则对象，保证缓存期间 id 不会被复用
+    _COMPILED_RULES[id(rules)] = (rules, compiled)
+    return compiled
+
 
 class StrategyRuntime:
-    """结构化策略运行时。"""
+    """结构化策略运行时，持有编译后的规则，每抽判断只做几次比较。"""
 
     def __init__(self, rules: StrategyRuleSet | Dict[str, Any]):
-        self.rules = StrategyRuleEngine._coerce(rules)
+        self.program = _compiled_rules(rules)
+        self.rules = self.program.rule_set
+
+    def terminate(self, draw_count: int, state: Mapping[str, Any]) -> bool:
+        return self.program(draw_count, state)
+
+    def planned_iterations(self, start_draws: int, resource: Resource, use_origeometry: bool) -> Optional[int]:
+        """静态规则（只读抽数与剩余资源）预先求出本阶段的循环次数，依赖抽卡结果时返回 None
+
+        在资源副本上按模拟循环的顺序扣费推算剩余资源序列，再由 ``CompiledRuleSet.stop_draw``
+        求停止点。资源先于规则耗尽时多计一次，模拟循环在最后一次扣费失败处照常返回。
+        """
+        if not self.program.is_static:
+            return None
+        if self.program.classification == RULE_DRAW_COUNT:
+            # 只读抽数：停止点与资源无关，资源够付的抽数有闭式解
+            return self.program.stop_draw(start_draws, limit=affordable_draws(resource, use_origeometry) + 1)
+        probe = copy(resource)
 
-    def terminate(self, draw_count: int, state: Dict[str, Any]) -> bool:
-        return StrategyRuleEngine.should_stop(self.rules, draw_count=draw_count, state=state)
+        def remaining() -> Iterator[int]:
+            yield resource_to_standard_draws(probe)
+            while consume_resource(probe, use_origeometry):
+                yield resource_to_standard_draws(probe)
+
+        return self.program.stop_draw(start_draws, remaining())
+
+
+# 每累计 240 抽获得一个信物
+TOKEN_INTERVAL = 240
+
+
+def _grants_tokens(gacha: CharGacha) -> bool:
+    """卡池的 240 抽累计奖励是否为信物（按奖励名称判定，与累计奖励列表一致）。"""
+    return gacha.model.reward_config.get("Type_C", "概率提升干员的信物").endswith("的信物")
 
 
 def get_token(gacha: CharGacha) -> int:
-    rewards = gacha.get_accumulated_reward()
-    count = 0
-    for reward in rewards:
-        if reward[0].endswith("的信物"):
-            count += 1
-    return count
+    return gacha.counters.total // TOKEN_INTERVAL if _grants_tokens(gacha) else 0
 
 
 def consume_resource(resource: Resource, use_origeometry: bool) -> bool:
@@ -57,67 +107,170 @@ def consume_resource(resource: Resource, use_origeometry: bool) -> bool:
     return False
 
 
-def process_gacha_result(
-    result: Any, gacha: CharGacha, state: Dict[str, Any], potential: int
-) -> Tuple[Dict[str, Any], int]:
-    """处理单次抽卡结果，更新策略状态。"""
-
-    up_names = gacha.star_up_prob.get(6, ([], []))[0]
-    is_up = result.name in up_names if up_names else False
-
-    state["oprt"] = state.get("oprt", False) or (result.star == 6)
-    state["up_oprt"] = state.get("up_oprt", False) or is_up
-    state["current_up"] = state.get("current_up", 0) + int(is_up)
-    state["six_star_count"] = state.get("six_star_count", 0) + int(result.star == 6)
-    potential += int(is_up)
-    state["potential"] = potential + get_token(gacha)
-    state["soft_pity"] = state.get("soft_pity", False) or (
-        80 >= gacha.counters.no_6star > 65 and result.star == 6
+def affordable_draws(resource: Resource, use_origeometry: bool) -> int:
+    """``consume_resource`` 连续成功的次数：每次扣 1 张寻访凭证，或折合 500 合成玉。"""
+    oroberyl = resource.oroberyl + resource.origeometry * 75 * int(use_origeometry)
+    return resource.chartered_permits + max(oroberyl, 0) // 500
+
+
+class BannerState(Mapping[str, Any]):
+    """单个阶段的策略状态，每抽增量更新
+
+    字段固定为槽位，UP 名称集合与信物规则在阶段开始时取一次；信物数由主卡池的累计抽数
+    直接算出（``total // 240``）。对象本身是只读映射（另支持按已有键赋值），
+    ``StrategyRuleEngine`` 与按键读取状态的调用方无需改动。
+
+    Parameters
+    ----------
+    gacha : CharGacha
+        本阶段的主卡池，提供计数器、UP 名称与累计奖励规则
+    urgent_used : bool
+        阶段开始时是否已使用加急招募
+    """
+
+    __slots__ = (
+        "urgent",
+        "up_oprt",
+        "oprt",
+        "soft_pity",
+        "potential",
+        "current_up",
+        "six_star_count",
+        "resource_left",
+        "dossier",
+        "_counters",
+        "_up_names",
+        "_grants_tokens",
     )
-    state["dossier"] = gacha.counters.total >= 60
-
-    return state, potential
+    KEYS = __slots__[:9]
+
+    def __init__(self, gacha: CharGacha, urgent_used: bool = False):
+        self._counters = gacha.counters
+        self._up_names = frozenset(gacha.model.pools[0].up_names)
+        self._grants_tokens = _grants_tokens(gacha)
+        self.urgent = urgent_used
+        self.up_oprt = False
+        self.oprt = False
+        self.soft_pity = False
+        self.potential = 0
+        self.current_up = 0
+        self.six_star_count = 0
+        self.resource_left = 0.0
+        self.dossier = gacha.counters.total >= 60
+
+    def record(self, result: Any) -> None:
+        """折叠一次抽卡结果（含加急招募的赠送抽）。"""
+        counters = self._counters
+        if result.star == 6:
+            self.oprt = True
+            self.six_star_count += 1
+            if 80 >= counters.no_6star > 65:
+                self.soft_pity = True
+            if result.name in self._up_names:
+                self.up_oprt = True
+                self.current_up += 1
+        tokens = counters.total // TOKEN_INTERVAL if self._grants_tokens else 0
+        self.potential = self.current_up + tokens
+        self.dossier = counters.total >= 60
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return f"BannerState({dict(self)!r})"
 
 
 def handle_urgent_gacha(
     config: Any,
-    gacha: CharGacha,
     cnts: Counters,
-    state: Dict[str, Any],
-    potential: int,
-    seed: int,
-) -> Tuple[Dict[str, Any], int, List[Any]]:
-    """处理加急招募赠送的 10 抽。"""
+    state: Optional[BannerState],
+    rand: BatchRandom,
+) -> List[Any]:
+    """处理加急招募赠送的 10 抽，``rand`` 为该阶段独立的加急随机流；``state`` 为 None 时不更新策略状态。"""
 
     cnts.urgent_used = True
-    urgent = CharGacha(config, seed=seed)
+    urgent = CharGacha(config, rand=rand)
     results: List[Any] = []
 
     for _ in range(10):
         result = urgent.attempt()
         results.append(result)
-        state, potential = process_gacha_result(result, gacha, state, potential)
-        state["urgent"] = True
+        if state is not None:
+            state.record(result)
+            state.urgent = True
+
+    return results
+
+
+def initialize_banner_state(cnts: Counters, gacha: CharGacha) -> BannerState:
+    """为阶段开始时的卡池创建策略状态，抽卡结果通过 ``BannerState.record`` 增量写入。"""
+    return BannerState(gacha, urgent_used=cnts.urgent_used)
+
 
-    return state, potential, results
+# 由进程池 initializer 写入的共享计划，任务只传计划下标与种子区间
+_WORKER_PLANS: Tuple[Any, ...] = ()
 
 
-def initialize_banner_state(cnts: Counters) -> Dict[str, Any]:
-    return {
-        "urgent": cnts.urgent_used,
-        "up_oprt": False,
-        "oprt": False,
-        "soft_pity": False,
-        "potential": 0,
-        "current_up": 0,
-        "six_star_count": 0,
-        "resource_left": 0.0,
-        "dossier": cnts.total >= 60,
-    }
+def _init_simulation_worker(plans: Tuple[Any, ...]) -> None:
+    global _WORKER_PLANS
+    _WORKER_PLANS = plans
 
 
-def _worker_wrapper(args: Any) -> StrategyTrace:
-    return _simulator(*args)
+def _simulation_chunk_worker(task: Tuple[int, int, int, bool]) -> List[StrategyTrace | TraceSummary]:
+    """运行一个种子区间，``summarize`` 为 True 时只回传摘要。"""
+    plan_index, seed_start, seed_stop, summarize = task
+    config_dir, arrangement, schedules, change, init_resource = _WORKER_PLANS[plan_index]
+    results: List[StrategyTrace | TraceSummary] = []
+    for seed in range(seed_start, seed_stop):
+        trace = _simulator(config_dir, arrangement, schedules, change, seed, init_resource)
+        results.append(TraceSummary.from_trace(trace) if summarize else trace)
+    return results
+
+
+def _paid_draw(
+    gacha: CharGacha,
+    config: Any,
+    cnts: Counters,
+    state: Optional[BannerState],
+    stage_results: ResultColumns,
+    seed: int,
+    stage_index: int,
+) -> int:
+    """付费抽一次并写入阶段记录，累计 30 抽时触发加急招募，返回赠送的抽数。
+
+    ``state`` 为 None 时（静态规则的计划循环）付费抽与加急招募都不更新策略状态。
+    """
+    result = gacha.attempt()
+    stage_results.append_result(result)
+    if state is not None:
+        state.record(result)
+    if gacha.counters.total != 30 or cnts.urgent_used:
+        return 0
+    urgent_results = handle_urgent_gacha(
+        config,
+        cnts,
+        state,
+        BatchRandom.from_stream(SIMULATION_ROOT_SEED, seed, stage_index, STREAM_URGENT, size=16),
+    )
+    for urgent_result in urgent_results:
+        stage_results.append_result(urgent_result)
+    return len(urgent_results)
 
 
 def _simulator(
@@ -164,8 +317,9 @@ def _simulator(
         else:
             selected_config = arrangement[idx] if change else arrangement[0]
 
-        config = GlobalConfigLoader(os.path.join(config_dir, selected_config))
-        gacha = CharGacha(config, seed=seed * 1000 + idx)
+        config = GlobalConfigLoader.shared(os.path.join(config_dir, selected_config))
+        # 每个 (轨迹, 阶段) 使用独立的 Philox 子流，结果与进程数和分块方式无关
+        gacha = CharGacha(config, rand=BatchRandom.from_stream(SIMULATION_ROOT_SEED, seed, idx))
         gacha.counters = deepcopy(cnts)
         resource.chartered_permits += (
             5 * int(check) + 10 * int(dossier) + addition.chartered_permits
@@ -175,78 +329,38 @@ def _simulator(
         resource.origeometry += addition.origeometry
 
         strategy = StrategyRuntime(rules)
-        state = initialize_banner_state(cnts)
-        potential = 0
-        stage_paid_draws = 0
-        stage_bonus_draws = 0
-        stage_results: List[Dict[str, Any]] = []
+        state = initialize_banner_state(cnts, gacha)
         featured_names = config.get_char_featured_names()
         up_names = set(featured_names["current_up"])
         past_up_names = set(featured_names["past_up"])
-        start_counters = deepcopy(gacha.counters)
-        state["resource_left"] = resource_to_standard_draws(resource)
-
-        while not strategy.terminate(gacha.counters.total, state):
-            if not consume_resource(resource, use_ori):
-                resource_left = resource_to_standard_draws(resource)
-                state["resource_left"] = resource_left
-                stages.append(
-                    StageTrace(
-                        config_name=selected_config,
-                        start_counters=start_counters,
-                        end_counters=deepcopy(gacha.counters),
-                        paid_draws=stage_paid_draws,
-                        bonus_draws=stage_bonus_draws,
-                        resource_left=resource_left,
-                        results=stage_results,
-                    )
-                )
-                return StrategyTrace(
-                    completed=False,
-                    total_paid_draws=total_paid_draws,
-                    total_bonus_draws=total_bonus_draws,
-                    final_resource_left=resource_left,
-                    stages=stages,
-                    failure_reason="resource_exhausted",
-                )
-
-            result = gacha.attempt()
-            total_paid_draws += 1
-            stage_paid_draws += 1
-            stage_results.append(
-                _result_to_record(result, selected_config, up_names, past_up_names)
-            )
-            state, potential = process_gacha_result(result, gacha, state, potential)
-            state["resource_left"] = resource_to_standard_draws(resource)
-
-            if gacha.counters.total == 30 and not cnts.urgent_used:
-                state, potential, urgent_results = handle_urgent_gacha(
-                    config,
-                    gacha,
-                    cnts,
-                    state,
-                    potential,
-                    seed + total_paid_draws,
-                )
-                for urgent_result in urgent_results:
-                    total_bonus_draws += 1
-                    stage_bonus_draws += 1
-                    stage_results.append(
-                        _result_to_record(
-                            urgent_result, selected_config, up_names, past_up_names
-                        )
-                    )
-                state["resource_left"] = resource_to_standard_draws(resource)
-
-        dossier = gacha.counters.total >= 60
-        counters = Counters(
-            0,
-            gacha.counters.no_6star,
-            gacha.counters.no_5star_plus,
-            0,
-            False,
-            False,
+        stage_results = ResultColumns(
+            selected_config, list(gacha.model.names), up_names, past_up_names
         )
+        start_counters = deepcopy(gacha.counters)
+        state.resource_left = resource_to_standard_draws(resource)
+        stage_bonus_draws = 0
+        exhausted = False
+
+        iterations = strategy.planned_iterations(gacha.counters.total, resource, use_ori)
+        if iterations is None:
+            # 规则依赖抽卡结果：逐抽判断并增量更新策略状态
+            while not strategy.terminate(gacha.counters.total, state):
+                if not consume_resource(resource, use_ori):
+                    exhausted = True
+                    break
+                stage_bonus_draws += _paid_draw(gacha, config, cnts, state, stage_results, seed, idx)
+                state.resource_left = resource_to_standard_draws(resource)
+        else:
+            # 静态规则：停止点已预先算出，循环内不判断规则、不更新策略状态
+            for _ in range(iterations):
+                if not consume_resource(resource, use_ori):
+                    exhausted = True
+                    break
+                stage_bonus_draws += _paid_draw(gacha, config, cnts, None, stage_results, seed, idx)
+
+        stage_paid_draws = gacha.counters.total - start_counters.total
+        total_paid_draws += stage_paid_draws
+        total_bonus_draws += stage_bonus_draws
         resource_left = resource_to_standard_draws(resource)
         stages.append(
             StageTrace(
@@ -259,6 +373,25 @@ def _simulator(
                 results=stage_results,
             )
         )
+        if exhausted:
+            return StrategyTrace(
+                completed=False,
+                total_paid_draws=total_paid_draws,
+                total_bonus_draws=total_bonus_draws,
+                final_resource_left=resource_left,
+                stages=stages,
+                failure_reason="resource_exhausted",
+            )
+
+        dossier = gacha.counters.total >= 60
+        counters = Counters(
+            0,
+            gacha.counters.no_6star,
+            gacha.counters.no_5star_plus,
+            0,
+            False,
+            False,
+        )
 
     return StrategyTrace(
         completed=True,
@@ -269,32 +402,12 @@ def _simulator(
     )
 
 
-def _result_to_record(
-    result: Any,
-    config_name: str,
-    up_names: set[str],
-    past_up_names: set[str],
-) -> Dict[str, Any]:
-    return {
-        "name": result.name,
-        "star": result.star,
-        "quota": result.quota,
-        "is_up_g": result.is_up_g,
-        "is_6_g": result.is_6_g,
-        "is_5_g": result.is_5_g,
-        "is_current_up": result.name in up_names,
-        "is_past_up": result.name in past_up_names,
-        "config_name": config_name,
-    }
-
-
 __all__ = [
+    "BannerState",
     "consume_resource",
     "get_token",
     "handle_urgent_gacha",
     "initialize_banner_state",
-    "process_gacha_result",
-    "_worker_wrapper",
 ]
 
 
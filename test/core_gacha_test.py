@@ -4,13 +4,23 @@ import sys
 from decimal import Decimal
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from gacha_core import CharGacha, Counters, GlobalConfigLoader, WeaponGacha
+from gacha_core import (
+    BatchRandom,
+    CharBannerSolver,
+    CharGacha,
+    CharGachaBatch,
+    Counters,
+    GlobalConfigLoader,
+    WeaponGacha,
+    WeaponGachaBatch,
+)
 
 
 def _write_json(path: Path, payload: dict) -> None:
@@ -257,6 +267,73 @@ def test_seeded_weapon_instances_are_reproducible_when_interleaved():
     assert actual_b == expected_b
 
 
+def test_stream_random_is_reproducible_and_independent_per_stream():
+    first = BatchRandom.from_stream(7, trace=3, stage=1, size=64)
+    again = BatchRandom.from_stream(7, trace=3, stage=1, size=16)
+    values = [first.pop_float() for _ in range(64)]
+
+    # 缓冲区大小不影响序列本身
+    assert [again.pop_float() for _ in range(64)] == values
+    assert first.seed == again.seed
+
+    siblings = [
+        BatchRandom.from_stream(7, trace=4, stage=1, size=64),
+        BatchRandom.from_stream(7, trace=3, stage=2, size=64),
+        BatchRandom.from_stream(7, trace=3, stage=1, kind=1, size=64),
+        BatchRandom.from_stream(8, trace=3, stage=1, size=64),
+    ]
+    for sibling in siblings:
+        assert [sibling.pop_float() for _ in range(64)] != values
+
+    config = GlobalConfigLoader("configs/config_1")
+    gacha_a = CharGacha(config=config, rand=BatchRandom.from_stream(0, 5))
+    gacha_b = CharGacha(config=config, rand=BatchRandom.from_stream(0, 5))
+    assert [gacha_a.attempt().name for _ in range(50)] == [gacha_b.attempt().name for _ in range(50)]
+
+    with pytest.raises(ValueError):
+        BatchRandom.from_stream(0, -1)
+
+
+def test_batch_random_take_matches_pop_and_refill_grows_with_consumption():
+    popped = BatchRandom(seed=5, size=8)
+    sliced = BatchRandom(seed=5, size=8)
+
+    expected = [popped.pop_float() for _ in range(300)]
+    actual = [sliced.pop_float() for _ in range(3)]
+    actual.extend(sliced.take(10).tolist())
+    actual.extend(sliced.take(200).tolist())
+    actual.extend(sliced.pop_float() for _ in range(87))
+    assert actual == expected
+    assert isinstance(expected[0], float)
+
+    block = sliced.take(4)
+    assert not block.flags.writeable
+    assert popped.size > 8
+    assert popped.size <= BatchRandom.MAX_REFILL
+
+
+def test_gacha_random_state_is_created_on_first_draw_and_can_be_shared():
+    config = GlobalConfigLoader("configs/config_1")
+    gacha = CharGacha(config=config, seed=17)
+    assert gacha.rand._np_rand is None
+    assert "picker" not in vars(gacha.rand)
+    gacha.get_accumulated_reward()
+    assert gacha.rand._np_rand is None
+
+    reference = CharGacha(config=config, seed=17)
+    expected = [reference.attempt().name for _ in range(40)]
+
+    # 同一生成器在多个短生命周期实例间接续使用，与单个实例连续抽卡结果一致
+    shared = BatchRandom(seed=17, size=4)
+    counters = Counters()
+    actual = []
+    for _ in range(4):
+        request_gacha = CharGacha(config=config, rand=shared)
+        request_gacha.counters = counters
+        actual.extend(request_gacha.attempt().name for _ in range(10))
+    assert actual == expected
+
+
 def test_rule_config_is_isolated_from_cached_json():
     config = GlobalConfigLoader("configs/config_1")
 
@@ -270,6 +347,73 @@ def test_rule_config_is_isolated_from_cached_json():
     assert rules_b["base_prob"][6] == Decimal("0.008")
 
 
+def test_shared_loader_reuses_tables_and_reloads_after_file_change(tmp_path, monkeypatch):
+    import gacha_core.config as config_module
+
+    config_path = _make_temp_config(tmp_path)
+    loader = GlobalConfigLoader.shared(config_path)
+    gacha_a = WeaponGacha(config=loader, seed=1)
+    gacha_b = WeaponGacha(config=GlobalConfigLoader.shared(config_path), seed=2)
+    gacha_b.rule_config["base_prob"] = {6: 1, 5: 0, 4: 0}
+
+    assert GlobalConfigLoader.shared(config_path) is loader
+    assert gacha_a.star_up_prob is gacha_b.star_up_prob
+    assert gacha_a.rule_config["base_prob"][6] == Decimal("0.04")
+
+    banner_path = os.path.join(config_path, "weapon_banners.json")
+    payload = json.loads(Path(banner_path).read_text(encoding="utf-8"))
+    payload["banners"][0]["pool_name"] = "Reloaded Banner"
+    _write_json(Path(banner_path), payload)
+    stat = os.stat(banner_path)
+    os.utime(banner_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert GlobalConfigLoader.shared(config_path) is loader
+    monkeypatch.setattr(config_module, "_STAT_INTERVAL", 0.0)
+    reloaded = GlobalConfigLoader.shared(config_path)
+    assert reloaded is not loader
+    assert reloaded.get_pool_info("weapon")["name"] == "Reloaded Banner"
+    assert GlobalConfigLoader.shared(config_path) is reloaded
+
+
+def test_banner_model_is_compiled_once_and_shared_by_gacha_instances():
+    config = GlobalConfigLoader("configs/config_3")
+    model = config.get_banner_model("char")
+    gacha_a = CharGacha(config=config, seed=1)
+    gacha_b = CharGacha(config=config, seed=2)
+
+    assert gacha_a.model is gacha_b.model is model
+    assert model == GlobalConfigLoader("configs/config_3").get_banner_model("char")
+    assert hash(model) == hash(GlobalConfigLoader("configs/config_3").get_banner_model("char"))
+    assert model.names[model.name_index[gacha_a.up_char_name]] == gacha_a.up_char_name
+    assert model.pool(6).up_names == tuple(gacha_a.star_up_prob[6][0])
+    assert model.quota_by_star[6] == gacha_a.quota_rule[6] == 2000
+    with pytest.raises(AttributeError):
+        model.base_6star_prob = 1.0
+
+    weapon_model = config.get_banner_model("weapon")
+    assert weapon_model.apply_draws == WeaponGacha(config=config, seed=1).rule_config["apply_draws"]
+
+
+def test_pity_lookup_table_is_shared_by_scalar_batch_and_exact_paths():
+    config = GlobalConfigLoader("configs/config_3")
+    model = config.get_banner_model("char")
+    pity = np.arange(model.guarantee_6star + 1)
+
+    assert len(model.six_star_thresholds) == model.guarantee_6star + 1
+    assert model.six_star_thresholds[model.six_star_increase_start] == model.base_6star_prob
+    assert model.six_star_thresholds[model.six_star_increase_start + 1] == pytest.approx(
+        model.base_6star_prob + model.prob_increase
+    )
+    assert max(model.six_star_thresholds) <= model.prob_upper
+    assert model.five_star_thresholds[1] == pytest.approx(
+        model.base_6star_prob + (1 - model.base_6star_prob) * model.base_5star_ratio
+    )
+    np.testing.assert_array_equal(CharBannerSolver(config).six_star_prob(pity), model.six_star_thresholds)
+    batch = CharGachaBatch(config, players=1, seed=1)
+    np.testing.assert_array_equal(batch.five_star_thresholds, model.five_star_thresholds)
+    assert config.get_banner_model("weapon").six_star_thresholds == ()
+
+
 def test_char_soft_pity_distribution_matches_readme_assumption():
     config = GlobalConfigLoader("configs/config_1")
     gacha = CharGacha(config=config, seed=7, size=8192)
@@ -466,3 +610,121 @@ def test_weapon_banner_supports_multiple_current_up_items():
     assert forge_gacha.star_up_prob[6][0] == ["熔铸火焰"]
     assert swift_gacha.star_up_prob[6][0] == ["使命必达"]
 
+
+
+def test_char_batch_applies_all_guarantees_in_lockstep():
+    config = GlobalConfigLoader("configs/config_1")
+
+    hard = CharGachaBatch(config, players=256, seed=3, counters=Counters(no_6star=79))
+    hard_draw = hard.attempt()
+    up = CharGachaBatch(config, players=256, seed=3, counters=Counters(no_up=119))
+    up_draw = up.attempt()
+    floor = CharGachaBatch(config, players=256, seed=3, counters=Counters(no_5star_plus=9))
+    floor_draw = floor.attempt()
+
+    assert (hard_draw.star == 6).all() and hard_draw.is_6_g.all()
+    assert (hard.no_6star == 0).all()
+    assert up_draw.is_up_g.all() and up_draw.is_up.all()
+    assert {up.names[i] for i in up_draw.name_id} == {CharGacha(config, seed=1).up_char_name}
+    assert up.guarantee_used.all()
+    assert (floor_draw.star >= 5).all() and floor_draw.is_5_g.all()
+
+
+def test_char_batch_distribution_matches_scalar_engine():
+    config = GlobalConfigLoader("configs/config_1")
+    draws = 100
+    batch = CharGachaBatch(config, players=20000, seed=5)
+    stars, name_ids = batch.run(draws)
+    up_ids = [index for index, name in enumerate(batch.names) if name == "莱万汀"]
+    batch_six = (stars == 6).sum(axis=0).mean()
+    batch_five = (stars == 5).sum(axis=0).mean()
+    batch_up = np.isin(name_ids, up_ids).sum(axis=0).mean()
+
+    scalar_six, scalar_five, scalar_up = [], [], []
+    for player in range(1500):
+        gacha = CharGacha(config=config, seed=player)
+        results = [gacha.attempt() for _ in range(draws)]
+        scalar_six.append(sum(item.star == 6 for item in results))
+        scalar_five.append(sum(item.star == 5 for item in results))
+        scalar_up.append(sum(item.name == "莱万汀" for item in results))
+
+    assert batch_six == pytest.approx(np.mean(scalar_six), abs=0.12)
+    assert batch_five == pytest.approx(np.mean(scalar_five), abs=0.4)
+    assert batch_up == pytest.approx(np.mean(scalar_up), abs=0.1)
+
+
+def test_weapon_batch_applies_guarantees_on_last_slot():
+    config = GlobalConfigLoader("configs/config_1")
+
+    up = WeaponGachaBatch(config, players=256, seed=3, counters=Counters(no_up=7))
+    up_issue = up.attempt()
+    six = WeaponGachaBatch(config, players=256, seed=3, counters=Counters(no_6star=3, guarantee_used=True))
+    six_issue = six.attempt()
+
+    assert (up_issue.is_up.any(axis=1)).all()
+    assert up.guarantee_used.all() and (up.no_up == 0).all()
+    assert ((six_issue.star == 6).any(axis=1)).all()
+    assert (six.no_6star == 0).all()
+    assert up_issue.is_up_g.any() and six_issue.is_6_g.any()
+    assert not (up_issue.is_up_g & up_issue.is_6_g).any()
+    assert ((up_issue.star >= 5).any(axis=1)).all()
+
+
+def test_weapon_batch_distribution_matches_scalar_engine():
+    config = GlobalConfigLoader("configs/config_1")
+    issues = 12
+    batch = WeaponGachaBatch(config, players=20000, seed=5)
+    six_counts = np.zeros(batch.players)
+    up_counts = np.zeros(batch.players)
+    for _ in range(issues):
+        issue = batch.attempt()
+        six_counts += (issue.star == 6).sum(axis=1)
+        up_counts += issue.is_up.sum(axis=1)
+
+    scalar_six, scalar_up = [], []
+    for player in range(1500):
+        gacha = WeaponGacha(config=config, seed=player)
+        results = [item for _ in range(issues) for item in gacha.attempt()]
+        scalar_six.append(sum(item.star == 6 for item in results))
+        scalar_up.append(sum(item.name in gacha._up_weapon_names for item in results))
+
+    assert six_counts.mean() == pytest.approx(np.mean(scalar_six), abs=0.12)
+    assert up_counts.mean() == pytest.approx(np.mean(scalar_up), abs=0.1)
+
+
+def test_char_banner_solver_matches_batch_engine():
+    config = GlobalConfigLoader("configs/config_1")
+    draws = 90
+    dist = CharBannerSolver(config).solve(draws)
+
+    assert dist.six_star_probabilities.sum() == pytest.approx(1.0, abs=1e-9)
+    assert dist.six_star_probabilities[0] == 0.0  # 80 抽硬保底
+    assert dist.six_star_tail_probabilities[1] == pytest.approx(1.0)
+    assert dist.expected_six_star_count == pytest.approx(
+        np.dot(np.arange(len(dist.six_star_probabilities)), dist.six_star_probabilities), abs=1e-9
+    )
+    total = (
+        dist.expected_six_star_count + dist.expected_five_star_count + dist.expected_four_star_count
+    )
+    assert total == pytest.approx(draws)
+
+    batch = CharGachaBatch(config, players=40000, seed=11)
+    stars, name_ids = batch.run(draws)
+    up_ids = [index for index, name in enumerate(batch.names) if name == "莱万汀"]
+    is_up = np.isin(name_ids, up_ids)
+    assert dist.expected_six_star_count == pytest.approx((stars == 6).sum(axis=0).mean(), abs=0.02)
+    assert dist.expected_up_count == pytest.approx(is_up.sum(axis=0).mean(), abs=0.02)
+    assert dist.first_up_within_probability == pytest.approx(is_up.any(axis=0).mean(), abs=0.01)
+
+
+def test_char_banner_solver_respects_starting_counters():
+    config = GlobalConfigLoader("configs/config_1")
+    solver = CharBannerSolver(config)
+
+    hard = solver.solve(1, Counters(no_6star=79))
+    up = solver.solve(1, Counters(no_up=119))
+    used = solver.solve(1, Counters(no_up=119, guarantee_used=True))
+
+    assert hard.six_star_probabilities[1] == pytest.approx(1.0)
+    assert up.up_probabilities[1] == pytest.approx(1.0)
+    assert used.expected_up_count < 0.01
@@ -253,9 +253,20 @@ def test_eval_jobs_reject_inconsistent_questionnaire():
     assert body["error"].startswith("EVAL_QUESTIONNAIRE_INCONSISTENT:")
 
 
-def test_eval_compare_returns_ranked_results_and_baseline_deltas():
+def test_eval_compare_returns_ranked_results_and_baseline_deltas(monkeypatch):
+    import scheduler.executor
     from web.app import create_app
 
+    # 所有对比策略共用一个进程池
+    pools = []
+    real_pool = scheduler.executor.Pool
+
+    def counting_pool(*args, **kwargs):
+        pools.append(real_pool(*args, **kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(scheduler.executor, "Pool", counting_pool)
+
     app = create_app(dev_mode=True)
     client = app.test_client()
     strategy_payload = _build_eval_payload()
@@ -285,7 +296,9 @@ def test_eval_compare_returns_ranked_results_and_baseline_deltas():
     body = response.get_json()
     assert body is not None
     assert body["baseline_strategy_id"] == "fixed_draw_cap"
+    assert body["paired"] is True
     assert len(body["strategies"]) == 2
+    assert len(pools) == 1
     ids = {item["strategy_id"] for item in body["strategies"]}
     assert "candidate_a" in ids
     assert "baseline::fixed_draw_cap" in ids
@@ -293,6 +306,17 @@ def test_eval_compare_returns_ranked_results_and_baseline_deltas():
         assert "rank" in item
         assert "percentile" in item
         assert "score_delta_from_baseline" in item
+        low, high = item["score_delta_from_baseline_ci"]
+        assert low <= high
+        if item["strategy_id"] == "baseline::fixed_draw_cap":
+            assert item["score_delta_from_baseline_ci"] == [0.0, 0.0]
+        if item["rank"] == 1:
+            assert item["score_delta_from_best_ci"] == [0.0, 0.0]
+        assert set(item["cache_stats"]["tiers"]) >= {"memory", "database", "spline", "simulation"}
+
+    stats = client.get("/api/eval/cache_stats").get_json()
+    assert sum(tier["count"] for tier in stats["tiers"].values()) > 0
+    assert all(cache["size"] <= cache["capacity"] for cache in stats["front_caches"])
 
 
 def test_eval_jobs_reject_workers_exceeding_max():
@@ -1,18 +1,23 @@
 import json
 import os
+import random
 import sys
 
+import numpy as np
 import pytest
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from gacha_core import Counters, GlobalConfigLoader
+from gacha_core import CharGacha, Counters, GachaResult, GlobalConfigLoader
 from scheduler import Scheduler
 from scheduler.baseline import BaselineEstimator
 from scheduler.cache_db import BaselineCacheDB, preferences_hash
+from scheduler.executor import SimulationExecutor
+from scheduler.lattice import BaselineLattice
 from scheduler.models import (
+    SCORING_VERSION,
     LogMapConfig,
     Resource,
     ScoringPreferences,
@@ -21,12 +26,25 @@ from scheduler.models import (
     StrategyGoal,
     StrategyScoreReport,
     StrategyTrace,
+    TraceSummary,
+    ValueAccumulator,
+    calculate_results_value,
+    calculate_results_value_curve,
     calculate_trace_utility,
     log_map,
 )
 from scheduler.scoring import ScoringSystem
+from scheduler.stats import ScoreSamples, StreamingStats, TraceStatistics
 from scheduler.strategy_protocol import STRATEGY_PROTOCOL_VERSION, StrategyProtocolAdapter
-from scheduler.strategy_rules import StrategyCondition, StrategyRuleEngine, StrategyRuleSet
+from scheduler.strategy_rules import (
+    RULE_DRAW_COUNT,
+    RULE_OUTCOME,
+    RULE_RESOURCE,
+    StrategyCondition,
+    StrategyRuleEngine,
+    StrategyRuleSet,
+)
+from scheduler.workers import BannerState, StrategyRuntime, _simulator
 
 
 def stop_after_draws(draw_count: int) -> StrategyRuleSet:
@@ -107,6 +125,31 @@ def test_value_function_applies_potential_multiplier_and_linear_low_stars():
     assert value == pytest.approx(expected)
 
 
+def test_value_accumulator_curve_matches_recomputing_each_prefix():
+    prefs = ScoringPreferences(
+        past_up_character_names=["P"],
+        owned_character_potentials={"O": 2},
+    )
+    rng = random.Random(5)
+    results = [
+        {
+            "name": rng.choice("AOPN"),
+            "star": rng.choice((4, 4, 4, 5, 6)),
+            "is_current_up": rng.random() < 0.3,
+            "is_past_up": rng.random() < 0.2,
+        }
+        for _ in range(200)
+    ]
+
+    curve = calculate_results_value_curve(results, prefs)
+
+    assert curve == [calculate_results_value(results[: index + 1], prefs) for index in range(len(results))]
+    accumulator = ValueAccumulator(prefs)
+    for result in results:
+        accumulator.add_draw(result["name"], result["star"], result["is_current_up"], result["is_past_up"])
+    assert accumulator.value == curve[-1]
+
+
 def test_score_traces_supports_and_goals_and_tail_risk():
     prefs = ScoringPreferences(
         alpha=1.0,
@@ -190,6 +233,86 @@ def test_scheduler_evaluate_returns_reproducible_report():
     assert len(report_a.traces) == 12
 
 
+def test_streaming_summaries_score_identically_to_full_traces(tmp_path):
+    prefs = ScoringPreferences(baseline_samples=4, past_up_character_names=("A",))
+    goals = [
+        StrategyGoal(kind="current_up", target=1),
+        StrategyGoal(kind="past_up", target=1),
+        StrategyGoal(kind="character_count", target=1, character_name="B"),
+    ]
+    traces = [
+        make_trace(
+            results=[
+                {"name": "伊冯", "star": 6, "is_current_up": True},
+                {"name": "A", "star": 6, "is_current_up": False},
+                {"name": "B", "star": 5, "is_current_up": False},
+                {"name": "C", "star": 4, "is_current_up": False},
+            ],
+            paid_draws=4,
+            resource_left=30,
+        ),
+        make_trace(results=[{"name": "C", "star": 4}], paid_draws=1, resource_left=3),
+    ]
+    summaries = [TraceSummary.from_trace(trace) for trace in traces]
+    estimator = BaselineEstimator(samples=4, base_seed=5, cache_path=str(tmp_path / "cache.db"))
+
+    full = ScoringSystem.score_traces(traces, prefs, goals, estimator, include_traces=True)
+    streamed = ScoringSystem.score_traces(summaries, prefs, goals, estimator)
+
+    assert summaries[0].six_star_count == traces[0].six_star_count == 2
+    assert summaries[0].current_up_count == traces[0].current_up_count == 1
+    assert streamed.traces is None and len(full.traces) == 2
+    assert streamed.raw_score == full.raw_score
+    assert streamed.mean_utility == full.mean_utility
+    assert streamed.goal_completion_rate == full.goal_completion_rate == 0.5
+
+
+def test_streaming_stats_match_exact_statistics_and_merge():
+    import random
+    import statistics
+
+    rng = random.Random(3)
+    values = [rng.uniform(-50.0, 150.0) for _ in range(500)]
+    stats = StreamingStats(tail_size=25, bin_width=50.0)
+    stats.extend(values)
+
+    assert stats.count == 500
+    assert stats.mean == pytest.approx(statistics.fmean(values))
+    assert stats.stdev == pytest.approx(statistics.stdev(values))
+    assert (stats.minimum, stats.maximum) == (min(values), max(values))
+    assert stats.tail() == sorted(values)[:25]
+    assert sum(stats.histogram().values()) == 500
+
+    left, right = StreamingStats(tail_size=25, bin_width=50.0), StreamingStats(tail_size=25, bin_width=50.0)
+    left.extend(values[:123])
+    right.extend(values[123:])
+    left.merge(right)
+    assert left.variance == pytest.approx(stats.variance)
+    assert left.tail() == stats.tail()
+    assert left.histogram() == stats.histogram()
+
+
+def test_score_traces_fills_trace_statistics_in_the_same_pass(tmp_path):
+    prefs = ScoringPreferences(baseline_samples=4, tail_ratio=0.5)
+    goals = [StrategyGoal(kind="current_up", target=1)]
+    traces = [
+        make_trace(results=[{"name": "伊冯", "star": 6, "is_current_up": True}], paid_draws=1, resource_left=7),
+        make_trace(results=[{"name": "C", "star": 4}, {"name": "C", "star": 4}], paid_draws=2, resource_left=3),
+        make_trace(results=[{"name": "A", "star": 6}], paid_draws=1, resource_left=5),
+    ]
+    estimator = BaselineEstimator(samples=4, base_seed=5, cache_path=str(tmp_path / "cache.db"))
+
+    trace_statistics = TraceStatistics()
+    report = ScoringSystem.score_traces(traces, prefs, goals, estimator, trace_statistics=trace_statistics)
+    collected = TraceStatistics.collect(traces)
+
+    assert trace_statistics.count == collected.count == 3
+    assert trace_statistics.six_stars.histogram() == collected.six_stars.histogram() == {0: 1, 1: 2}
+    assert trace_statistics.current_ups.total == 1
+    assert (trace_statistics.resource_left.minimum, trace_statistics.resource_left.maximum) == (3, 7)
+    assert report.simulations == 3
+
+
 def test_global_config_loader_reads_char_banner_featured_names():
     config = GlobalConfigLoader("configs/config_3")
 
@@ -328,6 +451,78 @@ def test_evaluate_multiple_strategies_preserves_raw_scores_and_adds_rankings():
     assert all(report.raw_score >= 0.0 for report in reports)
     assert sorted(report.rank for report in reports) == [1, 2]
     assert all(report.percentile >= 50.0 for report in reports)
+    best = next(report for report in reports if report.rank == 1)
+    assert best.score_delta_from_best_ci == [0.0, 0.0]
+    assert all(report.score_delta_from_best_ci[0] <= report.score_delta_from_best_ci[1] for report in reports)
+
+
+def test_paired_bootstrap_narrows_delta_interval_for_common_random_numbers():
+    prefs = ScoringPreferences(tail_ratio=0.2)
+    rng = np.random.default_rng(5)
+    noise = rng.normal(size=400)
+
+    def samples(offset, shared):
+        result = ScoreSamples()
+        for value in shared:
+            result.add(
+                {
+                    "goal_met": float(value > 0),
+                    "utility": 50.0 + 10.0 * value + offset,
+                    "baseline": 50.0,
+                    "opportunity": 1.0,
+                    "quality": 40.0 + 10.0 * value + offset,
+                }
+            )
+        return result
+
+    quality = rng.normal(size=50)
+    order = np.argsort(quality)
+    tail = ScoringSystem._weighted_tail_mean(np.ones((50, 1)), order, quality[order], 10)
+    assert tail[0] == pytest.approx(np.sort(quality)[:10].mean())
+
+    base = samples(0.0, noise)
+    paired = ScoringSystem.paired_bootstrap_scores([base, samples(1.0, noise)], prefs, resamples=200)
+    independent = ScoringSystem.paired_bootstrap_scores(
+        [base, samples(1.0, rng.permutation(noise))], prefs, resamples=200
+    )
+    paired_delta = paired[:, 1] - paired[:, 0]
+    assert paired.shape == (200, 2)
+    assert (paired_delta > 0).all()
+    assert paired_delta.std() * 3 < (independent[:, 1] - independent[:, 0]).std()
+
+    reports = [
+        StrategyScoreReport(**{**dict.fromkeys(StrategyScoreReport.__dataclass_fields__), "rank": rank})
+        for rank in (2, 1)
+    ]
+    ScoringSystem.attach_paired_intervals(reports, [base, samples(1.0, noise)], prefs, baseline_index=0, resamples=200)
+    assert reports[1].score_delta_from_best_ci == [0.0, 0.0]
+    assert reports[0].score_delta_from_best_ci[1] < 0 < reports[1].score_delta_from_baseline_ci[0]
+    with pytest.raises(ValueError):
+        ScoringSystem.paired_bootstrap_scores([base, samples(0.0, noise[:10])], prefs)
+
+
+def test_simulation_executor_reuses_pool_and_matches_direct_simulation():
+    scheduler_a = Scheduler(config_dir="configs", arrange="arrange1", resource=Resource(2, 61000, 6000, 100))
+    scheduler_a.banner(stop_after_draws(30), name="config_3")
+    scheduler_b = Scheduler(config_dir="configs", arrange="arrange1", resource=Resource(2, 61000, 6000, 100))
+    scheduler_b.banner(stop_after_current_up_or_120_draws(), name="config_3")
+    plans = [scheduler_a._build_simulation_plan(True), scheduler_b._build_simulation_plan(True)]
+
+    with SimulationExecutor(workers=2) as executor:
+        assert executor.chunk_size(20) == 2
+        executor.prepare(plans)
+        pool = executor._pool
+        summaries = executor.run(1, 20, summarize=True)
+        traces = executor.run(0, 5)
+        executor.prepare(list(plans))
+        assert executor._pool is pool
+
+    assert executor._pool is None
+    expected = [
+        TraceSummary.from_trace(_simulator(*plans[1][:4], seed, plans[1].init_resource)) for seed in range(20)
+    ]
+    assert summaries == expected
+    assert [trace.total_paid_draws for trace in traces] == [30] * 5
 
 
 def test_baseline_estimator_uses_file_cache(tmp_path):
@@ -354,6 +549,116 @@ def test_baseline_estimator_uses_file_cache(tmp_path):
     assert estimator_b.cache_hits >= 1
 
 
+def test_estimate_many_deduplicates_queries_and_matches_single_estimates(tmp_path):
+    prefs = ScoringPreferences(baseline_samples=4, baseline_seed=3)
+    queries = [
+        ("config_3", Counters(), 10),
+        ("config_3", Counters(no_6star=20, no_5star_plus=2), 6),
+        ("config_3", Counters(), 10),
+        ("config_3", Counters(), 0),
+        ("config_3", Counters(no_6star=20, no_5star_plus=2), 6),
+    ]
+    batched = BaselineEstimator(samples=4, base_seed=3, cache_path=str(tmp_path / "batched.db"))
+    single = BaselineEstimator(samples=4, base_seed=3, cache_path=str(tmp_path / "single.db"))
+
+    values = batched.estimate_many(queries, prefs)
+
+    assert values == [single.estimate(name, counters, draws, prefs) for name, counters, draws in queries]
+    assert values[3] == 0.0
+    # 两个唯一键各查一次缓存
+    assert batched._db.cache_misses == 2
+    assert batched.estimate_many(queries, prefs) == values
+    assert batched.cache_hits == 2
+
+
+def test_baseline_cache_front_lru_writes_through_and_evicts(tmp_path):
+    cache_path = str(tmp_path / "front.db")
+    writer = BaselineCacheDB(cache_path, memory_size=2)
+    signature = (0, 0, 0, 0, False, False)
+    for index in range(3):
+        writer.set_baseline(f"k{index}", "config_3", signature, index + 1, "p", 4, 0, index + 0.5, "simulation", "v")
+
+    # 同一文件的新实例共享前置缓存：k0 已被淘汰，只能从 SQLite 读回
+    reader = BaselineCacheDB(cache_path, memory_size=2)
+    assert reader.get_exact_many(["k1", "k2", "k0", "missing"]) == {"k1": 1.5, "k2": 2.5, "k0": 0.5}
+    tiers = reader.telemetry.snapshot()
+    assert tiers["memory"]["count"] == 2
+    assert tiers["database"]["count"] == 1
+    assert (reader.cache_hits, reader.cache_misses) == (3, 1)
+    assert reader.get_exact("k0") == 0.5
+    assert reader.telemetry.snapshot()["memory"]["count"] == 3
+
+
+def test_baseline_cache_bulk_load_writes_rows_and_restores_index(tmp_path):
+    cache_path = tmp_path / "baseline-cache-bulk.db"
+    db = BaselineCacheDB(str(cache_path))
+    entries = [
+        {
+            "cache_key": f"bulk_{pd}",
+            "config_name": "config_3",
+            "counters_signature": (0, 10, 0, 30, False, False),
+            "paid_draws": pd,
+            "preferences_sig_hash": "p",
+            "samples": 4,
+            "seed": 17,
+            "estimate": pd / 3,
+            "source": "simulation",
+            "version": SCORING_VERSION,
+        }
+        for pd in range(1, 101)
+    ]
+
+    with db.bulk_load():
+        assert db.set_baselines_bulk(entries[:60]) == 60
+        assert db.set_baselines_bulk(entries[60:]) == 40
+        assert db.set_baselines_bulk([]) == 0
+    db.close()
+
+    reader = BaselineCacheDB(str(cache_path), memory_size=0)
+    conn = reader._get_conn()
+    indexes = {row["name"] for row in conn.execute("PRAGMA index_list(baseline_estimates)")}
+    assert "idx_baseline_interp" in indexes
+    assert reader.estimate_count == 100
+    assert reader.get_exact("bulk_7") == round(7 / 3, 6)
+
+
+def test_baseline_cache_tracks_anchor_coverage_and_merges_shards(tmp_path):
+    def anchor_entries(no_6star, paid_draws):
+        return [
+            {
+                "cache_key": f"anchor_{no_6star}_{pd}",
+                "config_name": "config_3",
+                "counters_signature": (0, no_6star, 0, 30, False, False),
+                "paid_draws": pd,
+                "preferences_sig_hash": "p",
+                "samples": 4,
+                "seed": 17,
+                "estimate": float(pd),
+                "source": "simulation",
+                "version": SCORING_VERSION,
+            }
+            for pd in paid_draws
+        ]
+
+    shard_a = BaselineCacheDB(str(tmp_path / "shard-a.db"))
+    shard_a.set_baselines_bulk(anchor_entries(10, range(1, 11)), meta={"precompute:a": "{}"})
+    shard_a.close()
+    shard_b = BaselineCacheDB(str(tmp_path / "shard-b.db"))
+    shard_b.set_baselines_bulk(anchor_entries(20, range(1, 6)), meta={"precompute:b": "{}"})
+    shard_b.close()
+
+    merged = BaselineCacheDB(str(tmp_path / "merged.db"))
+    assert merged.merge_from(str(tmp_path / "shard-a.db")) == 10
+    assert merged.merge_from(str(tmp_path / "shard-b.db")) == 5
+
+    coverage = merged.anchor_coverage("config_3", 4, 17, "p", SCORING_VERSION, 10)
+    assert coverage == {(10, 30, False): 10, (20, 30, False): 5}
+    assert merged.anchor_coverage("config_3", 4, 17, "p", "2.3.0", 10) == {}
+    assert set(merged.meta_items("precompute:")) == {"precompute:a", "precompute:b"}
+    assert merged.get_meta("precompute:a") == "{}"
+    assert merged.get_exact("anchor_20_5") == 5.0
+
+
 def test_baseline_estimator_interpolates_from_nearby_cached_points(tmp_path):
     cache_path = tmp_path / "baseline-cache.db"
     prefs = ScoringPreferences(baseline_samples=4, baseline_seed=17)
@@ -371,8 +676,21 @@ def test_baseline_estimator_interpolates_from_nearby_cached_points(tmp_path):
             seed=17,
             estimate=est,
             source="simulation",
-            version="2.4.0",
+            version=SCORING_VERSION,
         )
+    # 旧评分版本（旧随机数方案）的条目不参与插值
+    db.set_baseline(
+        cache_key="stale_25",
+        config_name="config_3",
+        counters_signature=(0, 0, 0, 0, False, False),
+        paid_draws=25,
+        preferences_sig_hash=pref_hash,
+        samples=4,
+        seed=17,
+        estimate=999.0,
+        source="simulation",
+        version="2.4.0",
+    )
     db.close()
 
     estimator = BaselineEstimator(
@@ -409,7 +727,7 @@ def test_baseline_estimator_interpolates_from_nearby_states(tmp_path):
             seed=17,
             estimate=est,
             source="simulation",
-            version="2.4.0",
+            version=SCORING_VERSION,
         )
     db.close()
 
@@ -425,6 +743,110 @@ def test_baseline_estimator_interpolates_from_nearby_states(tmp_path):
     assert value == pytest.approx(250.0)
 
 
+def test_baseline_batched_interpolation_matches_single_queries(tmp_path):
+    cache_path = tmp_path / "baseline-cache-batched-spline.db"
+    prefs = ScoringPreferences(baseline_samples=4, baseline_seed=17)
+    pref_hash = preferences_hash(prefs.theta_signature)
+
+    db = BaselineCacheDB(str(cache_path))
+    anchors = [(30, 12, 3, 12, False, False), (40, 22, 1, 22, False, False), (60, 5, 2, 40, True, False)]
+    for anchor_index, sig in enumerate(anchors):
+        for pd in range(0, 121, 20):
+            db.set_baseline(
+                cache_key=f"grid_{anchor_index}_{pd}",
+                config_name="config_3",
+                counters_signature=sig,
+                paid_draws=pd,
+                preferences_sig_hash=pref_hash,
+                samples=4,
+                seed=17,
+                estimate=float(pd * (anchor_index + 1) + 0.01 * pd * pd),
+                source="simulation",
+                version=SCORING_VERSION,
+            )
+    db.close()
+
+    estimator = BaselineEstimator(config_dir="configs", samples=4, base_seed=17, cache_path=str(cache_path))
+    targets = [
+        Counters(total=31, no_6star=12, no_5star_plus=3, no_up=13),
+        Counters(total=41, no_6star=21, no_5star_plus=1, no_up=22),
+        Counters(total=60, no_6star=5, no_5star_plus=2, no_up=40, guarantee_used=True),
+    ]
+    counters_list = [counters for counters in targets for _ in range(3)]
+    paid_draws_list = [25, 70, 115] * len(targets)
+
+    batched = estimator._interpolate_many("config_3", counters_list, paid_draws_list, prefs)
+    single = [
+        estimator._interpolate_estimate("config_3", counters, pd, prefs)
+        for counters, pd in zip(counters_list, paid_draws_list)
+    ]
+
+    assert batched == single
+    assert all(value is not None for value in batched)
+    # 锚点曲线外（抽数 0 或超过 120）不外推
+    assert estimator._interpolate_many("config_3", targets[:1] * 2, [0, 150], prefs) == [None, None]
+
+
+def test_baseline_lattice_interpolates_grid_anchors_and_round_trips_as_mmap(tmp_path):
+    cache_path = tmp_path / "baseline-cache-lattice.db"
+    prefs = ScoringPreferences(baseline_samples=4, baseline_seed=17)
+    pref_hash = preferences_hash(prefs.theta_signature)
+
+    def grid_value(no_6star, no_up, guarantee_used, pd):
+        return 2.0 * no_6star + 0.5 * no_up + 100.0 * guarantee_used + 10.0 * pd
+
+    db = BaselineCacheDB(str(cache_path))
+    for no_6star in (50, 55, 60):
+        for no_up in (30, 60):
+            for guarantee_used in (False, True):
+                for pd in (10, 20, 30):
+                    db.set_baseline(
+                        cache_key=f"grid_{no_6star}_{no_up}_{guarantee_used}_{pd}",
+                        config_name="config_3",
+                        counters_signature=(0, no_6star, 0, no_up, guarantee_used, False),
+                        paid_draws=pd,
+                        preferences_sig_hash=pref_hash,
+                        samples=4,
+                        seed=17,
+                        estimate=grid_value(no_6star, no_up, guarantee_used, pd),
+                        source="simulation",
+                        version=SCORING_VERSION,
+                    )
+    db.close()
+
+    estimator = BaselineEstimator(config_dir="configs", samples=4, base_seed=17, cache_path=str(cache_path))
+    # 网格为线性函数，多线性插值应精确复原；total / no_5star_plus 视为无关维度
+    target = Counters(total=80, no_6star=52, no_5star_plus=3, no_up=45, guarantee_used=True)
+    assert estimator.estimate("config_3", target, 25, prefs) == pytest.approx(grid_value(52, 45, True, 25))
+    assert estimator.telemetry.snapshot()["lattice"]["count"] == 1
+
+    lattice = estimator._get_lattice("config_3", prefs)
+    assert lattice.values.shape == (3, 2, 2, 3)
+    # 超出网格（no_up 越界、抽数越界）不外推
+    outside = lattice.query([52, 52], [90, 45], [1, 1], [25, 35])
+    assert np.isnan(outside).all()
+
+    path = BaselineLattice.path_for(str(cache_path), "config_3", 4, 17, pref_hash)
+    lattice.save(path)
+    loaded = BaselineLattice.load(path)
+    assert isinstance(loaded.values, np.memmap)
+    queries = ([50, 57.5, 60], [30, 40, 60], [0, 1, 0], [10, 12, 30])
+    np.testing.assert_allclose(loaded.query(*queries), lattice.query(*queries))
+    np.testing.assert_allclose(
+        loaded.query(*queries), [grid_value(*point) for point in zip(*queries)]
+    )
+
+    # 旧评分版本导出的张量不再使用，估计器回退到当前版本的缓存行
+    lattice.save(path, {"version": "2.4.0"})
+    assert BaselineLattice.load(path) is None
+    stale = BaselineLattice(
+        lattice.no_6star, lattice.no_up, lattice.guarantee_used, lattice.paid_draws, np.full((3, 2, 2, 3), -1.0)
+    )
+    stale.save(path, {"version": "2.4.0"})
+    fresh = BaselineEstimator(config_dir="configs", samples=4, base_seed=17, cache_path=str(cache_path))
+    assert fresh.estimate("config_3", target, 25, prefs) == pytest.approx(grid_value(52, 45, True, 25))
+
+
 def test_six_star_distribution_uses_file_cache(tmp_path):
     cache_path = tmp_path / "distribution-cache.json"
     estimator_a = BaselineEstimator(
@@ -449,6 +871,42 @@ def test_six_star_distribution_uses_file_cache(tmp_path):
     assert dist_b.cache_hit is True
 
 
+def test_analytic_baseline_matches_simulation_and_ignores_seed(tmp_path):
+    prefs = ScoringPreferences(owned_character_potentials={"伊冯": 1})
+    counters = Counters(no_6star=40, no_5star_plus=4)
+    analytic_a = BaselineEstimator(
+        samples=4, base_seed=1, cache_path=str(tmp_path / "a.db"), mode="analytic"
+    )
+    analytic_b = BaselineEstimator(
+        samples=4, base_seed=2, cache_path=str(tmp_path / "b.db"), mode="analytic"
+    )
+    simulated = BaselineEstimator(samples=3000, base_seed=3, cache_path=str(tmp_path / "c.db"))
+
+    value = analytic_a.estimate("config_3", counters, 20, prefs)
+
+    assert value == analytic_b.estimate("config_3", counters, 20, prefs)
+    assert value == pytest.approx(simulated.estimate("config_3", counters, 20, prefs), rel=0.05)
+    assert analytic_a.estimate("config_3", counters, 10, prefs) < value
+    assert analytic_a._db.estimate_count == 0
+
+
+def test_six_star_distribution_uses_exact_solver(tmp_path):
+    estimator = BaselineEstimator(
+        config_dir="configs",
+        samples=4,
+        base_seed=17,
+        cache_path=str(tmp_path / "distribution-cache.db"),
+    )
+    dist = estimator.estimate_six_star_distribution("config_3", Counters(no_6star=75), 10)
+
+    assert dist.method == "exact"
+    assert dist.stderr == 0.0
+    assert dist.probabilities.get("0", 0.0) == 0.0
+    assert sum(dist.probabilities.values()) == pytest.approx(1.0)
+    assert dist.tail_probabilities["1"] == pytest.approx(1.0)
+    assert estimator.estimate_six_star_distribution("config_3", Counters(no_6star=75), 10).method == "exact"
+
+
 def test_owned_potential_records_use_incremental_value():
     prefs = ScoringPreferences(
         owned_character_potentials={"A": 0},
@@ -467,6 +925,49 @@ def test_owned_potential_records_use_incremental_value():
     assert value == pytest.approx(expected)
 
 
+def test_result_columns_keep_dict_view_and_pickle_compactly():
+    import pickle
+
+    from gacha_core import GachaResult
+    from scheduler.models import ResultColumns
+
+    columns = ResultColumns("config_3", ["伊冯", "A", "B"], current_up_names={"伊冯"}, past_up_names={"A"})
+    records = []
+    for index in range(300):
+        name, star = [("伊冯", 6), ("A", 6), ("B", 5), ("C", 4)][index % 4]
+        columns.append_result(GachaResult(name=name, star=star, quota=20, is_6_g=index == 1))
+        records.append(
+            {
+                "name": name,
+                "star": star,
+                "quota": 20,
+                "is_up_g": False,
+                "is_6_g": index == 1,
+                "is_5_g": False,
+                "is_current_up": name == "伊冯",
+                "is_past_up": name == "A",
+                "config_name": "config_3",
+            }
+        )
+
+    restored = pickle.loads(pickle.dumps(columns))
+    assert restored == records
+    assert restored[-1] == records[-1] and restored[1:3] == records[1:3]
+    assert len(pickle.dumps(columns)) * 5 < len(pickle.dumps(records))
+
+    stage = StageTrace("config_3", Counters(), Counters(), 300, 0, 0, results=restored)
+    summary = TraceSummary.from_trace(
+        StrategyTrace(completed=True, total_paid_draws=300, total_bonus_draws=0, final_resource_left=0, stages=[stage])
+    )
+    assert summary.stages[0].current_up_names == {"伊冯": 75}
+    assert summary.stages[0].six_star_names == {"A": 75}
+    assert summary.stages[0].other_names == {"B": 75, "C": 75}
+    assert stage.six_star_count == 150 and stage.current_up_count == 75
+
+    restored.mark_past_up(set())
+    assert not any(record["is_past_up"] for record in restored)
+
+
 def test_past_up_name_list_drives_value_classification():
     prefs = ScoringPreferences(past_up_character_names=("PastA",))
     trace = make_trace(
@@ -543,6 +1044,129 @@ def test_strategy_rule_engine_supports_legacy_semantic_flags():
     assert StrategyRuleEngine.should_stop(rule_set, draw_count=79, state=state) is False
 
 
+def test_compiled_rules_match_tree_walk_and_batch_mask():
+    rng = random.Random(11)
+    kinds = ["draws", "draw_count", "current_up", "six_star_count", "urgent", "dossier", "oprt", "resource_left"]
+    operators = ["==", "!=", ">", "<", ">=", "<="]
+
+    def random_node(depth):
+        if depth < 2 and rng.random() < 0.35:
+            children = [random_node(depth + 1) for _ in range(rng.randint(0, 3))]
+            return StrategyRuleSet(match=rng.choice(["all", "any"]), conditions=children)
+        kind = rng.choice(kinds)
+        if rng.random() < 0.15:
+            return StrategyCondition(kind=kind, operator="in", value=[0, 1, 30, 60])
+        return StrategyCondition(kind=kind, operator=rng.choice(operators), value=rng.choice([0, 1, 2, 30, 60, True]))
+
+    states = [
+        {
+            "current_up": rng.randint(0, 2),
+            "six_star_count": rng.randint(0, 3),
+            "urgent": rng.random() < 0.5,
+            "dossier": rng.random() < 0.5,
+            "oprt": rng.random() < 0.5,
+            "resource_left": rng.randint(0, 80),
+        }
+        for _ in range(40)
+    ]
+    draw_counts = np.array([rng.choice([0, 1, 2, 30, 45, 60, 80]) for _ in states])
+    batch_state = {key: np.array([state[key] for state in states]) for key in states[0]}
+
+    for _ in range(60):
+        rule_set = StrategyRuleSet(match=rng.choice(["all", "any"]), conditions=[random_node(0) for _ in range(3)])
+        compiled = StrategyRuleEngine.compile(rule_set)
+        expected = [
+            StrategyRuleEngine.should_stop(rule_set, draw_count=int(draw), state=state)
+            for draw, state in zip(draw_counts, states)
+        ]
+        assert [compiled(int(draw), state) for draw, state in zip(draw_counts, states)] == expected
+        assert compiled.mask(draw_counts, batch_state).tolist() == expected
+
+    assert StrategyRuleEngine.compile(StrategyRuleSet()).tree == ("const", True)
+    with pytest.raises(ValueError):
+        StrategyRuleEngine.compile({"conditions": [{"kind": "draws", "operator": "~", "value": 1}]})
+
+
+def test_banner_state_updates_incrementally_and_reads_as_mapping():
+    gacha = CharGacha(GlobalConfigLoader("configs/config_3"), seed=3)
+    state = BannerState(gacha, urgent_used=False)
+    up_name = gacha.model.pools[0].up_names[0]
+    other_six = gacha.model.pools[0].normal_names[0]
+
+    gacha.counters.total = 61
+    gacha.counters.no_6star = 70
+    state.record(GachaResult(name=other_six, star=6, quota=0))
+    assert (state.oprt, state.soft_pity, state.up_oprt, state.dossier) == (True, True, False, True)
+
+    gacha.counters.total = 481
+    gacha.counters.no_6star = 0
+    state.record(GachaResult(name=up_name, star=6, quota=0))
+    # 2 个信物（481 // 240）+ 1 份当期 UP
+    assert (state.current_up, state.six_star_count, state.potential) == (1, 2, 3)
+
+    state["resource_left"] = 12
+    assert dict(state)["resource_left"] == 12
+    assert set(state) == set(BannerState.KEYS)
+    assert state.get("flag", False) is False
+    with pytest.raises(KeyError):
+        state["unknown"] = 1
+    rule_set = StrategyRuleSet(
+        match="all",
+        conditions=[
+            StrategyCondition(kind="up_operator_count", operator=">=", value=1),
+            StrategyCondition(kind="resource_left", operator="<", value=20),
+        ],
+    )
+    assert StrategyRuleEngine.should_stop(rule_set, draw_count=0, state=state) is True
+    assert StrategyRuleEngine.compile(rule_set)(0, state) is True
+
+
+def test_static_strategy_analysis_plans_stop_draw_without_changing_traces(monkeypatch):
+    resource_safe = StrategyRuleSet(
+        match="any",
+        conditions=[
+            StrategyCondition(kind="resource_left", operator=">=", value=80),
+            StrategyCondition(kind="draws", operator=">=", value=60),
+        ],
+    )
+    assert StrategyRuleEngine.classify(stop_after_draws(30)) == RULE_DRAW_COUNT
+    assert StrategyRuleEngine.classify(resource_safe) == RULE_RESOURCE
+    assert StrategyRuleEngine.classify(stop_after_current_up_or_120_draws()) == RULE_OUTCOME
+    assert StrategyRuleEngine.compile(stop_after_draws(30)).stop_draw(10) == 20
+    program = StrategyRuleEngine.compile(resource_safe)
+    assert program.stop_draw(10, iter([70, 79, 80, 81])) == 2
+    assert program.stop_draw(10, iter([3, 2])) == 2
+    with pytest.raises(ValueError):
+        program.stop_draw(10)
+    with pytest.raises(ValueError):
+        StrategyRuleEngine.compile(stop_after_current_up_or_120_draws()).stop_draw(0)
+
+    plans = []
+    for rules, resource in (
+        (stop_after_draws(45), Resource(2, 61000, 6000, 100)),
+        (stop_after_draws(999999), Resource(3, 20000, 0, 10)),
+        (resource_safe, Resource(0, 45000, 0, 0)),
+    ):
+        scheduler = Scheduler(config_dir="configs", arrange="arrange1", resource=resource)
+        scheduler.banner(rules, name="config_3")
+        scheduler.banner(rules, name="config_4", use_origeometry=True)
+        assert [entry["classification"] for entry in scheduler.strategy_analysis()] == [
+            StrategyRuleEngine.classify(rules)
+        ] * 2
+        plans.append(scheduler._build_simulation_plan(True))
+
+    def simulate():
+        return [
+            [TraceSummary.from_trace(_simulator(*plan[:4], seed, plan.init_resource)) for seed in range(8)]
+            for plan in plans
+        ]
+
+    planned = simulate()
+    monkeypatch.setattr(StrategyRuntime, "planned_iterations", lambda self, *args: None)
+    assert planned == simulate()
+    assert {summary.completed for summary in planned[1]} == {False}
+
+
 def test_strategy_rule_engine_supports_nested_groups():
     rule_set = StrategyRuleSet(
         match="all",
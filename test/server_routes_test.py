@@ -84,3 +84,26 @@ def test_dev_mode_allows_source_static_css_js():
 
     assert client.get("/static/pages/gacha/css/layout.css").status_code == 200
     assert client.get("/static/pages/gacha/js/main.js").status_code == 200
+
+
+def test_pooled_request_randoms_are_seeded_independently_of_clock(monkeypatch):
+    import threading
+
+    import gacha_core.randomizer
+    from web.routes import gacha as gacha_routes
+
+    # 冻结时钟：按时间戳取种子的两个线程必然相同
+    monkeypatch.setattr(gacha_core.randomizer, "time", lambda: 1_700_000_000.0)
+
+    seeds = []
+
+    def worker():
+        seeds.append(gacha_routes._request_random().seed)
+
+    for _ in range(2):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert len(seeds) == 2
+    assert seeds[0] != seeds[1]
@@ -12,6 +12,7 @@ from gacha_core import Counters, GlobalConfigLoader
 from scheduler import Resource, Scheduler
 from scheduler.models import ScoringPreferences, StrategyGoal, StrategyScoreReport
 from scheduler.scoring import ScoringSystem
+from scheduler.stats import ScoreSamples
 from scheduler.strategy_protocol import StrategyProtocolAdapter
 
 VALID_CONFIG_PREFIX = "config_"
@@ -40,7 +41,7 @@ def list_eval_configs(config_root: str = "configs") -> List[Dict[str, Any]]:
         if not os.path.isdir(config_path):
             continue
         try:
-            loader = GlobalConfigLoader(config_path)
+            loader = GlobalConfigLoader.shared(config_path)
             featured = loader.get_char_featured_names()
             pool_info = loader.get_pool_info("char")
         except (FileNotFoundError, ValueError):
@@ -136,6 +137,10 @@ def validate_compare_payload(payload: Dict[str, Any] | None) -> Dict[str, Any]:
                 f"不支持的 baseline_strategy_id: {baseline_strategy_id}"
             )
 
+    paired = payload.get("paired", True)
+    if not isinstance(paired, bool):
+        raise ValueError("paired 必须是布尔值")
+
     return {
         "resource": _resource_dict(payload.get("resource")),
         "initial_counters": _counters_dict(payload.get("initial_counters")),
@@ -144,6 +149,7 @@ def validate_compare_payload(payload: Dict[str, Any] | None) -> Dict[str, Any]:
         "scale": scale,
         "strategies": strategies,
         "baseline_strategy_id": baseline_strategy_id,
+        "paired": paired,
     }
 
 
@@ -155,27 +161,17 @@ def evaluate_payload(
         arrange="arrangement",
         resource=Resource(**payload["resource"]),
     )
-    initial_counters = Counters(**payload["initial_counters"])
-
-    for index, plan in enumerate(payload["banner_plans"]):
-        scheduler.banner(
-            rules=plan["strategy"],
-            name=plan["config_name"],
-            resource_increment=Resource(**plan["resource_increment"]),
-            init_counters=initial_counters if index == 0 else Counters(),
-            check_in=plan["check_in"],
-            use_origeometry=plan["use_origeometry"],
-            is_core=plan["is_core"],
-        )
+    _apply_banner_plans(scheduler, payload["banner_plans"], payload["initial_counters"])
 
     workers = payload["workers"] if payload["workers"] is not None else default_workers
-    report = scheduler.evaluate(
-        scale=payload["scale"],
-        workers=workers,
-        show_progress=False,
-        preferences=payload["preferences"],
-        goals=payload["goals"],
-    )
+    with scheduler:
+        report = scheduler.evaluate(
+            scale=payload["scale"],
+            workers=workers,
+            show_progress=False,
+            preferences=payload["preferences"],
+            goals=payload["goals"],
+        )
     result = asdict(report)
     result.pop("traces", None)
     return result
@@ -203,20 +199,43 @@ def evaluate_compare_payload(
             }
         )
 
-    workers = default_workers
+    # 所有策略共用一个 Scheduler：先为每个策略生成计划，进程池只启动一次并一次性载入全部计划
+    scheduler = Scheduler(
+        config_dir="configs",
+        arrange="arrangement",
+        resource=Resource(**payload["resource"]),
+    )
+    strategy_schedules = []
+    plans = []
     for item in strategy_items:
-        report = _evaluate_single_strategy(
-            resource=payload["resource"],
-            initial_counters=payload["initial_counters"],
-            strategy_plans=item["banner_plans"],
-            scale=payload["scale"],
-            workers=workers,
-            preferences=payload["preferences"],
-            goals=payload["goals"],
-        )
-        reports.append(report)
+        scheduler.schedules = []
+        _apply_banner_plans(scheduler, item["banner_plans"], payload["initial_counters"])
+        strategy_schedules.append(scheduler.schedules)
+        plans.append(scheduler._build_simulation_plan(True))
+
+    # 各策略都以种子 0..scale-1 模拟，第 i 条轨迹共享随机流，可做配对比较
+    paired = payload.get("paired", True)
+    samples: List[ScoreSamples] = []
+    with scheduler:
+        for plan_index, schedules in enumerate(strategy_schedules):
+            scheduler.schedules = schedules
+            score_samples = ScoreSamples() if paired else None
+            report = scheduler.evaluate(
+                scale=payload["scale"],
+                workers=default_workers,
+                show_progress=False,
+                preferences=payload["preferences"],
+                goals=payload["goals"],
+                score_samples=score_samples,
+                plans=plans,
+                plan_index=plan_index,
+            )
+            reports.append(report)
+            if score_samples is not None:
+                samples.append(score_samples)
 
     ScoringSystem.rank_reports(reports)
+    baseline_index = None
     if baseline_label is not None:
         baseline_index = next(
             index
@@ -224,6 +243,13 @@ def evaluate_compare_payload(
             if strategy["id"] == baseline_label
         )
         ScoringSystem.attach_baseline_deltas(reports, baseline_index)
+    if paired:
+        ScoringSystem.attach_paired_intervals(
+            reports,
+            samples,
+            ScoringSystem.normalize_preferences(payload["preferences"]),
+            baseline_index=baseline_index,
+        )
 
     results: List[Dict[str, Any]] = []
     for strategy, report in zip(strategy_items, reports):
@@ -236,26 +262,15 @@ def evaluate_compare_payload(
     return {
         "strategies": results,
         "baseline_strategy_id": payload.get("baseline_strategy_id"),
+        "paired": paired,
     }
 
 
-def _evaluate_single_strategy(
-    *,
-    resource: Dict[str, int],
-    initial_counters: Dict[str, Any],
-    strategy_plans: List[Dict[str, Any]],
-    scale: int,
-    workers: int | None,
-    preferences: Dict[str, Any],
-    goals: List[Dict[str, Any]],
-) -> StrategyScoreReport:
-    scheduler = Scheduler(
-        config_dir="configs",
-        arrange="arrangement",
-        resource=Resource(**resource),
-    )
+def _apply_banner_plans(
+    scheduler: Scheduler, banner_plans: List[Dict[str, Any]], initial_counters: Dict[str, Any]
+) -> None:
     shared_counters = Counters(**initial_counters)
-    for index, plan in enumerate(strategy_plans):
+    for index, plan in enumerate(banner_plans):
         scheduler.banner(
             rules=plan["strategy"],
             name=plan["config_name"],
@@ -265,13 +280,6 @@ def _evaluate_single_strategy(
             use_origeometry=plan["use_origeometry"],
             is_core=plan["is_core"],
         )
-    return scheduler.evaluate(
-        scale=scale,
-        workers=workers,
-        show_progress=False,
-        preferences=preferences,
-        goals=goals,
-    )
 
 
 def _validate_banner_plans(banner_plans: Any) -> List[Dict[str, Any]]:
@@ -7,6 +7,8 @@ from multiprocessing import cpu_count
 
 from flask import jsonify, render_template, request
 
+from scheduler.cache_db import front_cache_stats
+
 from ..eval_jobs import EvaluationJobManager
 from ..evaluator import (
     MAX_PARALLEL_EVALS,
@@ -68,6 +70,10 @@ def register_routes(app):
             return jsonify({"error": message}), status_code
         return jsonify(result), 200
 
+    @app.route("/api/eval/cache_stats", methods=["GET"])
+    def eval_cache_stats():
+        return jsonify(front_cache_stats())
+
     @app.route("/api/eval/jobs/<job_id>", methods=["GET"])
     def eval_job_status(job_id: str):
         snapshot = get_job_manager().get_job(job_id)
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 """Gacha API: 抽卡、加急招募、累计奖励。"""
 
+import os
+import threading
 from datetime import datetime
 
 from flask import jsonify, request
 
-from gacha_core import CharGacha, GlobalConfigLoader, WeaponGacha
+from gacha_core import BatchRandom, CharGacha, GlobalConfigLoader, WeaponGacha
 
 from .. import user as user_store
 from ..resource import (
@@ -15,6 +17,25 @@ from ..resource import (
 
 DEFAULT_CONFIG = GlobalConfigLoader("configs/config_6")
 
+# 每个服务线程复用一个随机生成器，请求只创建持有计数器的卡池实例
+_THREAD_RANDOM = threading.local()
+# 单个请求最多消耗的随机数约为 10 抽 × 2（星级 + UP 判定）
+_REQUEST_RANDOM_SIZE = 32
+
+
+def _request_random() -> BatchRandom:
+    """返回当前线程复用的随机生成器，首次调用时按单次请求的用量创建。
+
+    生成器伴随线程整个生命周期，种子取自系统熵源而非时间戳，
+    避免同一微秒内初始化的两个线程得到相关的随机序列。
+    """
+    rand = getattr(_THREAD_RANDOM, "rand", None)
+    if rand is None:
+        seed = int.from_bytes(os.urandom(4), "little")
+        rand = BatchRandom(seed=seed, size=_REQUEST_RANDOM_SIZE)
+        _THREAD_RANDOM.rand = rand
+    return rand
+
 
 def _build_result_record(result, draw_number):
     return {
@@ -96,7 +117,7 @@ def register_routes(app):
         res_before = _snapshot_resources(user_info)
 
         if pool_type == "char":
-            gacha = CharGacha(DEFAULT_CONFIG)
+            gacha = CharGacha(DEFAULT_CONFIG, rand=_request_random())
             gacha.counters.total = user_info["char_gacha"]["total"]
             gacha.counters.no_6star = user_info["char_gacha"]["no_6star"]
             gacha.counters.no_5star_plus = user_info["char_gacha"]["no_5star_plus"]
@@ -124,7 +145,7 @@ def register_routes(app):
                 user_info["resources"]["urgent_used"] = True
 
         else:
-            gacha = WeaponGacha(DEFAULT_CONFIG)
+            gacha = WeaponGacha(DEFAULT_CONFIG, rand=_request_random())
             gacha.counters.total = user_info["weapon_gacha"]["total"]
             gacha.counters.no_6star = user_info["weapon_gacha"]["no_6star"]
             gacha.counters.no_up = user_info["weapon_gacha"]["no_up"]
@@ -169,7 +190,7 @@ def register_routes(app):
         res_before = _snapshot_resources(user_info)
         user_info["resources"]["urgent_recruitment"] -= 1
 
-        gacha = CharGacha(DEFAULT_CONFIG)
+        gacha = CharGacha(DEFAULT_CONFIG, rand=_request_random())
         results = []
         for _ in range(10):
             r = gacha.attempt()